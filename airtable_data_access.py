@@ -1,18 +1,111 @@
+import hashlib
+import os
 import requests
 import sys
 import traceback
 import random
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 
-AIRTABLE_URL = "https://api.airtable.com/v0/applW7zbiH23gDDCK/french_words"
-SPACED_REP_URL = "https://api.airtable.com/v0/applW7zbiH23gDDCK/spaced_rep"
+import airtable_rate_limit as rate_limit
+import scheduler
+from airtable_formula import field_equals, field_in, for_user, level_due
+from airtable_schema import compile_decoder, load_schema, to_int
+from airtable_stream import CHUNK_SIZE, RecordStream
+
+if TYPE_CHECKING:
+    from word_store import WordStore
+
+# ``AIRTABLE_API_URL`` points the app at another Airtable-compatible server,
+# such as the local stand-in in ``benchmarks/fake_airtable.py``.
+AIRTABLE_API_URL = os.environ.get("AIRTABLE_API_URL", "https://api.airtable.com/v0")
+BASE_ID = "applW7zbiH23gDDCK"
+AIRTABLE_URL = f"{AIRTABLE_API_URL}/{BASE_ID}/french_words"
+SPACED_REP_URL = f"{AIRTABLE_API_URL}/{BASE_ID}/spaced_rep"
+
+# Every Airtable request goes through one pooled session so connections (and
+# their TLS handshakes) are reused across requests and threads.
+HTTP_POOL_SIZE = 32
+http = requests.Session()
+http.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+http.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+# List responses are repetitive JSON and shrink several times under gzip,
+# which requests already accepts (and decodes) by default.
+
+MAX_LEVEL = 5
+# Minimum age in days before a card at each level is due again.
+LEVEL_MIN_AGE_DAYS = {1: 1, 2: 7, 3: 14, 4: 30, 5: None}
+# spaced_rep rows with an empty ``User`` belong to this learner, which keeps
+# data recorded before per-user partitioning working unchanged.
+DEFAULT_USER = ""
+# Airtable accepts at most this many records per create/update request.
+WRITE_BATCH_SIZE = 10
+# Cards per deck: due cards first, then filler words.
+DECK_SIZE = 25
+# How due cards are chosen: "ladder" (the fixed levels above) or "adaptive"
+# (per-card stability and ease, see :mod:`scheduler`).
+SCHEDULER = scheduler.scheduler_name(os.environ.get("SCHEDULER"))
+# spaced_rep fields the adaptive scheduler reads and writes in addition to
+# ``Level`` and ``Date``.
+MEMORY_FIELDS = ("Stability", "Ease")
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Flashcard fields that come from the french_words record itself.
+CONTENT_FIELDS = (
+    "front",
+    "back",
+    "frequency",
+    "gender",
+    "part_of_speech",
+    "example_1",
+    "example_2",
+    "image",
+)
+
+# french_words fields a deck needs; also the ``fields[]`` projection of the query.
+# ``Frequency`` is decoded raw because cards keep Airtable's text for it.
+DECK_FIELDS = (
+    "french_word",
+    "english_translation",
+    "Frequency",
+    "gender",
+    "part_of_speech",
+    "example_1",
+    "example_2",
+    "image",
+)
+decode_deck_record = compile_decoder(
+    load_schema(), "french_words", DECK_FIELDS, raw=("Frequency",)
+)
+# french_words fields shown on a card page; the frequency is already known.
+CARD_FIELDS = (
+    "french_word",
+    "english_translation",
+    "gender",
+    "part_of_speech",
+    "example_1",
+    "example_2",
+    "image",
+)
+decode_card_record = compile_decoder(load_schema(), "french_words", CARD_FIELDS)
+# spaced_rep keeps ``Frequency`` and ``Level`` as text; they are parsed to ints
+# where they are compared, and a frequency is otherwise kept as Airtable's text.
+decode_due_record = compile_decoder(
+    load_schema(), "spaced_rep", ("Frequency",), convert={"Frequency": to_int}
+)
+REVIEW_FIELDS = ("Frequency", "Level", "Date") + MEMORY_FIELDS
+decode_review_record = compile_decoder(
+    load_schema(),
+    "spaced_rep",
+    REVIEW_FIELDS,
+    raw=("Frequency",) + MEMORY_FIELDS,
+    convert={"Level": to_int},
+)
+
+@dataclass(frozen=True, slots=True)
 class Flashcard:
     """Container for a single flashcard loaded from Airtable."""
 
@@ -24,6 +117,109 @@ class Flashcard:
     part_of_speech: str | None = None
     example_1: str | None = None
     example_2: str | None = None
+    # Attachment id of the word's image, served from :mod:`image_cache`.
+    image: str | None = None
+
+    def to_dict(self) -> dict:
+        """Return the card as a flat dict.
+
+        Unlike :func:`dataclasses.asdict` this does not deep-copy field values,
+        which are all immutable strings anyway.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def content_hash(self) -> str:
+        """Return a stable digest of the card's word content.
+
+        The per-user ``level`` is excluded so the digest only changes when the
+        underlying Airtable record does.
+        """
+        digest = hashlib.blake2b(digest_size=12)
+        for name in CONTENT_FIELDS:
+            digest.update((getattr(self, name) or "").encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+
+def flashcards_to_json(cards: List[Flashcard]) -> str:
+    """Serialize ``cards`` to a compact JSON array."""
+    return json.dumps(
+        [card.to_dict() for card in cards], ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def parse_frequency(raw: object) -> int | None:
+    """Return ``raw`` as an integer frequency or ``None`` if it is not numeric.
+
+    ``Frequency`` may come back from Airtable as an int, float or string.
+    """
+    return to_int(raw)
+
+
+def attachment_id(attachments: list) -> str | None:
+    """Return the id of the first attachment in ``attachments``, if any."""
+    return attachments[0].get("id") if attachments else None
+
+
+def next_level(level: object, outcome: str) -> int:
+    """Return the knowledge level after answering a card at ``level``.
+
+    ``outcome`` is ``"practice"`` (the card was known) or ``"forget"``.
+    Practising moves a card up one level to at most :data:`MAX_LEVEL`,
+    forgetting moves it down one level to at least 1. A card with no valid
+    level (for example one that is not tracked yet) ends up at level 1 either
+    way.
+    """
+    try:
+        current = int(level)
+    except (TypeError, ValueError):
+        current = 0
+    if outcome == "practice":
+        return min(current + 1, MAX_LEVEL)
+    return max(current - 1, 1)
+
+
+def answer_fields(fields: Optional[dict], outcome: str, date_str: str) -> dict:
+    """Return the spaced_rep fields to write when a card is answered on ``date_str``.
+
+    ``fields`` is the card's current row, or ``None`` if it is not tracked
+    yet. ``Level`` always follows :func:`next_level`, so either scheduler
+    can be switched on later; with the adaptive scheduler ``Stability`` and
+    ``Ease`` are updated as well.
+    """
+    current = fields or {}
+    answer = {"Date": date_str, "Level": str(next_level(current.get("Level", 0), outcome))}
+    if SCHEDULER == scheduler.ADAPTIVE:
+        memory = None
+        if fields is not None:
+            memory = scheduler.card_memory(
+                current.get("Level"), current.get("Stability"), current.get("Ease")
+            )
+        elapsed = scheduler.elapsed_days(current.get("Date"), date_str)
+        answer["Stability"], answer["Ease"] = scheduler.review(memory, elapsed, outcome)
+    return answer
+
+
+def lookup_fields(*fields: str) -> str | List[str]:
+    """Return the ``fields[]`` projection for reading the state of answered cards.
+
+    The adaptive scheduler also needs each card's ``Date``, ``Stability`` and
+    ``Ease``.
+    """
+    if SCHEDULER == scheduler.ADAPTIVE:
+        fields += tuple(f for f in ("Level", "Date") + MEMORY_FIELDS if f not in fields)
+    return fields[0] if len(fields) == 1 else list(fields)
+
+
+def new_row_fields(fields: dict, user: str) -> dict:
+    """Return spaced_rep ``fields`` for a new row owned by ``user``.
+
+    The default user's rows leave ``User`` empty.
+    """
+    if user != DEFAULT_USER:
+        fields["User"] = user
+    return fields
+
 
 def build_url(base_url: str, params: Optional[dict] = None) -> str:
     """Return ``base_url`` with ``params`` encoded as query string."""
@@ -45,10 +241,11 @@ def log_airtable_error(message: str, url: str, payload: Optional[dict] = None) -
 
 def get_random_frequencies(count: int = 20, max_frequency: int = 200) -> List[int]:
     """Return ``count`` unique random frequency values between 1 and ``max_frequency``."""
-    population = list(range(1, max_frequency + 1))
-    return random.sample(population, count)
+    return random.sample(range(1, max_frequency + 1), count)
 
-def fetch_spaced_rep_frequencies(api_key: str, count: int = 5) -> List[Tuple[int, int]]:
+def fetch_spaced_rep_frequencies(
+    api_key: str, count: int = 5, user: str = DEFAULT_USER
+) -> List[Tuple[int, int]]:
     """Return spaced repetition frequencies and their knowledge levels.
 
     ``count`` frequencies are retrieved for each knowledge level from 1-5.
@@ -60,52 +257,39 @@ def fetch_spaced_rep_frequencies(api_key: str, count: int = 5) -> List[Tuple[int
     - Level 4: at least 1 month old
     - Level 5: no age requirement
 
-    The spaced_rep table contains each frequency exactly once, so the results do
-    not need deduplication. Frequencies are returned sorted for deterministic
-    tests.
+    Only rows belonging to ``user`` are considered. The spaced_rep table
+    contains each frequency once per user, so the results do not need
+    deduplication. Frequencies are returned sorted for deterministic tests.
     """
 
     headers = {"Authorization": f"Bearer {api_key}"}
-    level_age = {1: 1, 2: 7, 3: 14, 4: 30, 5: None}
     results: List[Tuple[int, int]] = []
 
-    for lvl in range(1, 6):
-        age = level_age[lvl]
-        if age is not None:
-            formula = (
-                f"AND({{Level}} = '{lvl}', "
-                f"IS_BEFORE({{Date}}, DATEADD(TODAY(), -{age}, 'day')))"
-            )
-        else:
-            formula = f"{{Level}} = '{lvl}'"
-
+    for lvl in range(1, MAX_LEVEL + 1):
         params = {
             "maxRecords": count,
-            "filterByFormula": formula,
+            "filterByFormula": for_user(user, level_due(lvl, LEVEL_MIN_AGE_DAYS[lvl])),
+            "fields[]": "Frequency",
             "sort[0][field]": "Date",
             "sort[0][direction]": "asc",
         }
 
-        url = build_url(SPACED_REP_URL, params)
         try:
-            resp = requests.get(SPACED_REP_URL, headers=headers, params=params)
+            rate_limit.acquire(SPACED_REP_URL)
+            resp = http.get(SPACED_REP_URL, headers=headers, params=params)
             resp.raise_for_status()
             data = resp.json()
 
             for rec in data.get("records", []):
-                fields = rec.get("fields", {})
-                freq = fields.get("Frequency")
-                if freq is None:
-                    continue
-                try:
-                    freq_int = int(freq)
-                except (TypeError, ValueError):
-                    continue
-                results.append((freq_int, lvl))
+                (freq,) = decode_due_record(rec)
+                if freq is not None:
+                    results.append((freq, lvl))
         except Exception:
             # Log the error but continue processing other levels so that the
             # caller gets as many frequencies as possible.
-            log_airtable_error("Error fetching spaced repetition data", url)
+            log_airtable_error(
+                "Error fetching spaced repetition data", build_url(SPACED_REP_URL, params)
+            )
             continue
 
     # Sort so that unit tests have deterministic output and log the results for
@@ -114,56 +298,63 @@ def fetch_spaced_rep_frequencies(api_key: str, count: int = 5) -> List[Tuple[int
     return sorted(results)
 
 
-def fetch_flashcards(api_key: str) -> List[Flashcard]:
-    """Fetch a set of flashcards using spaced repetition rules."""
+def fetch_flashcards(
+    api_key: str,
+    user: str = DEFAULT_USER,
+    spaced_pairs: Optional[List[Tuple[int, int]]] = None,
+    filler: Optional[List[int]] = None,
+    store: Optional["WordStore"] = None,
+) -> List[Flashcard]:
+    """Fetch a set of flashcards using spaced repetition rules.
+
+    ``spaced_pairs`` are the due ``(frequency, level)`` pairs for ``user``; when
+    omitted they are queried with :func:`fetch_spaced_rep_frequencies`.
+    ``filler`` are candidate frequencies for the rest of the deck, in order of
+    preference; by default they are drawn uniformly from the first 200 words.
+    With a :class:`word_store.WordStore` the cards are taken from ``store``
+    instead of being requested from the french_words table.
+    """
     headers = {"Authorization": f"Bearer {api_key}"}
-    spaced_pairs = fetch_spaced_rep_frequencies(api_key)
+    if spaced_pairs is None:
+        spaced_pairs = fetch_spaced_rep_frequencies(api_key, user=user)
     # Convert the list of tuples into a dictionary for quick lookups
     spaced_map = {freq: lvl for freq, lvl in spaced_pairs}
     spaced_freqs = [freq for freq, _ in spaced_pairs]
-    random_freqs = get_random_frequencies(count=25)
-    unique_randoms = [f for f in random_freqs if f not in spaced_map]
-    selected = spaced_freqs + unique_randoms[: 25 - len(spaced_freqs)]
-    formula = "OR(" + ",".join([f'{{Frequency}} = "{i}"' for i in selected]) + ")"
+    if filler is None:
+        filler = get_random_frequencies(count=DECK_SIZE)
+    unique_randoms = [f for f in filler if f not in spaced_map]
+    selected = spaced_freqs + unique_randoms[: DECK_SIZE - len(spaced_freqs)]
+    if store is not None:
+        return store.cards(selected, spaced_map)
     params = {
-        "maxRecords": 25,
-        "filterByFormula": formula,
+        "maxRecords": DECK_SIZE,
+        "filterByFormula": field_in("Frequency", selected),
+        "fields[]": list(DECK_FIELDS),
         "sort[0][field]": "Frequency",
         "sort[0][direction]": "asc",
     }
-    url = build_url(AIRTABLE_URL, params)
     try:
-        resp = requests.get(AIRTABLE_URL, headers=headers, params=params)
+        rate_limit.acquire(AIRTABLE_URL)
+        resp = http.get(AIRTABLE_URL, headers=headers, params=params)
         resp.raise_for_status()
         data = resp.json()
         flashcards: List[Flashcard] = []
         for rec in data.get("records", []):
-            fields = rec.get("fields", {})
-            front = fields.get("french_word", "")
-            back = fields.get("english_translation", {}).get("value", "")
-            freq_raw = fields.get("Frequency", "")
-            gender = fields.get("gender")
-            part_of_speech = fields.get("part_of_speech")
-            example_1 = fields.get("example_1")
-            example_2 = fields.get("example_2")
-            # ``Frequency`` may come back as an int or float from Airtable.
-            freq_str = str(freq_raw)
-            try:
-                freq_int = int(float(freq_raw))
-            except (TypeError, ValueError):
-                freq_int = None
-            level = str(spaced_map.get(freq_int, 1)) if freq_int is not None else "1"
+            front, back, freq_raw, gender, part_of_speech, example_1, example_2, images = (
+                decode_deck_record(rec)
+            )
             if front or back:
                 flashcards.append(
                     Flashcard(
-                        front=front,
-                        back=back,
-                        frequency=freq_str,
-                        level=level,
+                        front=front or "",
+                        back=back or "",
+                        frequency="" if freq_raw is None else str(freq_raw),
+                        level=str(spaced_map.get(to_int(freq_raw), 1)),
                         gender=gender,
                         part_of_speech=part_of_speech,
                         example_1=example_1,
                         example_2=example_2,
+                        image=attachment_id(images),
                     )
                 )
         logger.info(
@@ -172,16 +363,130 @@ def fetch_flashcards(api_key: str) -> List[Flashcard]:
         )
         return flashcards
     except Exception:
-        log_airtable_error("Error fetching flashcards from Airtable", url)
+        log_airtable_error(
+            "Error fetching flashcards from Airtable", build_url(AIRTABLE_URL, params)
+        )
     return []
 
 
-def log_practice(api_key: str, frequency: str, date_str: str) -> bool:
+def fetch_max_frequency(api_key: str) -> int:
+    """Return the highest ``Frequency`` in french_words, i.e. the vocabulary size.
+
+    Frequencies are ranks starting at 1, so this is a single one-record query
+    rather than a listing of the table. Returns 0 for an empty table; request
+    failures are logged and re-raised.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    params = {
+        "maxRecords": 1,
+        "fields[]": "Frequency",
+        "sort[0][field]": "Frequency",
+        "sort[0][direction]": "desc",
+    }
+    try:
+        rate_limit.acquire(AIRTABLE_URL)
+        resp = http.get(AIRTABLE_URL, headers=headers, params=params)
+        resp.raise_for_status()
+        records = resp.json().get("records", [])
+    except Exception:
+        log_airtable_error("Error fetching vocabulary size", build_url(AIRTABLE_URL, params))
+        raise
+    if not records:
+        return 0
+    return parse_frequency(records[0].get("fields", {}).get("Frequency")) or 0
+
+
+def fetch_card_content(api_key: str, frequency: int) -> Optional[Dict[str, object]]:
+    """Return the word content for ``frequency`` or ``None`` if there is none.
+
+    The result contains only data from the french_words record (no per-user
+    level) plus ``record_id`` and a ``content_hash`` digest of the other
+    values, suitable for a strong ``ETag``. Request failures are logged and
+    re-raised so callers can tell them apart from a missing word.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    params = {
+        "filterByFormula": field_equals("Frequency", str(frequency)),
+        "fields[]": list(CARD_FIELDS),
+        "maxRecords": 1,
+    }
+    try:
+        rate_limit.acquire(AIRTABLE_URL)
+        resp = http.get(AIRTABLE_URL, headers=headers, params=params)
+        resp.raise_for_status()
+        records = resp.json().get("records", [])
+    except Exception:
+        log_airtable_error("Error fetching card content", build_url(AIRTABLE_URL, params))
+        raise
+
+    if not records:
+        return None
+    rec = records[0]
+    word, translation, gender, part_of_speech, example_1, example_2, images = (
+        decode_card_record(rec)
+    )
+    content: Dict[str, object] = {
+        "frequency": frequency,
+        "word": word or "",
+        "translation": translation or "",
+        "gender": gender,
+        "part_of_speech": part_of_speech,
+        "example_1": example_1,
+        "example_2": example_2,
+        "image_url": images[0].get("url") if images else None,
+    }
+    digest = hashlib.blake2b(
+        json.dumps(content, sort_keys=True).encode("utf-8"), digest_size=12
+    )
+    content["record_id"] = rec.get("id")
+    content["content_hash"] = digest.hexdigest()
+    return content
+
+
+def fetch_image(api_key: str, frequency: int, attachment: str) -> Optional[bytes]:
+    """Return the image bytes of ``attachment`` on word ``frequency``.
+
+    Returns ``None`` if the word no longer has that attachment. The largest
+    Airtable thumbnail is downloaded when there is one, since it is already
+    bigger than any variant the app serves. Errors are logged and re-raised.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    params = {
+        "filterByFormula": field_equals("Frequency", str(frequency)),
+        "fields[]": "image",
+        "maxRecords": 1,
+    }
+    try:
+        rate_limit.acquire(AIRTABLE_URL)
+        resp = http.get(AIRTABLE_URL, headers=headers, params=params)
+        resp.raise_for_status()
+        records = resp.json().get("records", [])
+    except Exception:
+        log_airtable_error("Error looking up image", build_url(AIRTABLE_URL, params))
+        raise
+    images = (records[0].get("fields", {}).get("image") or []) if records else []
+    match = next((image for image in images if image.get("id") == attachment), None)
+    if match is None:
+        return None
+    url = (match.get("thumbnails") or {}).get("large", {}).get("url") or match.get("url")
+    try:
+        resp = http.get(url, timeout=30)
+        resp.raise_for_status()
+    except Exception:
+        logger.error("Error downloading image %s for %s", attachment, frequency, exc_info=True)
+        raise
+    return resp.content
+
+
+def log_practice(
+    api_key: str, frequency: str, date_str: str, user: str = DEFAULT_USER
+) -> bool:
     """Record a practice event in the spaced_rep table.
 
     If an entry already exists for ``frequency`` its ``Date`` is updated and the
     ``Level`` field is incremented up to a maximum of 5. Otherwise a new row is
-    created with ``Level`` set to 1.
+    created with ``Level`` set to 1. Only ``user``'s rows are touched. The
+    written fields come from :func:`answer_fields`.
     """
 
     headers = {
@@ -191,10 +496,16 @@ def log_practice(api_key: str, frequency: str, date_str: str) -> bool:
 
     payload: Optional[dict] = None
     # Look for an existing record for this frequency
-    params = {"filterByFormula": f"{{Frequency}} = '{frequency}'", "maxRecords": 1}
-    current_url = build_url(SPACED_REP_URL, params)
+    params = {
+        "filterByFormula": for_user(user, field_equals("Frequency", frequency)),
+        "fields[]": lookup_fields("Level"),
+        "maxRecords": 1,
+    }
+    # The lookup URL is only rendered if the request fails.
+    current_url: Optional[str] = None
     try:
-        resp = requests.get(
+        rate_limit.acquire(SPACED_REP_URL)
+        resp = http.get(
             SPACED_REP_URL,
             headers={"Authorization": f"Bearer {api_key}"},
             params=params,
@@ -206,38 +517,39 @@ def log_practice(api_key: str, frequency: str, date_str: str) -> bool:
         if records:
             rec = records[0]
             rec_id = rec.get("id")
-            level = rec.get("fields", {}).get("Level", 0)
-            try:
-                level = int(level)
-            except (TypeError, ValueError):
-                level = 0
-            level = min(level + 1, 5)
-            level_str = str(level)
-
-            payload = {"fields": {"Date": date_str, "Level": level_str}}
+            payload = {"fields": answer_fields(rec.get("fields", {}), "practice", date_str)}
             update_url = f"{SPACED_REP_URL}/{rec_id}"
             current_url = update_url
-            resp = requests.patch(update_url, headers=headers, json=payload)
+            rate_limit.acquire(update_url)
+            resp = http.patch(update_url, headers=headers, json=payload)
         else:
-            payload = {
-                "fields": {"Date": date_str, "Frequency": frequency, "Level": "1"}
-            }
+            fields = answer_fields(None, "practice", date_str)
+            fields["Frequency"] = frequency
+            payload = {"fields": new_row_fields(fields, user)}
             current_url = SPACED_REP_URL
-            resp = requests.post(SPACED_REP_URL, headers=headers, json=payload)
+            rate_limit.acquire(SPACED_REP_URL)
+            resp = http.post(SPACED_REP_URL, headers=headers, json=payload)
 
         resp.raise_for_status()
         return True
     except Exception:
-        log_airtable_error("Error recording practice in Airtable", current_url, payload)
+        log_airtable_error(
+            "Error recording practice in Airtable",
+            current_url or build_url(SPACED_REP_URL, params),
+            payload,
+        )
         return False
 
 
-def log_forget(api_key: str, frequency: str, date_str: str) -> bool:
+def log_forget(
+    api_key: str, frequency: str, date_str: str, user: str = DEFAULT_USER
+) -> bool:
     """Record a forgotten flashcard in the spaced_rep table.
 
     If an entry exists for ``frequency`` its ``Date`` is updated and the ``Level``
     field is decremented down to a minimum of 1. If no record exists a new row is
-    created with ``Level`` set to 1.
+    created with ``Level`` set to 1. Only ``user``'s rows are touched. The
+    written fields come from :func:`answer_fields`.
     """
 
     headers = {
@@ -246,10 +558,16 @@ def log_forget(api_key: str, frequency: str, date_str: str) -> bool:
     }
 
     payload: Optional[dict] = None
-    params = {"filterByFormula": f"{{Frequency}} = '{frequency}'", "maxRecords": 1}
-    current_url = build_url(SPACED_REP_URL, params)
+    params = {
+        "filterByFormula": for_user(user, field_equals("Frequency", frequency)),
+        "fields[]": lookup_fields("Level"),
+        "maxRecords": 1,
+    }
+    # The lookup URL is only rendered if the request fails.
+    current_url: Optional[str] = None
     try:
-        resp = requests.get(
+        rate_limit.acquire(SPACED_REP_URL)
+        resp = http.get(
             SPACED_REP_URL,
             headers={"Authorization": f"Bearer {api_key}"},
             params=params,
@@ -261,27 +579,219 @@ def log_forget(api_key: str, frequency: str, date_str: str) -> bool:
         if records:
             rec = records[0]
             rec_id = rec.get("id")
-            level = rec.get("fields", {}).get("Level", 0)
-            try:
-                level = int(level)
-            except (TypeError, ValueError):
-                level = 0
-            level = max(level - 1, 1)
-            level_str = str(level)
-
-            payload = {"fields": {"Date": date_str, "Level": level_str}}
+            payload = {"fields": answer_fields(rec.get("fields", {}), "forget", date_str)}
             update_url = f"{SPACED_REP_URL}/{rec_id}"
             current_url = update_url
-            resp = requests.patch(update_url, headers=headers, json=payload)
+            rate_limit.acquire(update_url)
+            resp = http.patch(update_url, headers=headers, json=payload)
         else:
-            payload = {
-                "fields": {"Date": date_str, "Frequency": frequency, "Level": "1"}
-            }
+            fields = answer_fields(None, "forget", date_str)
+            fields["Frequency"] = frequency
+            payload = {"fields": new_row_fields(fields, user)}
             current_url = SPACED_REP_URL
-            resp = requests.post(SPACED_REP_URL, headers=headers, json=payload)
+            rate_limit.acquire(SPACED_REP_URL)
+            resp = http.post(SPACED_REP_URL, headers=headers, json=payload)
 
         resp.raise_for_status()
         return True
     except Exception:
-        log_airtable_error("Error recording forget in Airtable", current_url, payload)
+        log_airtable_error(
+            "Error recording forget in Airtable",
+            current_url or build_url(SPACED_REP_URL, params),
+            payload,
+        )
         return False
+
+
+def iter_records(
+    url: str,
+    headers: dict,
+    params: Optional[dict] = None,
+    priority: int = rate_limit.INTERACTIVE,
+) -> Iterator[dict]:
+    """Yield every record from an Airtable list request, following ``offset``.
+
+    Each page is parsed with :class:`airtable_stream.RecordStream` while it
+    is downloaded, so memory use does not grow with the size of the table.
+    Each page is requested with the given rate limit ``priority``. Errors are
+    raised to the caller.
+    """
+    params = dict(params or {})
+    while True:
+        rate_limit.acquire(url, priority)
+        resp = http.get(url, headers=headers, params=params, stream=True)
+        try:
+            resp.raise_for_status()
+            page = RecordStream(resp.iter_content(CHUNK_SIZE))
+            yield from page
+        finally:
+            resp.close()
+        if not page.offset:
+            return
+        params["offset"] = page.offset
+
+
+def list_records(
+    url: str,
+    headers: dict,
+    params: Optional[dict] = None,
+    priority: int = rate_limit.INTERACTIVE,
+) -> List[dict]:
+    """Return every record from an Airtable list request as a list.
+
+    See :func:`iter_records`, which callers that scan a table should prefer.
+    """
+    return list(iter_records(url, headers, params, priority))
+
+
+def log_answers(
+    api_key: str, answers: List[Tuple[str, str, str]], user: str = DEFAULT_USER
+) -> List[bool]:
+    """Record a batch of answers in the spaced_rep table.
+
+    ``answers`` is a list of ``(frequency, outcome, date_str)`` tuples where
+    ``outcome`` is ``"practice"`` or ``"forget"``. They are applied in order
+    with the same level rules as :func:`log_practice` and :func:`log_forget`,
+    but the existing rows for all frequencies are looked up with a single
+    query and the changes are written in batches of :data:`WRITE_BATCH_SIZE`
+    records. Several answers for one card collapse into one write. Only
+    ``user``'s rows are read or written.
+
+    Returns one success flag per answer.
+    """
+    if not answers:
+        return []
+
+    read_headers = {"Authorization": f"Bearer {api_key}"}
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+    frequencies = [str(freq) for freq, _, _ in answers]
+    params = {
+        "filterByFormula": for_user(user, field_in("Frequency", frequencies, ranges=False)),
+        "fields[]": lookup_fields("Frequency", "Level"),
+    }
+    # Current row of each card; ``id`` is None for cards not tracked yet.
+    state: Dict[str, dict] = {}
+    try:
+        for rec in iter_records(SPACED_REP_URL, read_headers, params):
+            fields = rec.get("fields", {})
+            state[str(fields.get("Frequency"))] = {"id": rec.get("id"), "fields": fields}
+    except Exception:
+        log_airtable_error(
+            "Error looking up spaced repetition rows", build_url(SPACED_REP_URL, params)
+        )
+        return [False] * len(answers)
+    for freq, (_, outcome, date_str) in zip(frequencies, answers):
+        entry = state.setdefault(freq, {"id": None, "fields": None})
+        entry["write"] = answer_fields(entry["fields"], outcome, date_str)
+        entry["fields"] = dict(entry["fields"] or {}, **entry["write"])
+
+    writes = {freq: entry for freq, entry in state.items() if "write" in entry}
+    failed = write_rows(headers, writes, user, "Error writing answers to Airtable")
+    return [freq not in failed for freq in frequencies]
+
+
+def write_rows(headers: dict, writes: Dict[str, dict], user: str, message: str) -> set:
+    """Write spaced_rep rows in batches of :data:`WRITE_BATCH_SIZE` records.
+
+    ``writes`` maps each frequency to ``{"id": record id or None, "write":
+    fields}``; rows without an id are created for ``user``. Failed batches
+    are logged with ``message``. Returns the frequencies that failed.
+    """
+    updates: List[Tuple[str, dict]] = []
+    creates: List[Tuple[str, dict]] = []
+    for freq, entry in writes.items():
+        fields = entry["write"]
+        if entry["id"]:
+            updates.append((freq, {"id": entry["id"], "fields": fields}))
+        else:
+            fields["Frequency"] = freq
+            creates.append((freq, {"fields": new_row_fields(fields, user)}))
+
+    failed: set = set()
+    for method, rows in ((http.patch, updates), (http.post, creates)):
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            chunk = rows[start : start + WRITE_BATCH_SIZE]
+            payload = {"records": [record for _, record in chunk]}
+            try:
+                rate_limit.acquire(SPACED_REP_URL)
+                resp = method(SPACED_REP_URL, headers=headers, json=payload)
+                resp.raise_for_status()
+            except Exception:
+                log_airtable_error(message, SPACED_REP_URL, payload)
+                failed.update(freq for freq, _ in chunk)
+    return failed
+
+
+def write_review_state(api_key: str, rows: Dict[str, Tuple], user: str = DEFAULT_USER) -> set:
+    """Overwrite ``user``'s spaced_rep rows with ``rows``.
+
+    ``rows`` maps frequencies to ``(level, date)`` or ``(level, date,
+    stability, ease)`` tuples as returned by :func:`fetch_review_state`.
+    Unlike :func:`log_answers` this writes absolute values, so repeating a
+    write is harmless. Returns the frequencies that could not be written.
+    """
+    if not rows:
+        return set()
+    read_headers = {"Authorization": f"Bearer {api_key}"}
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    params = {
+        "filterByFormula": for_user(user, field_in("Frequency", list(rows), ranges=False)),
+        "fields[]": "Frequency",
+    }
+    ids: Dict[str, str] = {}
+    try:
+        for rec in iter_records(SPACED_REP_URL, read_headers, params):
+            ids[str(rec.get("fields", {}).get("Frequency"))] = rec.get("id")
+    except Exception:
+        log_airtable_error(
+            "Error looking up spaced repetition rows", build_url(SPACED_REP_URL, params)
+        )
+        return set(rows)
+
+    writes = {}
+    for freq, row in rows.items():
+        fields = {"Level": str(row[0]), "Date": row[1]}
+        for name, value in zip(MEMORY_FIELDS, row[2:4]):
+            if value is not None:
+                fields[name] = value
+        writes[freq] = {"id": ids.get(freq), "write": fields}
+    return write_rows(headers, writes, user, "Error writing review state to Airtable")
+
+
+def fetch_review_state(api_key: str, user: str = DEFAULT_USER) -> Dict[str, Tuple]:
+    """Return all of ``user``'s spaced_rep rows as ``{frequency: (level, date)}``.
+
+    With the adaptive scheduler each row is ``(level, date, stability,
+    ease)``, where the last two are the raw field values (``None`` if
+    unset). Rows without a valid level are reported at level 1. Errors are
+    logged and re-raised.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    memory = SCHEDULER == scheduler.ADAPTIVE
+    params = {
+        "filterByFormula": field_equals("User", user),
+        "fields[]": list(REVIEW_FIELDS if memory else REVIEW_FIELDS[:3]),
+    }
+    state: Dict[str, Tuple] = {}
+    try:
+        for rec in iter_records(SPACED_REP_URL, headers, params):
+            freq, level, date, *memory_values = decode_review_record(rec)
+            if freq is None:
+                continue
+            row = (1 if level is None else level, "" if date is None else date)
+            if memory:
+                row += tuple(memory_values)
+            state[str(freq)] = row
+    except Exception:
+        log_airtable_error(
+            "Error loading spaced repetition state", build_url(SPACED_REP_URL, params)
+        )
+        raise
+    return state
@@ -0,0 +1,112 @@
+"""Builders for Airtable ``filterByFormula`` expressions.
+
+Formulas used by the data-access layer are small and highly repetitive (the
+same level filters on every deck load, the same frequency lookups for every
+answer), so each builder is memoized and returns a ready-to-send string.
+
+Only the formulas are memoized, not the encoded query strings: ``requests``
+encodes the params once per request, and :func:`airtable_data_access.build_url`
+encodes them again only when an error is logged.
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+# Consecutive frequencies are folded into an ``AND(>=, <=)`` span once a run is
+# at least this long; shorter runs are cheaper as plain equality clauses.
+MIN_RANGE_RUN = 3
+
+
+def quote(value: object) -> str:
+    """Return ``value`` as a single-quoted Airtable string literal."""
+    text = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{text}'"
+
+
+@lru_cache(maxsize=1024)
+def field_equals(field: str, value: str) -> str:
+    """Return a formula matching records whose ``field`` equals ``value``."""
+    return f"{{{field}}} = {quote(value)}"
+
+
+@lru_cache(maxsize=256)
+def field_between(field: str, start: int, end: int) -> str:
+    """Return a formula matching numeric ``field`` values in ``[start, end]``."""
+    return f"AND({{{field}}} >= {int(start)}, {{{field}}} <= {int(end)})"
+
+
+@lru_cache(maxsize=64)
+def field_empty(field: str) -> str:
+    """Return a formula matching records whose ``field`` is empty."""
+    return f"NOT({{{field}}})"
+
+
+@lru_cache(maxsize=64)
+def level_due(level: int, min_age_days: int | None) -> str:
+    """Return the spaced repetition filter for ``level``.
+
+    When ``min_age_days`` is given only records whose ``Date`` is at least that
+    many days old match.
+    """
+    level_clause = field_equals("Level", str(level))
+    if min_age_days is None:
+        return level_clause
+    return (
+        f"AND({level_clause}, "
+        f"IS_BEFORE({{Date}}, DATEADD(TODAY(), -{int(min_age_days)}, 'day')))"
+    )
+
+
+@lru_cache(maxsize=1024)
+def for_user(user: str, formula: str) -> str:
+    """Restrict ``formula`` to spaced_rep rows belonging to ``user``.
+
+    Rows written before per-user partitioning have an empty ``User`` field and
+    belong to the default user ``""``.
+    """
+    return f"AND({field_equals('User', user)}, {formula})"
+
+
+def compress_ranges(values: Iterable[int]) -> List[Tuple[int, int]]:
+    """Return sorted, de-duplicated ``values`` as inclusive ``(start, end)`` runs."""
+    runs: List[Tuple[int, int]] = []
+    for value in sorted(set(values)):
+        if runs and value == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], value)
+        else:
+            runs.append((value, value))
+    return runs
+
+
+@lru_cache(maxsize=256)
+def _field_in(field: str, values: Tuple[int, ...]) -> str:
+    clauses: List[str] = []
+    for start, end in compress_ranges(values):
+        if end - start + 1 >= MIN_RANGE_RUN:
+            clauses.append(field_between(field, start, end))
+        else:
+            clauses.extend(field_equals(field, str(v)) for v in range(start, end + 1))
+    if not clauses:
+        return "FALSE()"
+    return "OR(" + ",".join(clauses) + ")"
+
+
+@lru_cache(maxsize=256)
+def _field_any(field: str, values: Tuple[str, ...]) -> str:
+    if not values:
+        return "FALSE()"
+    return "OR(" + ",".join(field_equals(field, v) for v in values) + ")"
+
+
+def field_in(field: str, values: Iterable[int | str], ranges: bool = True) -> str:
+    """Return a formula matching records whose ``field`` is in ``values``.
+
+    With ``ranges`` (for numeric fields) runs of consecutive values are
+    compressed into range clauses so that large sets keep the request URL
+    short. Text fields need ``ranges=False``, which emits one equality clause
+    per value. The formula is the same for any ordering of ``values`` and is
+    cached.
+    """
+    if not ranges:
+        return _field_any(field, tuple(sorted({str(v) for v in values})))
+    return _field_in(field, tuple(sorted({int(v) for v in values})))
@@ -0,0 +1,163 @@
+"""Client-side rate limiting for Airtable, shared across processes.
+
+Airtable allows 5 requests per second per base and answers bursts with 429s
+and a 30 second penalty. The web app and the batch scripts all talk to the
+same base, so every Airtable request first takes a token from a per-base token
+bucket stored in a small SQLite database. ``BEGIN IMMEDIATE`` transactions make
+updates to the bucket atomic across processes.
+
+Requests have a priority. ``INTERACTIVE`` requests (learners waiting on a page)
+may use every token. ``BATCH`` requests (backfills, translation runs) leave
+``BATCH_RESERVE`` tokens untouched and stand aside for ``INTERACTIVE_GRACE``
+seconds whenever an interactive request had to wait.
+
+The database path defaults to a file in the temp directory and can be set with
+``AIRTABLE_RATE_LIMIT_DB``. Setting ``AIRTABLE_RATE_LIMIT=off`` disables
+limiting, e.g. for unit tests.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+INTERACTIVE = 0
+BATCH = 1
+
+REQUESTS_PER_SECOND = 5.0
+BURST = 5.0
+BATCH_RESERVE = 2.0
+INTERACTIVE_GRACE = 1.0
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "airtable_rate_limit.sqlite3")
+
+_BASE_RE = re.compile(r"/(app[A-Za-z0-9]+)(?:/|$)")
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_for(url: str) -> str:
+    """Return the bucket name (the Airtable base id) for ``url``."""
+    match = _BASE_RE.search(url)
+    return match.group(1) if match else "default"
+
+
+class RateLimiter:
+    """Token bucket per Airtable base with interactive/batch priorities."""
+
+    def __init__(
+        self,
+        path: str,
+        rate: float = REQUESTS_PER_SECOND,
+        burst: float = BURST,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+                "interactive_waiting REAL NOT NULL DEFAULT 0)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def try_acquire(self, bucket: str, priority: int = INTERACTIVE) -> float:
+        """Take a token from ``bucket`` if allowed.
+
+        Returns 0 when a token was taken, otherwise the number of seconds to
+        wait before trying again.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = conn.execute(
+                    "SELECT tokens, updated, interactive_waiting FROM buckets WHERE name = ?",
+                    (bucket,),
+                ).fetchone()
+                if row is None:
+                    tokens, waiting = self.burst, 0.0
+                else:
+                    tokens = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                    waiting = row[2]
+
+                if priority == INTERACTIVE:
+                    needed = 1.0
+                    blocked = 0.0
+                else:
+                    needed = 1.0 + BATCH_RESERVE
+                    blocked = max(0.0, waiting + INTERACTIVE_GRACE - now)
+
+                if tokens >= needed and blocked == 0.0:
+                    tokens -= 1.0
+                    wait = 0.0
+                else:
+                    wait = max(blocked, (needed - tokens) / self.rate)
+                    if priority == INTERACTIVE:
+                        waiting = now
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated, interactive_waiting) "
+                    "VALUES (?, ?, ?, ?)",
+                    (bucket, tokens, now, waiting),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, url: str, priority: int = INTERACTIVE) -> float:
+        """Block until a request to ``url`` may be sent; return the time waited."""
+        bucket = bucket_for(url)
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(bucket, priority)
+            if wait == 0.0:
+                if waited:
+                    logger.debug("Waited %.3fs for Airtable bucket %s", waited, bucket)
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+
+_default: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_limiter() -> Optional[RateLimiter]:
+    """Return the process-wide limiter, or ``None`` when limiting is disabled."""
+    global _default
+    if os.environ.get("AIRTABLE_RATE_LIMIT", "").lower() == "off":
+        return None
+    with _default_lock:
+        path = os.environ.get("AIRTABLE_RATE_LIMIT_DB", DEFAULT_DB_PATH)
+        if _default is None or _default.path != path:
+            _default = RateLimiter(path)
+        return _default
+
+
+def acquire(url: str, priority: int = INTERACTIVE) -> float:
+    """Wait for permission to send a request to ``url`` with ``priority``."""
+    limiter = get_limiter()
+    if limiter is None:
+        return 0.0
+    return limiter.acquire(url, priority)
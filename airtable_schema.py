@@ -0,0 +1,203 @@
+"""Cached Airtable schema and record decoders generated from it.
+
+The schema (table -> field -> Airtable field type) is read from a local JSON
+cache written by ``python -m scripts.cli schema --save``, falling back to the
+``BUNDLED_SCHEMA`` below when there is no usable cache. The cache records the
+format version it was written with and a fingerprint of its tables; a cache
+with another format version or a fingerprint that does not match its content
+is ignored. The app never asks Airtable for the live schema itself;
+``python -m scripts.cli schema --check`` compares the cache with it (see
+:func:`cache_is_current`) and exits non-zero when the cache is stale.
+
+:func:`compile_decoder` turns the schema into a function that picks the
+requested fields out of a record and converts each according to its type
+(numbers to ``int``, AI text to its ``value``, ...). The decoder is generated
+as straight-line Python code with no per-record exception handling, and the
+same field list doubles as the ``fields[]`` projection for the query.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the cache file changes.
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "airtable_schema.json"
+)
+
+Schema = Dict[str, Dict[str, str]]
+
+# Field types of the tables this app reads, used when there is no cache.
+BUNDLED_SCHEMA: Schema = {
+    "french_words": {
+        "Frequency": "number",
+        "french_word": "singleLineText",
+        "english_translation": "aiText",
+        "english_word": "singleLineText",
+        "gender": "singleSelect",
+        "part_of_speech": "singleSelect",
+        "example_1": "multilineText",
+        "example_2": "multilineText",
+        "image": "multipleAttachments",
+    },
+    "spaced_rep": {
+        "Frequency": "singleLineText",
+        "Level": "singleLineText",
+        "Date": "date",
+        "User": "singleLineText",
+        "Stability": "number",
+        "Ease": "number",
+    },
+}
+
+NUMBER_TYPES = {"number", "autoNumber", "count", "rating", "percent", "currency", "duration"}
+_NUMBER_RE = re.compile(r"^\s*[-+]?(\d+\.?\d*|\.\d+)\s*$")
+
+
+def to_int(value: Any) -> Optional[int]:
+    """Return ``value`` as an ``int`` (truncating), or ``None`` if it is not numeric."""
+    cls = value.__class__
+    if cls is int:
+        return value
+    if cls is float:
+        return int(value) if math.isfinite(value) else None
+    if cls is str and _NUMBER_RE.match(value):
+        return int(float(value))
+    return None
+
+
+def ai_text(value: Any) -> Any:
+    """Return the text of an AI text field, which Airtable sends as an object."""
+    return value.get("value") if value.__class__ is dict else value
+
+
+def attachments(value: Any) -> list:
+    return value if value.__class__ is list else []
+
+
+# Converter applied to each Airtable field type; other types pass through.
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    **{name: to_int for name in NUMBER_TYPES},
+    "aiText": ai_text,
+    "multipleAttachments": attachments,
+}
+
+
+def normalize(schema: Mapping[str, Any]) -> Schema:
+    """Return ``{table: {field: type}}`` from a meta API response or a normalized schema."""
+    if "tables" not in schema:
+        return {table: dict(fields) for table, fields in schema.items()}
+    return {
+        table["name"]: {field["name"]: field["type"] for field in table.get("fields", [])}
+        for table in schema["tables"]
+    }
+
+
+def fingerprint(schema: Schema) -> str:
+    """Return a digest that changes whenever a table, field or type changes."""
+    data = json.dumps(schema, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def cache_is_current(schema: Mapping[str, Any], path: str = DEFAULT_CACHE_PATH) -> bool:
+    """Return ``True`` if the cache at ``path`` holds ``schema``, e.g. as fetched from Airtable."""
+    cached = read_cache(path)
+    return cached is not None and fingerprint(cached) == fingerprint(normalize(schema))
+
+
+def save_schema(schema: Mapping[str, Any], path: str = DEFAULT_CACHE_PATH) -> bool:
+    """Write ``schema`` to the cache; return ``True`` if it differs from the cached one."""
+    tables = normalize(schema)
+    digest = fingerprint(tables)
+    changed = not cache_is_current(tables, path)
+    payload = {
+        "version": CACHE_VERSION,
+        "fingerprint": digest,
+        "fetched_at": time.time(),
+        "tables": tables,
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return changed
+
+
+def read_cache(path: str = DEFAULT_CACHE_PATH) -> Optional[Schema]:
+    """Return the cached schema, or ``None`` if it is missing or fails the version check."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable schema cache %s", path, exc_info=True)
+        return None
+    if payload.get("version") != CACHE_VERSION:
+        logger.warning("Ignoring schema cache %s with version %r", path, payload.get("version"))
+        return None
+    tables = payload.get("tables") or {}
+    if fingerprint(tables) != payload.get("fingerprint"):
+        logger.warning("Ignoring schema cache %s: fingerprint mismatch", path)
+        return None
+    return tables
+
+
+def load_schema(path: Optional[str] = None) -> Schema:
+    """Return the cached schema (``AIRTABLE_SCHEMA_CACHE`` or the default path).
+
+    Tables missing from the cache are taken from :data:`BUNDLED_SCHEMA`.
+    """
+    path = path or os.environ.get("AIRTABLE_SCHEMA_CACHE", DEFAULT_CACHE_PATH)
+    schema = {table: dict(fields) for table, fields in BUNDLED_SCHEMA.items()}
+    schema.update(read_cache(path) or {})
+    return schema
+
+
+def compile_decoder(
+    schema: Schema,
+    table: str,
+    fields: Sequence[str],
+    raw: Sequence[str] = (),
+    convert: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+) -> Callable[[Mapping[str, Any]], Tuple[Any, ...]]:
+    """Return ``decode(record) -> tuple`` of ``fields`` converted by their type.
+
+    Missing values decode to ``None`` (``[]`` for attachments). Fields in
+    ``raw`` or not in the schema are passed through unchanged. Fields in
+    ``convert`` use the given converter whatever their type, e.g. numbers
+    kept in a text field.
+    """
+    convert = convert or {}
+    types = schema.get(table, {})
+    namespace: Dict[str, Any] = {}
+    items = []
+    for pos, name in enumerate(fields):
+        if name in convert:
+            converter = convert[name]
+        else:
+            converter = None if name in raw else CONVERTERS.get(types.get(name, ""))
+        expr = f"f.get({name!r})"
+        if converter is not None:
+            namespace[f"_c{pos}"] = converter
+            expr = f"_c{pos}({expr})"
+        items.append(expr)
+    func_name = "decode_" + re.sub(r"\W", "_", table)
+    source = (
+        f"def {func_name}(record):\n"
+        f"    f = record.get('fields') or {{}}\n"
+        f"    return ({', '.join(items)}{',' if len(items) == 1 else ''})\n"
+    )
+    exec(compile(source, f"<airtable decoder {table}>", "exec"), namespace)
+    decoder = namespace[func_name]
+    decoder.fields = tuple(fields)
+    decoder.source = source
+    return decoder
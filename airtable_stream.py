@@ -0,0 +1,158 @@
+"""Incremental parsing of Airtable list responses.
+
+``resp.json()`` builds the whole page before the first record can be used,
+and callers that collect every page of a table hold all of it at once.
+:class:`RecordStream` instead parses a list response (``{"records": [...],
+"offset": ...}``) from the response body as it arrives and yields one record
+at a time, so a table scan only ever holds the record being processed and
+one network chunk.
+
+`ijson <https://pypi.org/project/ijson/>`_ is used when it is installed (its
+C backend is considerably faster); otherwise records are cut out of the
+stream with the standard library's :meth:`json.JSONDecoder.raw_decode`.
+"""
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:  # Optional: faster incremental parser.
+    import ijson
+except ImportError:  # pragma: no cover - depends on the environment
+    ijson = None
+
+# Bytes read from the response body at a time.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class StreamError(ValueError):
+    """Raised when a response body is not a well-formed list response."""
+
+
+class RecordStream:
+    """Records of one list response, parsed as the body is read.
+
+    Iterate over the stream to get the records. Other top-level members
+    (such as ``offset``) are available in :attr:`fields` once iteration has
+    finished.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], use_ijson: Optional[bool] = None) -> None:
+        self.chunks = chunks
+        self.use_ijson = ijson is not None if use_ijson is None else use_ijson
+        self.fields: Dict[str, Any] = {}
+
+    @property
+    def offset(self) -> Optional[str]:
+        return self.fields.get("offset")
+
+    def __iter__(self) -> Iterator[dict]:
+        if self.use_ijson:
+            return self._iter_ijson()
+        return _Parser(self.chunks, self.fields).records()
+
+    def _iter_ijson(self) -> Iterator[dict]:
+        builder = None
+        for prefix, event, value in ijson.parse(_ChunkReader(self.chunks), use_float=True):
+            if builder is not None:
+                if prefix == "records" and event == "end_array":
+                    builder = None
+                    continue
+                builder.event(event, value)
+                if prefix == "records.item" and event == "end_map":
+                    yield builder.value
+                    builder = ijson.common.ObjectBuilder()
+            elif prefix == "records" and event == "start_array":
+                builder = ijson.common.ObjectBuilder()
+            elif "." not in prefix and event in ("string", "number", "boolean", "null"):
+                self.fields[prefix] = value
+
+
+class _ChunkReader:
+    """File-like view of an iterable of byte chunks, for ijson."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        return next(self._chunks, b"")
+
+
+class _Parser:
+    """Pull parser over a chunked body using ``JSONDecoder.raw_decode``."""
+
+    def __init__(self, chunks: Iterable[bytes], fields: Dict[str, Any]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.fields = fields
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; return ``False`` at the end."""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        # Drop what has been consumed so the buffer stays one value long.
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise StreamError(f"expected {char!r} at {self._peek()!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A value that ends the buffer may continue in the next chunk
+            # (numbers, for instance), so only accept it once more has arrived.
+            if end is not None and (end < len(self._buf) or self._eof):
+                self._pos = end
+                return value
+            if not self._fill():
+                raise StreamError("truncated response body")
+
+    def records(self) -> Iterator[dict]:
+        self._expect("{")
+        while self._peek() != "}":
+            key = self._value()
+            self._expect(":")
+            if key == "records":
+                self._expect("[")
+                while self._peek() != "]":
+                    yield self._value()
+                    if self._peek() == ",":
+                        self._pos += 1
+                self._pos += 1
+            else:
+                self.fields[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+        self._pos += 1
@@ -0,0 +1,438 @@
+"""An append-only local log of answers, stored in SQLite.
+
+With ``ANSWER_LOG`` set to a database path, every practice/forget answer is
+recorded as one ``(user, frequency, outcome, date)`` row with a single
+``INSERT``, instead of a read-modify-write of the card's spaced_rep row in
+Airtable. Two tabs answering the same card therefore both count, in the
+order they arrived, and no answer is ever overwritten.
+
+A user's current review state is derived from the log:
+
+- the ``current`` snapshot holds every card's row as returned by
+  :func:`airtable_data_access.fetch_review_state`, as of event
+  ``marks.event``; :meth:`AnswerLog.state` folds the user's later events
+  into it with the :mod:`review_state` rules;
+- :meth:`AnswerLog.snapshot` folds all new events into ``current``;
+- :meth:`AnswerLog.compact` also folds events older than the retention
+  period that have been synced to Airtable into the ``base`` snapshot and
+  deletes them;
+- :meth:`AnswerLog.rebuild` recomputes ``current`` from ``base`` and the
+  retained events, for example under another scheduler. This happens
+  automatically when the log is opened with a different ``model``.
+
+A user's rows are seeded once from Airtable (:meth:`AnswerLog.seed`) before
+their first answer is logged. :meth:`AnswerLog.sync` writes the state of
+cards with unsynced answers back to Airtable as absolute values, so a
+failed or repeated sync is harmless. :class:`AnswerLogJob` runs the sync and
+compaction in the background.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import scheduler
+from review_state import AdaptiveReviewState, UserReviewState
+
+logger = logging.getLogger(__name__)
+
+BASE = "base"
+CURRENT = "current"
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_log.sqlite3")
+# Synced answers are kept this long before compaction folds them into the base
+# snapshot, so recent history can be replayed under a new scheduler.
+DEFAULT_RETAIN_DAYS = 90
+SYNC_INTERVAL_SECONDS = 60
+COMPACT_INTERVAL_SECONDS = 3600
+# Ids per ``UPDATE ... WHERE id IN (...)``, below SQLite's variable limit.
+ID_BATCH_SIZE = 500
+
+STATE_CLASSES = {scheduler.LADDER: UserReviewState, scheduler.ADAPTIVE: AdaptiveReviewState}
+
+Answer = Tuple[str, str, str]
+
+
+def fold(model: str, rows: Dict[str, Tuple], answers: Iterable[Answer]) -> Dict[str, Tuple]:
+    """Return ``rows`` after applying ``answers`` in order under scheduler ``model``.
+
+    ``answers`` are ``(frequency, outcome, date_str)`` tuples. Rows recorded
+    under the other scheduler are converted: ladder rows gain a stability
+    and ease from their level, adaptive rows lose them.
+    """
+    if model == scheduler.ADAPTIVE:
+        cards = {freq: tuple(row) for freq, row in rows.items()}
+    else:
+        cards = {freq: tuple(row[:2]) for freq, row in rows.items()}
+    state = STATE_CLASSES[model](cards, 0)
+    for answer in answers:
+        state.apply(*answer)
+    return state.cards
+
+
+class AnswerLog:
+    """Answers and snapshots stored in the SQLite database at ``path``."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        model: str = scheduler.LADDER,
+        retain_days: float = DEFAULT_RETAIN_DAYS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.model = model
+        self.retain_days = retain_days
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._seeded: Set[str] = set()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            # Readers do not block the writer, so deck loads never delay answers.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, user TEXT NOT NULL, "
+                "frequency TEXT NOT NULL, outcome TEXT NOT NULL, date TEXT NOT NULL, "
+                "recorded REAL NOT NULL, synced INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_user ON events (user, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_synced ON events (synced, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots (kind TEXT NOT NULL, user TEXT NOT NULL, "
+                "frequency TEXT NOT NULL, row TEXT NOT NULL, PRIMARY KEY (kind, user, frequency))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS marks "
+                "(kind TEXT PRIMARY KEY, event INTEGER NOT NULL, model TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users (user TEXT PRIMARY KEY, seeded REAL NOT NULL)"
+            )
+            for kind in (BASE, CURRENT):
+                conn.execute(
+                    "INSERT OR IGNORE INTO marks (kind, event, model) VALUES (?, 0, ?)",
+                    (kind, self.model),
+                )
+            self._conn = conn
+            if self._mark(CURRENT)[1] != self.model:
+                logger.info("Rebuilding answer log snapshot for the %s scheduler", self.model)
+                self._rebuild()
+        return self._conn
+
+    def _mark(self, kind: str) -> Tuple[int, str]:
+        return self._conn.execute(
+            "SELECT event, model FROM marks WHERE kind = ?", (kind,)
+        ).fetchone()
+
+    def _rows(self, kind: str, user: str, frequencies: Optional[Iterable[str]] = None):
+        conn = self._conn
+        if frequencies is None:
+            found = conn.execute(
+                "SELECT frequency, row FROM snapshots WHERE kind = ? AND user = ?", (kind, user)
+            ).fetchall()
+        else:
+            found = []
+            for freq in frequencies:
+                found += conn.execute(
+                    "SELECT frequency, row FROM snapshots "
+                    "WHERE kind = ? AND user = ? AND frequency = ?",
+                    (kind, user, freq),
+                ).fetchall()
+        return {freq: tuple(json.loads(row)) for freq, row in found}
+
+    def _store(self, kind: str, user: str, rows: Dict[str, Tuple]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO snapshots (kind, user, frequency, row) VALUES (?, ?, ?, ?)",
+            [(kind, user, freq, json.dumps(list(row))) for freq, row in rows.items()],
+        )
+
+    def _events_by_user(self, after: int, until: Optional[int] = None):
+        query = "SELECT user, frequency, outcome, date FROM events WHERE id > ?"
+        params: tuple = (after,)
+        if until is not None:
+            query += " AND id <= ?"
+            params += (until,)
+        by_user: Dict[str, List[Answer]] = defaultdict(list)
+        for user, freq, outcome, date_str in self._conn.execute(query + " ORDER BY id", params):
+            by_user[user].append((freq, outcome, date_str))
+        return by_user
+
+    def _fold_into(self, kind: str, after: int, until: int) -> int:
+        """Fold events in ``(after, until]`` into the ``kind`` snapshot."""
+        folded = 0
+        for user, answers in self._events_by_user(after, until).items():
+            rows = self._rows(kind, user, {freq for freq, _, _ in answers})
+            self._store(kind, user, fold(self.model, rows, answers))
+            folded += len(answers)
+        self._conn.execute(
+            "UPDATE marks SET event = ?, model = ? WHERE kind = ?", (until, self.model, kind)
+        )
+        return folded
+
+    def _last_event(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def _transaction(self, statement: str = "BEGIN IMMEDIATE"):
+        conn = self._connection()
+        conn.execute(statement)
+        return conn
+
+    def seeded(self, user: str) -> bool:
+        """Return whether ``user``'s rows have been seeded."""
+        if user in self._seeded:
+            return True
+        with self._lock:
+            found = self._connection().execute(
+                "SELECT 1 FROM users WHERE user = ?", (user,)
+            ).fetchone()
+        if found:
+            self._seeded.add(user)
+        return bool(found)
+
+    def seed(self, user: str, rows: Dict[str, Tuple]) -> bool:
+        """Store ``user``'s existing spaced_rep ``rows`` as the start of their log.
+
+        Does nothing if the user has already been seeded, for example by
+        another process. Returns whether the rows were stored.
+        """
+        with self._lock:
+            conn = self._transaction()
+            try:
+                stored = not conn.execute(
+                    "SELECT 1 FROM users WHERE user = ?", (user,)
+                ).fetchone()
+                if stored:
+                    self._store(BASE, user, rows)
+                    self._store(CURRENT, user, rows)
+                    conn.execute(
+                        "INSERT INTO users (user, seeded) VALUES (?, ?)", (user, self.clock())
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._seeded.add(user)
+        return stored
+
+    def append(self, user: str, frequency: str, outcome: str, date_str: str) -> int:
+        """Log one answer and return its event id."""
+        return self.append_many(user, [(frequency, outcome, date_str)])[0]
+
+    def append_many(self, user: str, answers: List[Answer]) -> List[int]:
+        """Log ``(frequency, outcome, date_str)`` answers in order; return their ids."""
+        now = self.clock()
+        ids = []
+        with self._lock:
+            conn = self._transaction("BEGIN")
+            try:
+                for freq, outcome, date_str in answers:
+                    cur = conn.execute(
+                        "INSERT INTO events (user, frequency, outcome, date, recorded) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user, str(freq), outcome, date_str, now),
+                    )
+                    ids.append(cur.lastrowid)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def state(self, user: str) -> Dict[str, Tuple]:
+        """Return ``user``'s rows in the form of :func:`fetch_review_state`."""
+        with self._lock:
+            conn = self._transaction("BEGIN")
+            try:
+                mark = self._mark(CURRENT)[0]
+                rows = self._rows(CURRENT, user)
+                answers = conn.execute(
+                    "SELECT frequency, outcome, date FROM events "
+                    "WHERE user = ? AND id > ? ORDER BY id",
+                    (user, mark),
+                ).fetchall()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return fold(self.model, rows, answers)
+
+    def snapshot(self) -> int:
+        """Fold all new events into the current snapshot; return how many."""
+        with self._lock:
+            conn = self._transaction()
+            try:
+                mark = self._mark(CURRENT)[0]
+                last = self._last_event()
+                folded = self._fold_into(CURRENT, mark, last) if last > mark else 0
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return folded
+
+    def compact(self) -> int:
+        """Snapshot, then drop synced events older than the retention period.
+
+        The dropped events are folded into the base snapshot first. Returns
+        the number of events removed.
+        """
+        self.snapshot()
+        cutoff = self.clock() - self.retain_days * 86400
+        with self._lock:
+            conn = self._transaction()
+            try:
+                mark = self._mark(BASE)[0]
+                until = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM events WHERE recorded < ?", (cutoff,)
+                ).fetchone()[0]
+                unsynced = conn.execute(
+                    "SELECT MIN(id) FROM events WHERE synced = 0"
+                ).fetchone()[0]
+                if unsynced is not None:
+                    until = min(until, unsynced - 1)
+                removed = 0
+                if until > mark:
+                    removed = self._fold_into(BASE, mark, until)
+                    conn.execute("DELETE FROM events WHERE id <= ?", (until,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if removed:
+            logger.info("Compacted %d answers into the base snapshot", removed)
+        return removed
+
+    def _rebuild(self) -> None:
+        conn = self._transaction()
+        try:
+            mark = self._mark(BASE)[0]
+            conn.execute("DELETE FROM snapshots WHERE kind = ?", (CURRENT,))
+            conn.execute(
+                "INSERT INTO snapshots (kind, user, frequency, row) "
+                "SELECT ?, user, frequency, row FROM snapshots WHERE kind = ?",
+                (CURRENT, BASE),
+            )
+            self._fold_into(CURRENT, mark, max(self._last_event(), mark))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def rebuild(self, model: Optional[str] = None) -> None:
+        """Recompute the current snapshot from the base and retained events.
+
+        With ``model`` the log switches to that scheduler first.
+        """
+        with self._lock:
+            self._connection()
+            if model is not None:
+                self.model = model
+            self._rebuild()
+
+    def sync(self, push: Callable[[str, Dict[str, Tuple]], Set[str]]) -> int:
+        """Write the state of cards with unsynced answers to Airtable.
+
+        ``push(user, rows)`` writes ``rows`` (see
+        :func:`airtable_data_access.write_review_state`) and returns the
+        frequencies that failed; their answers stay unsynced and are retried
+        by the next call. Returns the number of answers marked synced.
+        """
+        with self._lock:
+            pending = self._connection().execute(
+                "SELECT id, user, frequency FROM events WHERE synced = 0 ORDER BY id"
+            ).fetchall()
+        by_user: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for event_id, user, freq in pending:
+            by_user[user][freq].append(event_id)
+
+        synced = 0
+        for user, events in by_user.items():
+            rows = self.state(user)
+            try:
+                failed = push(user, {freq: rows[freq] for freq in events if freq in rows})
+            except Exception:
+                logger.exception("Failed to sync answers for %r", user)
+                continue
+            ids = [i for freq, found in events.items() if freq not in failed for i in found]
+            with self._lock:
+                for start in range(0, len(ids), ID_BATCH_SIZE):
+                    chunk = ids[start : start + ID_BATCH_SIZE]
+                    self._conn.execute(
+                        "UPDATE events SET synced = 1 WHERE id IN (%s)"
+                        % ",".join("?" * len(chunk)),
+                        chunk,
+                    )
+            synced += len(ids)
+        return synced
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of logged and unsynced answers and of seeded users."""
+        with self._lock:
+            conn = self._connection()
+            events, unsynced = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(synced = 0), 0) FROM events"
+            ).fetchone()
+            users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        return {"events": events, "unsynced": unsynced, "users": users}
+
+
+def load_answer_log(path: Optional[str] = None, model: str = scheduler.LADDER):
+    """Return the answer log at ``path`` (default ``ANSWER_LOG``), if any.
+
+    Returns ``None`` when no log is configured, in which case answers are
+    written straight to Airtable.
+    """
+    path = path or os.environ.get("ANSWER_LOG")
+    if not path:
+        return None
+    return AnswerLog(path, model=model)
+
+
+class AnswerLogJob(threading.Thread):
+    """Sync logged answers to Airtable every minute and compact the log hourly."""
+
+    def __init__(
+        self,
+        log: AnswerLog,
+        push: Callable[[str, Dict[str, Tuple]], Set[str]],
+        interval: float = SYNC_INTERVAL_SECONDS,
+        compact_interval: float = COMPACT_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(name="answer-log-job", daemon=True)
+        self.log = log
+        self.push = push
+        self.interval = interval
+        self.compact_interval = compact_interval
+        self.clock = clock
+        self.compacted_at: Optional[float] = None
+        self.stopped = threading.Event()
+
+    def run_once(self) -> int:
+        synced = self.log.sync(self.push)
+        now = self.clock()
+        if self.compacted_at is None or now - self.compacted_at >= self.compact_interval:
+            self.log.compact()
+            self.compacted_at = now
+        return synced
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Failed to sync the answer log")
+
+    def stop(self) -> None:
+        self.stopped.set()
@@ -1,32 +1,477 @@
-from flask import Flask, jsonify, render_template, request
-from dataclasses import asdict
+from flask import Flask, Response, jsonify, make_response, render_template, request, send_file
 import os
 import sys
 import logging
-from datetime import datetime
-from airtable_data_access import fetch_flashcards, log_practice, log_forget
+import math
+import re
+import threading
+from datetime import datetime, timezone
+from airtable_rate_limit import RateLimiter
+from airtable_data_access import (
+    DECK_SIZE,
+    DEFAULT_USER,
+    SCHEDULER,
+    fetch_card_content,
+    fetch_flashcards,
+    fetch_image,
+    fetch_max_frequency,
+    fetch_review_state,
+    flashcards_to_json,
+    log_answers,
+    log_practice,
+    log_forget,
+    parse_frequency,
+    write_review_state,
+)
+from answer_log import AnswerLogJob, load_answer_log
+from card_fragments import FRAGMENT_TEMPLATE, LEVEL_COLORS, FragmentCache
+from frequency_sampler import VocabularySampler
+from http_caching import cacheable, init_app as init_http_caching, uncacheable
+from image_cache import IMMUTABLE_MAX_AGE, ImageCache
+from profiling import init_app as init_profiling
+from review_state import AdaptiveReviewState, DueQueueJob, ReviewStateCache, UserReviewState
+from scheduler import ADAPTIVE
+from single_flight import SingleFlight
+from table_export import load_word_store
+from warmup import WarmUp
 
 app = Flask(__name__)
+# Registered first so the profile also covers compression in http_caching.
+init_profiling(app)
+init_http_caching(app)
 
 logger = logging.getLogger(__name__)
 
+PAGE_TEMPLATE = "flashcards_airtable.html"
+
+# Compile templates at import so the first request does not pay for it; the
+# Jinja environment keeps the compiled templates in its cache.
+app.jinja_env.get_template(PAGE_TEMPLATE)
+fragment_cache = FragmentCache(app.jinja_env.get_template(FRAGMENT_TEMPLATE))
+review_cache = ReviewStateCache(
+    factory=AdaptiveReviewState if SCHEDULER == ADAPTIVE else UserReviewState
+)
+upstream_flight = SingleFlight()
+vocabulary = VocabularySampler()
+image_cache = ImageCache()
+# Airtable lookups for image ids that ``word_store`` cannot vouch for: anyone
+# can request made-up ids, so they share a small in-process budget that still
+# covers the first load of every image on a deck.
+IMAGE_LOOKUPS_PER_SECOND = 1.0
+IMAGE_LOOKUP_BURST = 2.0 * DECK_SIZE
+image_lookups = RateLimiter(":memory:", rate=IMAGE_LOOKUPS_PER_SECOND, burst=IMAGE_LOOKUP_BURST)
+# Vocabulary mapped from an exported file (``VOCABULARY_FILE``), or None to
+# read card content from Airtable.
+word_store = load_word_store()
+# Local log of answers (``ANSWER_LOG``), or None to write answers straight to
+# Airtable.
+answer_log = load_answer_log(model=SCHEDULER)
+# Background jobs, started on first use (see ``start_due_queue_job`` and
+# ``start_answer_log_job``) so they also run under a WSGI server that never
+# runs this module as ``__main__``.
+due_queue_job = None
+answer_log_job = None
+_jobs_lock = threading.Lock()
+
+USER_COOKIE = "user_id"
+USER_HEADER = "X-User-Id"
+USER_ID_RE = re.compile(r"^[A-Za-z0-9_.@-]{1,64}$")
+# Most frequencies a deck request may exclude: the page's deck and the
+# prefetched ones.
+MAX_EXCLUDE = 4 * DECK_SIZE
+
+
+def current_user() -> str:
+    """Return the learner making the request.
+
+    The id comes from the ``X-User-Id`` header or, if there is no header, the
+    ``user_id`` cookie. Requests without a valid id act as the default
+    learner, who owns all spaced_rep rows recorded before multi-user support;
+    an empty header selects them explicitly.
+
+    The id is taken on trust: it is not authenticated, so deployments with
+    untrusted clients must set the header in an authenticating proxy (see
+    the README).
+    """
+    user = request.headers.get(USER_HEADER)
+    if user is None:
+        user = request.cookies.get(USER_COOKIE)
+    if user and USER_ID_RE.match(user):
+        return user
+    return DEFAULT_USER
+
+
+def build_deck(api_key: str, user: str, exclude: frozenset = frozenset()) -> list:
+    """Return a deck for ``user`` with due cards chosen from cached state.
+
+    Frequencies in ``exclude`` (cards already in decks the client holds) are
+    left out. If the user's state cannot be loaded the due cards are queried
+    from Airtable instead, and only filler words are excluded. Concurrent
+    requests for the same user's deck, and for the same user's state, share
+    one upstream call.
+    """
+    start_due_queue_job()
+    return upstream_flight.do(
+        ("deck", user, exclude), lambda: _build_deck(api_key, user, exclude)
+    )
+
+
+def push_review_state(user: str, rows: dict) -> set:
+    """Write ``rows`` of ``user``'s answer log to Airtable (see :func:`write_review_state`)."""
+    return write_review_state(os.environ["AIRTABLE_API_KEY"], rows, user)
+
+
+def start_due_queue_job() -> None:
+    """Start the :class:`review_state.DueQueueJob` unless it is running.
+
+    Called for every deck and from ``/readyz``, so cached due queues are
+    rebuilt at midnight rather than on the first deck of the day.
+    """
+    global due_queue_job
+    if due_queue_job is not None:
+        return
+    with _jobs_lock:
+        if due_queue_job is None:
+            due_queue_job = DueQueueJob(review_cache)
+            due_queue_job.start()
+
+
+def start_answer_log_job() -> None:
+    """Start the :class:`answer_log.AnswerLogJob` unless it is running.
+
+    Called whenever the answer log is used, so logged answers also reach
+    Airtable under a WSGI server that never runs this module as ``__main__``.
+    """
+    global answer_log_job
+    if answer_log is None or answer_log_job is not None:
+        return
+    with _jobs_lock:
+        if answer_log_job is None:
+            answer_log_job = AnswerLogJob(answer_log, push_review_state)
+            answer_log_job.start()
+
+
+def seed_answer_log(api_key: str, user: str) -> None:
+    """Copy ``user``'s spaced_rep rows from Airtable into the answer log once."""
+    if not answer_log.seeded(user):
+        answer_log.seed(user, fetch_review_state(api_key, user))
+
+
+def load_review_state(api_key: str, user: str) -> dict:
+    """Return ``user``'s spaced_rep rows from the answer log or Airtable."""
+    if answer_log is not None:
+        start_answer_log_job()
+        seed_answer_log(api_key, user)
+        return answer_log.state(user)
+    return fetch_review_state(api_key, user)
+
+
+def log_answer_batch(api_key: str, answers: list, user: str) -> list:
+    """Record ``(frequency, outcome, date_str)`` answers; return a success flag each.
+
+    With an answer log the answers are appended to it and synced to Airtable
+    later by :class:`answer_log.AnswerLogJob`; otherwise they are written to
+    Airtable by :func:`log_answers`.
+    """
+    if answer_log is None:
+        return log_answers(api_key, answers, user=user)
+    if not answers:
+        return []
+    start_answer_log_job()
+    try:
+        seed_answer_log(api_key, user)
+        answer_log.append_many(user, answers)
+    except Exception:
+        logger.error("Could not log answers for %r", user, exc_info=True)
+        return [False] * len(answers)
+    return [True] * len(answers)
+
+
+def _build_deck(api_key: str, user: str, exclude: frozenset = frozenset()) -> list:
+    def load_state():
+        return upstream_flight.do(
+            ("review_state", user), lambda: load_review_state(api_key, user)
+        )
+
+    tracked: set = set()
+    try:
+        state = review_cache.get(user, load_state)
+        spaced_pairs = state.due(datetime.utcnow().date())
+        tracked = state.tracked()
+    except Exception:
+        logger.warning("Falling back to Airtable due-card queries for %r", user)
+        spaced_pairs = None
+    if exclude and spaced_pairs is not None:
+        spaced_pairs = [pair for pair in spaced_pairs if pair[0] not in exclude]
+    return fetch_flashcards(
+        api_key,
+        user=user,
+        spaced_pairs=spaced_pairs,
+        filler=filler_words(api_key, tracked | exclude),
+        store=word_store,
+    )
+
+
+def filler_words(api_key: str, tracked: set) -> list | None:
+    """Draw filler frequencies the user is not tracking yet.
+
+    Words are weighted towards common ones over the whole vocabulary (see
+    :mod:`frequency_sampler`). Returns ``None``, i.e. the uniform default, if
+    the vocabulary size cannot be looked up.
+    """
+    def load_size():
+        if word_store is not None:
+            return word_store.max_frequency
+        return upstream_flight.do(("vocabulary",), lambda: fetch_max_frequency(api_key))
+
+    try:
+        sampler = vocabulary.get(load_size)
+    except Exception:
+        logger.warning("Vocabulary size unavailable; using uniform filler words")
+        return None
+    return sampler.sample(DECK_SIZE, tracked)
+
+
+def render_page(fragments: list, user: str | None) -> str:
+    """Render the deck page for ``user``, or the offline shell when ``None``."""
+    return render_template(
+        PAGE_TEMPLATE,
+        fragments=fragments,
+        level_colors=LEVEL_COLORS,
+        user=user,
+        user_cookie=USER_COOKIE,
+        default_user=DEFAULT_USER,
+    )
+
+
+@app.route("/flashcards_airtable/offline")
+def flashcards_offline_page():
+    """Render the deck page without a deck or a learner.
+
+    The service worker caches this page and serves it when
+    ``/flashcards_airtable`` cannot be loaded. The page then shows the
+    learner's next deck from IndexedDB.
+    """
+    return render_page([], None)
+
+
 @app.route("/flashcards_airtable")
 def flashcards_airtable_page():
-    """Render flashcards from Airtable."""
+    """Render flashcards from Airtable.
+
+    ``?user=<id>`` selects the learner and remembers them in a cookie.
+    """
+    chosen = request.args.get("user")
+    if chosen is not None and not USER_ID_RE.match(chosen):
+        return jsonify({"error": "invalid user"}), 400
+    user = chosen or current_user()
+
     api_key = os.environ.get("AIRTABLE_API_KEY")
     if not api_key:
         logger.error("AIRTABLE_API_KEY environment variable not set")
         airtable_cards = []
     else:
-        airtable_cards = fetch_flashcards(api_key)
+        airtable_cards = build_deck(api_key, user)
         logger.info(
             "Loaded flashcards: %s", [f"{c.front}:{c.level}" for c in airtable_cards]
         )
 
-    return render_template(
-        "flashcards_airtable.html",
-        flashcards=airtable_cards,
+    # Every load draws a new deck with this learner's levels.
+    response = uncacheable(
+        make_response(render_page(fragment_cache.render_deck(airtable_cards), user))
     )
+    if chosen:
+        response.set_cookie(
+            USER_COOKIE, chosen, max_age=365 * 24 * 3600, samesite="Lax"
+        )
+    return response
+
+
+def _warm_up_key() -> str:
+    api_key = os.environ.get("AIRTABLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("AIRTABLE_API_KEY not set")
+    return api_key
+
+
+def _warm_templates() -> None:
+    with app.test_request_context():
+        render_page([], DEFAULT_USER)
+
+
+def _warm_vocabulary() -> None:
+    if word_store is not None:
+        word_store.preload()
+        vocabulary.get(lambda: word_store.max_frequency)
+        return
+    # Also opens the first pooled connection (DNS, TCP and TLS) to Airtable.
+    api_key = _warm_up_key()
+    vocabulary.get(lambda: fetch_max_frequency(api_key))
+
+
+def _warm_review_state() -> None:
+    api_key = _warm_up_key()
+    state = review_cache.get(DEFAULT_USER, lambda: load_review_state(api_key, DEFAULT_USER))
+    state.prepare(datetime.utcnow().date())
+
+
+def _warm_deck() -> None:
+    fragment_cache.render_deck(build_deck(_warm_up_key(), DEFAULT_USER))
+
+
+warm_up = WarmUp(
+    [
+        ("templates", _warm_templates),
+        ("vocabulary", _warm_vocabulary),
+        ("review_state", _warm_review_state),
+        ("deck", _warm_deck),
+    ]
+)
+
+
+@app.route("/healthz")
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return uncacheable(jsonify({"status": "ok"}))
+
+
+@app.route("/readyz")
+def readyz():
+    """Readiness probe: ``200`` once warm-up has finished, ``503`` before.
+
+    Starts the warm-up and the background jobs if nothing else has, e.g.
+    under a WSGI server that does not run this module as ``__main__``.
+    """
+    warm_up.start()
+    start_due_queue_job()
+    start_answer_log_job()
+    status = warm_up.status()
+    return uncacheable(jsonify(status)), 200 if status["ready"] else 503
+
+
+@app.route("/api/stats")
+def stats():
+    """Return cache and request coalescing counters."""
+    return uncacheable(
+        jsonify(
+            {
+                "coalescing": upstream_flight.stats(),
+                "fragment_cache": {
+                    "hits": fragment_cache.hits,
+                    "misses": fragment_cache.misses,
+                    "size": len(fragment_cache),
+                },
+                "review_cache": {
+                    "users": len(review_cache),
+                    "evictions": review_cache.evictions,
+                },
+                "scheduler": SCHEDULER,
+                "image_cache": {"hits": image_cache.hits, "misses": image_cache.misses},
+                "vocabulary_file_words": None if word_store is None else len(word_store),
+                "answer_log": None if answer_log is None else answer_log.counts(),
+                "warmup_seconds": warm_up.seconds,
+            }
+        )
+    )
+
+
+@app.route("/sw.js")
+def service_worker():
+    """Serve the service worker from the root so it controls the whole app."""
+    response = app.send_static_file("sw.js")
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route("/api/flashcards")
+def flashcards_json():
+    """Return a new deck of flashcards as JSON.
+
+    ``?exclude=3,17`` leaves out cards the client already holds in other
+    decks, so prefetched decks do not repeat them.
+    """
+    api_key = os.environ.get("AIRTABLE_API_KEY")
+    if not api_key:
+        logger.error("AIRTABLE_API_KEY environment variable not set")
+        return jsonify({"error": "api key missing"}), 500
+    exclude = frozenset(
+        freq
+        for freq in map(parse_frequency, request.args.get("exclude", "").split(",")[:MAX_EXCLUDE])
+        if freq is not None
+    )
+    cards = build_deck(api_key, current_user(), exclude)
+    return uncacheable(Response(flashcards_to_json(cards), mimetype="application/json"))
+
+
+@app.route("/api/cards/<int:frequency>")
+def card_content(frequency: int):
+    """Return the shared word content for one card.
+
+    The response carries a strong ``ETag`` derived from the Airtable record so
+    browsers and CDNs can revalidate it with ``If-None-Match``.
+    """
+    api_key = os.environ.get("AIRTABLE_API_KEY")
+    if not api_key:
+        logger.error("AIRTABLE_API_KEY environment variable not set")
+        return jsonify({"error": "api key missing"}), 500
+    try:
+        content = fetch_card_content(api_key, frequency)
+    except Exception:
+        return uncacheable(jsonify({"error": "lookup failed"})), 502
+    if content is None:
+        return uncacheable(jsonify({"error": "card not found"})), 404
+    etag = f"{content.pop('record_id')}-{content.pop('content_hash')}"
+    return cacheable(jsonify(content), etag)
+
+
+class ImageLookupLimited(RuntimeError):
+    """Raised when ``image_lookups`` has no budget left for an uncached image."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"image lookups limited for {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+@app.route("/images/<int:frequency>/<attachment>/<variant>.webp")
+def card_image(frequency: int, attachment: str, variant: str):
+    """Serve a resized WebP copy of a word's image attachment.
+
+    The image is downloaded from Airtable on the first request only (see
+    :mod:`image_cache`). An attachment id always refers to the same image,
+    so the response is marked ``immutable``. When the vocabulary is mapped
+    from a file, ids it does not list for the word are rejected without
+    asking Airtable. Otherwise lookups of uncached ids are limited by
+    ``image_lookups`` and answered with ``503`` once it runs out.
+    """
+    if word_store is not None and word_store.image_id(frequency) != attachment:
+        return uncacheable(jsonify({"error": "image not found"})), 404
+    api_key = os.environ.get("AIRTABLE_API_KEY")
+
+    def download():
+        if not api_key:
+            raise RuntimeError("AIRTABLE_API_KEY environment variable not set")
+        if word_store is None:
+            retry_after = image_lookups.try_acquire("images")
+            if retry_after:
+                raise ImageLookupLimited(retry_after)
+        return fetch_image(api_key, frequency, attachment)
+
+    try:
+        path = image_cache.get(frequency, attachment, variant, download)
+    except ImageLookupLimited as exc:
+        response = uncacheable(jsonify({"error": "too many image lookups"}))
+        response.headers["Retry-After"] = str(math.ceil(exc.retry_after))
+        return response, 503
+    except Exception:
+        logger.error("Could not cache image %s for %s", attachment, frequency, exc_info=True)
+        return uncacheable(jsonify({"error": "image unavailable"})), 502
+    if path is None:
+        return uncacheable(jsonify({"error": "image not found"})), 404
+    response = send_file(path, mimetype="image/webp", conditional=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route("/api/practice", methods=["POST"])
@@ -40,10 +485,15 @@ def record_practice():
     if not api_key:
         logger.error("AIRTABLE_API_KEY environment variable not set")
         return jsonify({"error": "api key missing"}), 500
+    user = current_user()
     date_str = datetime.utcnow().strftime("%Y-%m-%d")
-    success = log_practice(api_key, freq, date_str)
+    if answer_log is not None:
+        success = log_answer_batch(api_key, [(str(freq), "practice", date_str)], user)[0]
+    else:
+        success = log_practice(api_key, freq, date_str, user=user)
     if not success:
         return jsonify({"error": "logging failed"}), 500
+    review_cache.apply(user, str(freq), "practice", date_str)
     return jsonify({"status": "ok"})
 
 
@@ -58,13 +508,83 @@ def record_forget():
     if not api_key:
         logger.error("AIRTABLE_API_KEY environment variable not set")
         return jsonify({"error": "api key missing"}), 500
+    user = current_user()
     date_str = datetime.utcnow().strftime("%Y-%m-%d")
-    success = log_forget(api_key, freq, date_str)
+    if answer_log is not None:
+        success = log_answer_batch(api_key, [(str(freq), "forget", date_str)], user)[0]
+    else:
+        success = log_forget(api_key, freq, date_str, user=user)
     if not success:
         return jsonify({"error": "logging failed"}), 500
+    review_cache.apply(user, str(freq), "forget", date_str)
     return jsonify({"status": "ok"})
 
+
+ANSWER_OUTCOMES = ("practice", "forget")
+
+
+def answer_date(timestamp: object) -> str | None:
+    """Return the UTC ``YYYY-MM-DD`` date for an ISO 8601 ``timestamp``.
+
+    Answers queued offline keep the time they were given. ``None`` is returned
+    if ``timestamp`` is present but cannot be parsed; a missing timestamp means
+    now.
+    """
+    if timestamp in (None, ""):
+        return datetime.utcnow().strftime("%Y-%m-%d")
+    try:
+        when = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.strftime("%Y-%m-%d")
+
+
+@app.route("/api/answers", methods=["POST"])
+def record_answers():
+    """Record a batch of practice/forget answers.
+
+    The body is a JSON array of ``{frequency, outcome, timestamp}`` events,
+    where ``outcome`` is ``"practice"`` or ``"forget"``. Valid events are
+    applied in order by :func:`log_answer_batch` in one batch and the response
+    lists a result for each event: ``ok``, ``invalid`` (the event will never
+    succeed) or ``error`` (safe to retry).
+    """
+    events = request.get_json(force=True)
+    if not isinstance(events, list):
+        return jsonify({"error": "array of answers required"}), 400
+    api_key = os.environ.get("AIRTABLE_API_KEY")
+    if not api_key:
+        logger.error("AIRTABLE_API_KEY environment variable not set")
+        return jsonify({"error": "api key missing"}), 500
+
+    results = []
+    answers = []
+    positions = []
+    for event in events:
+        event = event if isinstance(event, dict) else {}
+        freq = event.get("frequency")
+        outcome = event.get("outcome")
+        date_str = answer_date(event.get("timestamp"))
+        results.append({"frequency": freq, "status": "invalid"})
+        if freq and outcome in ANSWER_OUTCOMES and date_str is not None:
+            answers.append((str(freq), outcome, date_str))
+            positions.append(len(results) - 1)
+
+    user = current_user()
+    flags = log_answer_batch(api_key, answers, user)
+    for pos, answer, success in zip(positions, answers, flags):
+        results[pos]["status"] = "ok" if success else "error"
+        if success:
+            review_cache.apply(user, *answer)
+    return jsonify({"results": results})
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     port = int(os.environ.get("PORT", 5000))
+    start_due_queue_job()
+    start_answer_log_job()
+    warm_up.start()
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,634 @@
+"""Local stand-in for the subset of the Airtable REST API this app uses.
+
+It serves ``/v0/<base>/<table>`` list, get, create and update requests
+(single and batch), including ``filterByFormula``, ``sort``, ``maxRecords``,
+``pageSize``, ``offset`` and ``fields[]``. It also serves
+``/v0/meta/bases/<base>/tables``. Each request can be delayed to simulate the
+network round trip to Airtable. Like Airtable, responses are gzipped for
+clients that send ``Accept-Encoding: gzip``; ``bytes_sent`` counts body bytes
+as sent and ``json_bytes`` before compression.
+
+Formulas are evaluated by a small interpreter that understands the functions
+produced by :mod:`airtable_formula`: ``AND``, ``OR``, ``NOT``, ``TRUE``,
+``FALSE``, ``BLANK``, ``VALUE``, ``TODAY``, ``DATEADD``, ``IS_BEFORE`` and
+``IS_AFTER``, together with comparisons on fields, strings and numbers.
+
+Usage::
+
+    python -m benchmarks.fake_airtable --port 8765 --latency 0.05 --words 5000
+    AIRTABLE_API_URL=http://127.0.0.1:8765/v0 python app.py
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+BASE_ID = "applW7zbiH23gDDCK"
+MAX_PAGE_SIZE = 100
+MAX_BATCH = 10
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<field>\{[^}]*\})
+      | (?P<string>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op>>=|<=|!=|=|>|<|&)
+      | (?P<punct>[(),-])
+    )""",
+    re.VERBOSE,
+)
+
+
+class FormulaError(ValueError):
+    """Raised for formulas the interpreter cannot parse or evaluate."""
+
+
+def _tokenize(formula: str) -> List[tuple]:
+    tokens = []
+    pos = 0
+    formula = formula.rstrip()
+    while pos < len(formula):
+        match = _TOKEN_RE.match(formula, pos)
+        if not match:
+            raise FormulaError(f"Unexpected input at {pos}: {formula[pos:]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+def _unescape(literal: str) -> str:
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _blank(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if op in ("=", "!=") and (_blank(left) or _blank(right)):
+        equal = _blank(left) and _blank(right)
+        return equal if op == "=" else not equal
+    lnum, rnum = _to_number(left), _to_number(right)
+    numeric = (
+        lnum is not None
+        and rnum is not None
+        and (isinstance(left, (int, float)) or isinstance(right, (int, float)) or op not in ("=", "!="))
+    )
+    if numeric:
+        left, right = lnum, rnum
+    else:
+        left, right = ("" if left is None else str(left)), ("" if right is None else str(right))
+    return {
+        "=": left == right,
+        "!=": left != right,
+        ">": left > right,
+        "<": left < right,
+        ">=": left >= right,
+        "<=": left <= right,
+    }[op]
+
+
+def _dateadd(value: Any, count: Any, unit: Any) -> Optional[date]:
+    start = _to_date(value)
+    if start is None:
+        return None
+    days = {"day": 1, "days": 1, "week": 7, "weeks": 7}.get(str(unit).lower())
+    if days is None:
+        raise FormulaError(f"Unsupported DATEADD unit {unit!r}")
+    return start + timedelta(days=int(_to_number(count) or 0) * days)
+
+
+class Formula:
+    """A parsed ``filterByFormula`` expression."""
+
+    def __init__(self, formula: str) -> None:
+        self.source = formula
+        self._tokens = _tokenize(formula)
+        self._pos = 0
+        self._tree = self._expr() if self._tokens else ("const", True)
+        if self._pos != len(self._tokens):
+            raise FormulaError(f"Trailing input in formula {formula!r}")
+
+    # Parsing ---------------------------------------------------------------
+
+    def _peek(self) -> Optional[tuple]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _take(self, kind: str | None = None, value: str | None = None) -> tuple:
+        token = self._peek()
+        if token is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise FormulaError(f"Unexpected token {token!r} in {self.source!r}")
+        self._pos += 1
+        return token
+
+    def _expr(self) -> tuple:
+        left = self._unary()
+        token = self._peek()
+        if token and token[0] == "op":
+            self._pos += 1
+            return ("cmp", token[1], left, self._unary())
+        return left
+
+    def _unary(self) -> tuple:
+        token = self._peek()
+        if token == ("punct", "-"):
+            self._pos += 1
+            return ("neg", self._unary())
+        return self._primary()
+
+    def _primary(self) -> tuple:
+        kind, value = self._take()
+        if kind == "number":
+            return ("const", float(value) if "." in value else int(value))
+        if kind == "string":
+            return ("const", _unescape(value))
+        if kind == "field":
+            return ("field", value[1:-1])
+        if kind == "punct" and value == "(":
+            inner = self._expr()
+            self._take("punct", ")")
+            return inner
+        if kind == "name":
+            self._take("punct", "(")
+            args = []
+            if self._peek() != ("punct", ")"):
+                args.append(self._expr())
+                while self._peek() == ("punct", ","):
+                    self._pos += 1
+                    args.append(self._expr())
+            self._take("punct", ")")
+            return ("call", value.upper(), args)
+        raise FormulaError(f"Unexpected token {value!r} in {self.source!r}")
+
+    # Evaluation ------------------------------------------------------------
+
+    def matches(self, fields: Dict[str, Any], today: date) -> bool:
+        """Return whether a record with ``fields`` satisfies the formula."""
+        if self._compiled is None:
+            self._compiled = self._compile(self._tree)
+        return bool(self._compiled(fields, today))
+
+    _compiled: Optional[Callable[[Dict[str, Any], date], Any]] = None
+
+    @staticmethod
+    def _compile_in(name: str, values: List[Any]) -> Callable[[Dict[str, Any], date], bool]:
+        """Match records whose field ``name`` equals any of ``values``.
+
+        Follows :func:`_compare` semantics: numbers compare numerically with
+        numeric strings, everything else compares as text.
+        """
+        texts = {str(v) for v in values if not _blank(v)}
+        numbers = {n for n in map(_to_number, values) if n is not None}
+        match_blank = any(_blank(v) for v in values)
+
+        def matches(fields: Dict[str, Any], today: date) -> bool:
+            value = fields.get(name)
+            if _blank(value):
+                return match_blank
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value) in numbers
+            return str(value) in texts
+
+        return matches
+
+    def _compile(self, node: tuple) -> Callable[[Dict[str, Any], date], Any]:
+        """Turn a parse tree into nested closures; much faster than re-walking it."""
+        kind = node[0]
+        if kind == "const":
+            value = node[1]
+            return lambda fields, today: value
+        if kind == "field":
+            name = node[1]
+            return lambda fields, today: fields.get(name)
+        if kind == "neg":
+            inner = self._compile(node[1])
+            return lambda fields, today: -(_to_number(inner(fields, today)) or 0)
+        if kind == "cmp":
+            if node[1] == "=" and node[2][0] == "field" and node[3][0] == "const":
+                return self._compile_in(node[2][1], [node[3][1]])
+            op = node[1]
+            left, right = self._compile(node[2]), self._compile(node[3])
+            return lambda fields, today: _compare(op, left(fields, today), right(fields, today))
+
+        name = node[1]
+        if name == "OR" and node[2]:
+            # ``OR({F} = a, {F} = b, ...)`` as built by ``field_in`` becomes a
+            # set lookup instead of one comparison per clause.
+            fields_used = {
+                a[2][1]
+                for a in node[2]
+                if a[0] == "cmp" and a[1] == "=" and a[2][0] == "field" and a[3][0] == "const"
+            }
+            if len(fields_used) == 1 and all(a[0] == "cmp" for a in node[2]):
+                consts = [a[3][1] for a in node[2] if a[1] == "=" and a[2][0] == "field"]
+                if len(consts) == len(node[2]):
+                    return self._compile_in(fields_used.pop(), consts)
+        args = [self._compile(a) for a in node[2]]
+        if name == "AND":
+            return lambda fields, today: all(a(fields, today) for a in args)
+        if name == "OR":
+            return lambda fields, today: any(a(fields, today) for a in args)
+        if name == "NOT":
+            return lambda fields, today: not args[0](fields, today)
+        if name == "TRUE":
+            return lambda fields, today: True
+        if name == "FALSE":
+            return lambda fields, today: False
+        if name == "BLANK":
+            return lambda fields, today: None
+        if name == "VALUE":
+            return lambda fields, today: _to_number(args[0](fields, today))
+        if name == "TODAY":
+            return lambda fields, today: today
+        if name == "DATEADD":
+            return lambda fields, today: _dateadd(*(a(fields, today) for a in args))
+        if name in ("IS_BEFORE", "IS_AFTER"):
+            before = name == "IS_BEFORE"
+
+            def compare_dates(fields: Dict[str, Any], today: date) -> bool:
+                left = _to_date(args[0](fields, today))
+                right = _to_date(args[1](fields, today))
+                if left is None or right is None:
+                    return False
+                return left < right if before else left > right
+
+            return compare_dates
+        raise FormulaError(f"Unsupported function {name}")
+
+
+def _sort_key(value: Any) -> tuple:
+    number = _to_number(value) if not isinstance(value, str) else None
+    if value is None:
+        return (0, 0, "")
+    if number is not None:
+        return (1, number, "")
+    return (2, 0, str(value))
+
+
+class FakeAirtable:
+    """In-memory tables plus the HTTP server that exposes them."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        today: Callable[[], date] = lambda: datetime.utcnow().date(),
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.today = today
+        self.tables: Dict[str, Dict[str, dict]] = {}
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.json_bytes = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._formulas: Dict[str, Formula] = {}
+
+    # Data ------------------------------------------------------------------
+
+    def insert(self, table: str, fields: dict) -> dict:
+        """Add a record to ``table`` and return it."""
+        with self._lock:
+            rec_id = f"rec{next(self._ids):014d}"
+            record = {
+                "id": rec_id,
+                "createdTime": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "fields": {k: v for k, v in fields.items() if not _blank(v)},
+            }
+            self.tables.setdefault(table, {})[rec_id] = record
+            return record
+
+    def update(self, table: str, rec_id: str, fields: dict) -> Optional[dict]:
+        """Merge ``fields`` into an existing record; return ``None`` if missing."""
+        with self._lock:
+            record = self.tables.get(table, {}).get(rec_id)
+            if record is None:
+                return None
+            for key, value in fields.items():
+                if _blank(value):
+                    record["fields"].pop(key, None)
+                else:
+                    record["fields"][key] = value
+            return record
+
+    def records(self, table: str) -> List[dict]:
+        """Return a snapshot of every record in ``table``."""
+        with self._lock:
+            return list(self.tables.get(table, {}).values())
+
+    def seed_vocabulary(self, count: int, seed: int = 0) -> None:
+        """Fill french_words with ``count`` synthetic words."""
+        rng = random.Random(seed)
+        genders = ["masculine", "feminine", "N/A"]
+        parts = ["noun", "verb", "adjective", "adverb"]
+        for freq in range(1, count + 1):
+            self.insert(
+                "french_words",
+                {
+                    "Frequency": freq,
+                    "french_word": f"mot{freq}",
+                    "english_translation": {
+                        "state": "generated",
+                        "value": f"word {freq}",
+                        "isStale": False,
+                    },
+                    "english_word": f"word {freq}",
+                    "gender": rng.choice(genders),
+                    "part_of_speech": rng.choice(parts),
+                    "example_1": f"Voici le mot{freq}.",
+                    "example_2": f"J'aime le mot{freq}.",
+                    "image": [
+                        {
+                            "id": f"att{freq}",
+                            "url": f"https://example.invalid/{freq}.png",
+                            "filename": f"{freq}.png",
+                            "type": "image/png",
+                            "thumbnails": {
+                                "small": {"url": f"https://example.invalid/{freq}-s.png"},
+                                "large": {"url": f"https://example.invalid/{freq}-l.png"},
+                            },
+                        }
+                    ],
+                },
+            )
+
+    def seed_reviews(self, count: int, user: str = "", seed: int = 0) -> None:
+        """Add ``count`` spaced_rep rows for ``user`` with random levels and dates."""
+        rng = random.Random(seed)
+        today = self.today()
+        for freq in rng.sample(range(1, count * 4 + 1), count):
+            fields = {
+                "Frequency": str(freq),
+                "Level": str(rng.randint(1, 5)),
+                "Date": (today - timedelta(days=rng.randint(0, 60))).isoformat(),
+            }
+            if user:
+                fields["User"] = user
+            self.insert("spaced_rep", fields)
+
+    # Queries ---------------------------------------------------------------
+
+    def _formula(self, source: str) -> Formula:
+        formula = self._formulas.get(source)
+        if formula is None:
+            formula = self._formulas[source] = Formula(source)
+        return formula
+
+    def list_records(self, table: str, query: Dict[str, List[str]]) -> dict:
+        """Return a list response for ``table`` and parsed query ``query``."""
+        records = self.records(table)
+        source = query.get("filterByFormula", [""])[0]
+        if source:
+            formula = self._formula(source)
+            today = self.today()
+            records = [r for r in records if formula.matches(r["fields"], today)]
+
+        sorts = []
+        for i in itertools.count():
+            field = query.get(f"sort[{i}][field]")
+            if not field:
+                break
+            direction = query.get(f"sort[{i}][direction]", ["asc"])[0]
+            sorts.append((field[0], direction == "desc"))
+        for field, reverse in reversed(sorts):
+            records.sort(key=lambda r: _sort_key(r["fields"].get(field)), reverse=reverse)
+
+        if "maxRecords" in query:
+            records = records[: int(query["maxRecords"][0])]
+        page_size = min(int(query.get("pageSize", [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+        start = int(query.get("offset", ["0"])[0])
+        page = records[start : start + page_size]
+
+        wanted = query.get("fields[]")
+        if wanted:
+            page = [
+                dict(r, fields={k: v for k, v in r["fields"].items() if k in wanted})
+                for r in page
+            ]
+        result: Dict[str, Any] = {"records": page}
+        if start + page_size < len(records):
+            result["offset"] = str(start + page_size)
+        return result
+
+    def schema(self) -> dict:
+        """Return a minimal meta API schema for the known tables."""
+        tables = []
+        for name in sorted(self.tables):
+            names = sorted({k for r in self.records(name) for k in r["fields"]})
+            tables.append(
+                {
+                    "id": f"tbl{name}",
+                    "name": name,
+                    "fields": [{"id": f"fld{n}", "name": n, "type": "singleLineText"} for n in names],
+                }
+            )
+        return {"tables": tables}
+
+    # Server ----------------------------------------------------------------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving in a background thread and return the ``/v0`` URL."""
+        fake = self
+
+        class Handler(_Handler):
+            airtable = fake
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v0"
+
+    def stop(self) -> None:
+        """Stop the server started by :meth:`start`."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeAirtable":
+        if self._server is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def delay(self) -> None:
+        """Sleep for the configured latency plus jitter."""
+        wait = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    airtable: FakeAirtable
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes on a keep-alive connection; with
+    # Nagle's algorithm the body waits for the client's delayed ACK (~40ms).
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: Any) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        data = raw
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(raw, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        # Count before writing so a client that has its response sees the totals.
+        with self.airtable._lock:
+            self.airtable.request_count += 1
+            self.airtable.bytes_sent += len(data)
+            self.airtable.json_bytes += len(raw)
+        self.wfile.write(data)
+
+    def _error(self, status: int, kind: str, message: str) -> None:
+        self._send(status, {"error": {"type": kind, "message": message}})
+
+    def _route(self) -> tuple:
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        return segments, parse_qs(parts.query, keep_blank_values=True)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:
+        self.airtable.delay()
+        segments, query = self._route()
+        if segments[:3] == ["v0", "meta", "bases"]:
+            self._send(200, self.airtable.schema())
+            return
+        if len(segments) == 3:
+            try:
+                self._send(200, self.airtable.list_records(segments[2], query))
+            except FormulaError as exc:
+                self._error(422, "INVALID_FILTER_BY_FORMULA", str(exc))
+            return
+        if len(segments) == 4:
+            for record in self.airtable.records(segments[2]):
+                if record["id"] == segments[3]:
+                    self._send(200, record)
+                    return
+        self._error(404, "NOT_FOUND", self.path)
+
+    def do_POST(self) -> None:
+        self.airtable.delay()
+        segments, _ = self._route()
+        if len(segments) != 3:
+            self._error(404, "NOT_FOUND", self.path)
+            return
+        body = self._body()
+        table = segments[2]
+        if "records" in body:
+            if len(body["records"]) > MAX_BATCH:
+                self._error(422, "INVALID_RECORDS", "too many records")
+                return
+            created = [self.airtable.insert(table, r.get("fields", {})) for r in body["records"]]
+            self._send(200, {"records": created})
+        else:
+            self._send(200, self.airtable.insert(table, body.get("fields", {})))
+
+    def do_PATCH(self) -> None:
+        self.airtable.delay()
+        segments, _ = self._route()
+        body = self._body()
+        if len(segments) == 4:
+            record = self.airtable.update(segments[2], segments[3], body.get("fields", {}))
+            if record is None:
+                self._error(404, "NOT_FOUND", self.path)
+            else:
+                self._send(200, record)
+            return
+        if len(segments) == 3 and "records" in body:
+            if len(body["records"]) > MAX_BATCH:
+                self._error(422, "INVALID_RECORDS", "too many records")
+                return
+            updated = []
+            for rec in body["records"]:
+                record = self.airtable.update(segments[2], rec.get("id"), rec.get("fields", {}))
+                if record is None:
+                    self._error(404, "NOT_FOUND", str(rec.get("id")))
+                    return
+                updated.append(record)
+            self._send(200, {"records": updated})
+            return
+        self._error(404, "NOT_FOUND", self.path)
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run the fake Airtable server in the foreground."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds")
+    parser.add_argument("--words", type=int, default=1000, help="Vocabulary size to seed")
+    parser.add_argument("--reviews", type=int, default=200, help="spaced_rep rows to seed")
+    args = parser.parse_args(argv)
+
+    fake = FakeAirtable(latency=args.latency, jitter=args.jitter)
+    fake.seed_vocabulary(args.words)
+    fake.seed_reviews(args.reviews)
+    url = fake.start(args.host, args.port)
+    print(f"Fake Airtable listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""Measure memory per 10k flashcards for the available representations.
+
+Usage::
+
+    python -m benchmarks.flashcard_memory [--cards 10000]
+
+The same synthetic vocabulary is loaded as plain dataclasses (the previous
+``Flashcard``), as slotted :class:`Flashcard` objects and as a columnar
+:class:`WordStore`, and the memory retained by each is measured with
+``tracemalloc``. Serialization time of a 25-card deck via ``asdict`` and via the
+lightweight paths is reported as well.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from airtable_data_access import Flashcard, flashcards_to_json
+from word_store import WordStore
+
+GENDERS = ["masculine", "feminine", "N/A"]
+PARTS_OF_SPEECH = ["noun", "verb", "adjective", "adverb", "preposition"]
+
+
+@dataclass
+class PlainFlashcard:
+    """The unslotted layout ``Flashcard`` used before this benchmark existed."""
+
+    front: str
+    back: str
+    frequency: str | None = None
+    level: str | None = None
+    gender: str | None = None
+    part_of_speech: str | None = None
+    example_1: str | None = None
+    example_2: str | None = None
+
+
+def synthetic_records(count: int) -> List[dict]:
+    """Return ``count`` fake french_words records shaped like Airtable's."""
+    records = []
+    for i in range(1, count + 1):
+        records.append(
+            {
+                "id": f"rec{i:08d}",
+                "fields": {
+                    "Frequency": i,
+                    "french_word": f"mot{i}",
+                    "english_translation": {"value": f"word {i}"},
+                    # Airtable returns fresh strings per record, so build them
+                    # dynamically rather than sharing the literals.
+                    "gender": "".join(GENDERS[i % 3]),
+                    "part_of_speech": "".join(PARTS_OF_SPEECH[i % 5]),
+                    "example_1": f"Voici le mot{i} dans une phrase.",
+                    "example_2": f"J'utilise le mot{i} souvent.",
+                },
+            }
+        )
+    return records
+
+
+def measure(build: Callable[[], object]) -> int:
+    """Return the bytes retained by the object ``build`` returns."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del obj
+    return size
+
+
+def build_cards(cls: type, records: List[dict]) -> list:
+    cards = []
+    for rec in records:
+        f = rec["fields"]
+        cards.append(
+            cls(
+                front=f["french_word"],
+                back=f["english_translation"]["value"],
+                frequency=str(f["Frequency"]),
+                level="1",
+                gender=f["gender"],
+                part_of_speech=f["part_of_speech"],
+                example_1=f["example_1"],
+                example_2=f["example_2"],
+            )
+        )
+    return cards
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the flashcard memory benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    # Records are built outside the measurement so that only the extra memory
+    # held by each representation is counted. String contents are shared by
+    # all three, so the figures reflect container overhead.
+    records = synthetic_records(args.cards)
+    per_10k = 10_000 / args.cards
+
+    results = {
+        "dataclass": measure(lambda: build_cards(PlainFlashcard, records)),
+        "slotted": measure(lambda: build_cards(Flashcard, records)),
+        "columnar": measure(lambda: WordStore.from_records(records)),
+    }
+    print(f"Container overhead for {args.cards} cards (KiB per 10k cards):")
+    for name, size in results.items():
+        print(f"  {name:<10} {size * per_10k / 1024:10.1f}")
+
+    plain_deck = build_cards(PlainFlashcard, records[:25])
+    deck = build_cards(Flashcard, records[:25])
+    store = WordStore.from_records(records)
+    freqs = list(range(1, 26))
+    number = 2000
+    timings = {
+        "asdict": timeit.timeit(
+            lambda: json.dumps([asdict(c) for c in plain_deck]), number=number
+        ),
+        "to_dict": timeit.timeit(lambda: flashcards_to_json(deck), number=number),
+        "store": timeit.timeit(lambda: store.to_json(freqs), number=number),
+    }
+    print("Serialize 25-card deck (microseconds per deck):")
+    for name, seconds in timings.items():
+        print(f"  {name:<10} {seconds / number * 1e6:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
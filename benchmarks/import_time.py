@@ -0,0 +1,125 @@
+"""Cold-start benchmark for the app and scripts.
+
+Usage::
+
+    python -m benchmarks.import_time [--repeat 5] [--save-baseline] [--compare]
+        [--tolerance 0.25] [--max-ms 200]
+
+Each case runs in a fresh interpreter ``--repeat`` times and the fastest run
+is reported, which filters out noise from other processes. Import cases time
+the ``import`` statement alone; command cases time the whole process and
+subtract the time of an empty interpreter. ``--save-baseline`` writes
+``benchmarks/import_baseline.json``; ``--compare`` exits with status 1 if a
+case got slower than the baseline by more than ``--tolerance`` (plus a 10 ms
+allowance for timer noise). ``--max-ms`` additionally fails any case above
+an absolute budget.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "import_baseline.json")
+NOISE_MS = 10.0
+
+IMPORT_CASES = ["scripts.translate_words", "scripts.fetch_airtable_schema", "scripts.cli", "app"]
+COMMAND_CASES = {
+    "translate_words --help": ["-m", "scripts.translate_words", "--help"],
+    "cli --help": ["-m", "scripts.cli", "--help"],
+}
+
+_TIMED_IMPORT = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(module: str) -> float:
+    """Return the seconds taken by ``import module`` in a fresh interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-c", _TIMED_IMPORT.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def time_command(args: List[str]) -> float:
+    """Return the wall-clock seconds of ``python args`` in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=False)
+    return time.perf_counter() - start
+
+
+def measure(repeat: int) -> Dict[str, float]:
+    """Return the fastest time in milliseconds for every case."""
+    results = {
+        f"import {module}": min(time_import(module) for _ in range(repeat)) * 1000
+        for module in IMPORT_CASES
+    }
+    interpreter = min(time_command(["-c", "pass"]) for _ in range(repeat))
+    for name, args in COMMAND_CASES.items():
+        best = min(time_command(args) for _ in range(repeat))
+        results[name] = max(0.0, best - interpreter) * 1000
+    return results
+
+
+def regressions(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float,
+    max_ms: float | None = None,
+) -> List[str]:
+    """Return descriptions of cases that exceed the baseline or budget."""
+    problems = []
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if base is not None and ms > base * (1 + tolerance) + NOISE_MS:
+            problems.append(f"{name}: {ms:.1f}ms > baseline {base:.1f}ms (+{tolerance:.0%})")
+        if max_ms is not None and ms > max_ms:
+            problems.append(f"{name}: {ms:.1f}ms > budget {max_ms:.1f}ms")
+    return problems
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the cold-start benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    for name, ms in results.items():
+        print(f"{name:<40}{ms:9.1f} ms")
+
+    baseline: Dict[str, float] = {}
+    if args.compare:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            return 1
+    problems = regressions(results, baseline, args.tolerance, args.max_ms)
+    for line in problems:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+"""Closed-loop load test simulating learners against the Flask app.
+
+Usage::
+
+    python -m benchmarks.load_test [--learners 1,2,4,8,16,32] [--duration 20]
+        [--latency 0.05] [--think-scale 0.05] [--csv curve.csv]
+
+The app runs in-process on a threaded WSGI server and talks to the local
+Airtable stand-in (:mod:`benchmarks.fake_airtable`). Each simulated learner
+repeats study sessions the way the page does: load ``/flashcards_airtable``,
+prefetch ``DECKS_AHEAD`` decks from ``/api/flashcards``, then for every deck
+flip and answer each card after a think time, post the answers to
+``/api/answers`` and top the prefetched decks back up.
+
+Think times are log-normal (median ``--flip-seconds`` to reveal a card and
+``--answer-seconds`` to grade it) multiplied by ``--think-scale`` so that a run
+finishes in minutes rather than hours. Scaling think time down by ``k`` makes
+each simulated learner generate the load of ``1/k`` real learners.
+
+The number of learners is stepped through ``--learners``. For each step the
+driver reports requests per second and p50/p95/p99 latency per endpoint, and
+the saturation point is the last step after which adding learners no longer
+raised throughput by at least ``--min-gain`` or p95 went above ``--slo-ms``.
+"""
+
+import argparse
+import csv
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fake_airtable import FakeAirtable
+from benchmarks.run_benchmarks import connect, percentile
+
+DECKS_AHEAD = 2
+DEFAULT_LEARNERS = "1,2,4,8,16,32"
+
+
+@dataclass
+class StepResult:
+    """Measurements for one concurrency step."""
+
+    learners: int
+    duration: float
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: int = 0
+    sessions: int = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def p(self, pct: float, endpoint: Optional[str] = None) -> float:
+        """Return the ``pct`` latency percentile in ms, overall or for ``endpoint``."""
+        if endpoint is None:
+            samples = [s for v in self.latencies.values() for s in v]
+        else:
+            samples = self.latencies.get(endpoint, [])
+        return percentile(samples, pct) * 1000 if samples else 0.0
+
+
+def think_time(rng: random.Random, median: float, sigma: float = 0.6) -> float:
+    """Return a log-normal think time in seconds with the given ``median``."""
+    return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+def find_saturation(
+    steps: Sequence[StepResult], min_gain: float = 0.1, slo_ms: Optional[float] = None
+) -> Optional[StepResult]:
+    """Return the step at which the app saturated.
+
+    That is the last step before throughput stopped growing by at least
+    ``min_gain`` (relative to the previous step) or, when ``slo_ms`` is given,
+    before p95 latency exceeded it. Returns ``None`` if every step still
+    scaled, i.e. saturation was not reached.
+    """
+    best = None
+    for step in steps:
+        if slo_ms is not None and step.p(95) > slo_ms:
+            return best
+        if best is not None and step.rps < best.rps * (1 + min_gain):
+            return best
+        best = step
+    return None
+
+
+class Learner(threading.Thread):
+    """One simulated learner running sessions until ``stop`` is set."""
+
+    def __init__(self, base_url: str, user: str, args: argparse.Namespace,
+                 result: StepResult, lock: threading.Lock, stop: threading.Event) -> None:
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.user = user
+        self.args = args
+        self.result = result
+        self.lock = lock
+        self.stop_event = stop
+        self.rng = random.Random(user)
+        self.session = requests.Session()
+        self.session.headers["X-User-Id"] = user
+
+    def request(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = resp.status_code < 400
+        except requests.RequestException:
+            resp, ok = None, False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            if ok:
+                self.result.latencies[endpoint].append(elapsed)
+            else:
+                self.result.errors += 1
+        return resp if ok else None
+
+    def think(self, median: float) -> bool:
+        """Wait a think time; return ``False`` if the step ended meanwhile."""
+        return not self.stop_event.wait(think_time(self.rng, median * self.args.think_scale))
+
+    def fetch_deck(self) -> List[dict]:
+        resp = self.request("GET /api/flashcards", "GET", "/api/flashcards")
+        return resp.json() if resp is not None else []
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            if self.request("GET /flashcards_airtable", "GET", "/flashcards_airtable") is None:
+                self.think(self.args.answer_seconds)
+                continue
+            decks = [self.fetch_deck() for _ in range(DECKS_AHEAD)]
+            for _ in range(self.args.decks_per_session):
+                deck = decks.pop(0) if decks else []
+                answers = []
+                for card in deck:
+                    if not (self.think(self.args.flip_seconds) and self.think(self.args.answer_seconds)):
+                        return
+                    outcome = "practice" if self.rng.random() < self.args.practice_ratio else "forget"
+                    answers.append({"frequency": card["frequency"], "outcome": outcome})
+                if answers:
+                    self.request("POST /api/answers", "POST", "/api/answers", json=answers)
+                decks.append(self.fetch_deck())
+            with self.lock:
+                self.result.sessions += 1
+
+
+def run_step(base_url: str, learners: int, args: argparse.Namespace) -> StepResult:
+    """Run ``learners`` concurrent learners for ``args.duration`` seconds."""
+    result = StepResult(learners=learners, duration=args.duration)
+    lock = threading.Lock()
+    stop = threading.Event()
+    threads = [
+        Learner(base_url, f"load-{learners}-{n}", args, result, lock, stop)
+        for n in range(learners)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    stop.wait(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def print_step(step: StepResult) -> None:
+    print(
+        f"{step.learners:>8}{step.rps:>9.1f}{step.p(50):>9.1f}{step.p(95):>9.1f}"
+        f"{step.p(99):>9.1f}{step.errors:>8}{step.sessions:>10}"
+    )
+
+
+def print_endpoints(step: StepResult) -> None:
+    for endpoint in sorted(step.latencies):
+        print(
+            f"    {endpoint:<28}{len(step.latencies[endpoint]):>7}"
+            f"{step.p(50, endpoint):>9.1f}{step.p(95, endpoint):>9.1f}"
+        )
+
+
+def write_csv(path: str, steps: Sequence[StepResult]) -> None:
+    """Write one row per step and endpoint for plotting curves."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["learners", "endpoint", "requests", "rps", "p50_ms", "p95_ms", "p99_ms", "errors"])
+        for step in steps:
+            writer.writerow([step.learners, "all", step.requests, f"{step.rps:.2f}",
+                             f"{step.p(50):.1f}", f"{step.p(95):.1f}", f"{step.p(99):.1f}", step.errors])
+            for endpoint, samples in sorted(step.latencies.items()):
+                writer.writerow([step.learners, endpoint, len(samples),
+                                 f"{len(samples) / step.duration:.2f}", f"{step.p(50, endpoint):.1f}",
+                                 f"{step.p(95, endpoint):.1f}", f"{step.p(99, endpoint):.1f}", ""])
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the load test."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--learners", default=DEFAULT_LEARNERS, help="Comma separated steps")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake Airtable latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--flip-seconds", type=float, default=4.0)
+    parser.add_argument("--answer-seconds", type=float, default=2.0)
+    parser.add_argument("--think-scale", type=float, default=0.05)
+    parser.add_argument("--practice-ratio", type=float, default=0.7)
+    parser.add_argument("--decks-per-session", type=int, default=2)
+    parser.add_argument("--min-gain", type=float, default=0.1)
+    parser.add_argument("--slo-ms", type=float, default=None, help="p95 latency limit")
+    parser.add_argument("--csv", help="Write the curves to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="Per-endpoint breakdown")
+    args = parser.parse_args(argv)
+    steps_wanted = [int(n) for n in args.learners.split(",") if n.strip()]
+
+    with FakeAirtable(latency=args.latency, jitter=args.jitter) as fake:
+        fake.seed_vocabulary(args.words)
+        connect(fake)
+        from app import app
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        steps: List[StepResult] = []
+        print(f"{'learners':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'sessions':>10}")
+        try:
+            for learners in steps_wanted:
+                step = run_step(base_url, learners, args)
+                steps.append(step)
+                print_step(step)
+                if args.verbose:
+                    print_endpoints(step)
+        finally:
+            server.shutdown()
+        print(f"Fake Airtable served {fake.request_count} requests")
+
+    if args.csv:
+        write_csv(args.csv, steps)
+        print(f"Wrote {args.csv}")
+    saturated = find_saturation(steps, args.min_gain, args.slo_ms)
+    if saturated is None:
+        print("Throughput still scaling at the last step; try more learners.")
+    else:
+        real = saturated.learners / args.think_scale if args.think_scale else saturated.learners
+        print(
+            f"Saturation at {saturated.learners} simulated learners "
+            f"({saturated.rps:.1f} req/s, p95 {saturated.p(95):.1f} ms), "
+            f"about {real:.0f} real learners at unscaled think time"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
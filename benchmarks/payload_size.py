@@ -0,0 +1,147 @@
+"""Bytes on the wire for the Airtable reads behind a deck.
+
+Usage::
+
+    python -m benchmarks.payload_size [--words 2000] [--reviews 300]
+        [--save-baseline] [--compare] [--tolerance 0.1]
+
+The Airtable requests made by each case (a deck from :func:`fetch_flashcards`,
+including its due-card queries, and a card page from
+:func:`fetch_card_content`) are recorded against the fake Airtable and then
+replayed four ways: with and without their ``fields[]`` projection, and with
+and without gzip. "before" is the full record without compression, as the
+data-access layer used to request it; "after" is what it requests now.
+``--save-baseline`` writes ``benchmarks/payload_baseline.json``, and
+``--compare`` exits with status 1 if the "after" bytes of a case grew by more
+than ``--tolerance``.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from benchmarks.fake_airtable import FakeAirtable
+from benchmarks.run_benchmarks import connect
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "payload_baseline.json")
+VARIANTS = {
+    "before": (False, False),
+    "fields[]": (True, False),
+    "gzip": (False, True),
+    "after": (True, True),
+}
+
+
+def record_requests(fn: Callable[[], object]) -> List[Tuple[str, dict]]:
+    """Return the ``(url, params)`` of every GET that ``fn`` sends to Airtable."""
+    import airtable_data_access as data
+
+    sent: List[Tuple[str, dict]] = []
+    original = data.http.get
+
+    def get(url: str, **kwargs):
+        sent.append((url, dict(kwargs.get("params") or {})))
+        return original(url, **kwargs)
+
+    data.http.get = get
+    try:
+        fn()
+    finally:
+        del data.http.get
+    return sent
+
+
+def replay(sent: List[Tuple[str, dict]], project: bool, compress: bool) -> Dict[str, int]:
+    """Replay ``sent`` and return the bytes received and the decoded JSON size."""
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip" if compress else "identity"
+    sizes = {"requests": len(sent), "wire_bytes": 0, "json_bytes": 0}
+    for url, params in sent:
+        if not project:
+            params = {k: v for k, v in params.items() if k != "fields[]"}
+        resp = session.get(
+            url, headers={"Authorization": "Bearer bench"}, params=params, stream=True
+        )
+        resp.raise_for_status()
+        body = resp.raw.read(decode_content=False)
+        sizes["wire_bytes"] += len(body)
+        if resp.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        sizes["json_bytes"] += len(body)
+    return sizes
+
+
+def measure(words: int, reviews: int) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Return ``{case: {variant: sizes}}`` for every case and variant."""
+    import airtable_data_access as data
+
+    with FakeAirtable() as fake:
+        fake.seed_vocabulary(words)
+        fake.seed_reviews(reviews)
+        connect(fake)
+        cases = {
+            "deck": lambda: data.fetch_flashcards(
+                "bench", filler=data.get_random_frequencies(data.DECK_SIZE, words)
+            ),
+            "card": lambda: data.fetch_card_content("bench", 1),
+        }
+        results = {}
+        for name, fn in cases.items():
+            sent = record_requests(fn)
+            results[name] = {
+                variant: replay(sent, project, compress)
+                for variant, (project, compress) in VARIANTS.items()
+            }
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the payload size benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=300)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = measure(args.words, args.reviews)
+    print(f"{'case':<8}{'variant':<10}{'requests':>9}{'wire bytes':>12}{'json bytes':>12}")
+    for name, variants in results.items():
+        for variant, sizes in variants.items():
+            print(
+                f"{name:<8}{variant:<10}{sizes['requests']:>9}"
+                f"{sizes['wire_bytes']:>12}{sizes['json_bytes']:>12}"
+            )
+        ratio = variants["before"]["wire_bytes"] / max(1, variants["after"]["wire_bytes"])
+        print(f"{name:<8}{'':<10}{ratio:>32.1f}x smaller on the wire")
+
+    after = {name: variants["after"]["wire_bytes"] for name, variants in results.items()}
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        for name, size in after.items():
+            base = baseline.get(name)
+            if base is not None and size > base * (1 + args.tolerance):
+                print(f"REGRESSION {name}: {size} bytes > baseline {base}", file=sys.stderr)
+                status = 1
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(after, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
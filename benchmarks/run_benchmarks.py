@@ -0,0 +1,184 @@
+"""Latency and throughput benchmarks against the local Airtable stand-in.
+
+Usage::
+
+    python -m benchmarks.run_benchmarks [--latency 0.02] [--iterations 50]
+        [--concurrency 4] [--save-baseline] [--compare] [--tolerance 0.2]
+
+Each case is run ``--iterations`` times (after a short warm-up) by
+``--concurrency`` threads and reports p50/p95/p99 latency in milliseconds and
+requests per second. ``--save-baseline`` writes the results to
+``benchmarks/baseline.json``; ``--compare`` checks the run against that file and
+exits with status 1 if any case's p95 regressed by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fake_airtable import FakeAirtable
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+WARMUP = 3
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the nearest-rank ``pct`` percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_case(fn: Callable[[int], object], iterations: int, concurrency: int) -> Dict[str, float]:
+    """Call ``fn(i)`` ``iterations`` times and return latency statistics."""
+    for i in range(WARMUP):
+        fn(-1 - i)
+
+    def timed(i: int) -> float:
+        start = time.perf_counter()
+        fn(i)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "rps": iterations / elapsed,
+    }
+
+
+def connect(fake: FakeAirtable) -> None:
+    """Point the data-access layer at ``fake`` and disable rate limiting."""
+    os.environ["AIRTABLE_RATE_LIMIT"] = "off"
+    os.environ["AIRTABLE_API_KEY"] = "bench"
+    import airtable_data_access
+
+    airtable_data_access.AIRTABLE_URL = f"{fake.url}/{airtable_data_access.BASE_ID}/french_words"
+    airtable_data_access.SPACED_REP_URL = f"{fake.url}/{airtable_data_access.BASE_ID}/spaced_rep"
+
+
+def build_cases(words: int) -> Dict[str, Callable[[int], object]]:
+    """Return the benchmark cases keyed by name."""
+    import airtable_data_access as data
+    from app import app, review_cache
+
+    client = app.test_client()
+    date_str = time.strftime("%Y-%m-%d")
+
+    def freq(i: int) -> str:
+        return str(abs(i) % words + 1)
+
+    def page(i: int) -> None:
+        # A fresh user per call measures the cold path including state loads.
+        resp = client.get("/flashcards_airtable", headers={"X-User-Id": f"cold{i}"})
+        assert resp.status_code == 200, resp.status_code
+
+    def page_warm(i: int) -> None:
+        resp = client.get("/flashcards_airtable", headers={"X-User-Id": "warm"})
+        assert resp.status_code == 200, resp.status_code
+
+    def answers(i: int) -> None:
+        events = [
+            {"frequency": freq(i * 10 + k), "outcome": "practice" if k % 2 else "forget"}
+            for k in range(10)
+        ]
+        resp = client.post("/api/answers", json=events)
+        assert resp.status_code == 200, resp.status_code
+
+    def cold_page(i: int) -> None:
+        review_cache.invalidate("")
+        page(i)
+
+    return {
+        "fetch_flashcards": lambda i: data.fetch_flashcards("bench"),
+        "log_practice": lambda i: data.log_practice("bench", freq(i), date_str),
+        "log_forget": lambda i: data.log_forget("bench", freq(i), date_str),
+        "route_flashcards_airtable_cold": cold_page,
+        "route_flashcards_airtable_warm": page_warm,
+        "route_api_answers_batch10": answers,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return descriptions of cases whose p95 regressed beyond ``tolerance``."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = base["p95_ms"] * (1 + tolerance)
+        if stats["p95_ms"] > limit:
+            regressions.append(
+                f"{name}: p95 {stats['p95_ms']:.1f}ms > baseline {base['p95_ms']:.1f}ms"
+                f" (+{tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the benchmark suite."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake Airtable latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--only", action="append", help="Run only the named case(s)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    with FakeAirtable(latency=args.latency, jitter=args.jitter) as fake:
+        fake.seed_vocabulary(args.words)
+        fake.seed_reviews(args.reviews)
+        connect(fake)
+        cases = build_cases(args.words)
+        if args.only:
+            cases = {name: fn for name, fn in cases.items() if name in args.only}
+
+        results: Dict[str, dict] = {}
+        print(f"{'case':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+        for name, fn in cases.items():
+            stats = run_case(fn, args.iterations, args.concurrency)
+            results[name] = stats
+            print(
+                f"{name:<34}{stats['p50_ms']:9.1f}{stats['p95_ms']:9.1f}"
+                f"{stats['p99_ms']:9.1f}{stats['rps']:9.1f}"
+            )
+        print(f"Fake Airtable served {fake.request_count} requests")
+
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
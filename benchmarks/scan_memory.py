@@ -0,0 +1,99 @@
+"""Peak memory of a full-table scan, collected versus streamed.
+
+Usage::
+
+    python -m benchmarks.scan_memory [--sizes 1000,4000,16000]
+
+A fake Airtable with ``max(sizes)`` words runs in a subprocess (so its own
+allocations are not counted) and the first ``n`` words are scanned two ways:
+``list_records``, which collects every record before returning, and
+``iter_records``, which streams them one at a time. The peak traced by
+:mod:`tracemalloc` is printed for each. Only the streamed peak should stay
+flat as the table grows.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake(words: int) -> "tuple[subprocess.Popen, str]":
+    """Start the fake Airtable in a subprocess and return it with its URL."""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_airtable", "--port", str(port), "--words", str(words)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc, f"http://127.0.0.1:{port}/v0"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake Airtable did not start")
+
+
+def peak_kib(fn: Callable[[], int]) -> "tuple[int, float]":
+    """Run ``fn`` under tracemalloc; return its result and peak KiB."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the scan memory benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,4000,16000")
+    args = parser.parse_args(argv)
+    sizes = [int(n) for n in args.sizes.split(",")]
+
+    os.environ["AIRTABLE_RATE_LIMIT"] = "off"
+    import airtable_data_access as data
+    from airtable_formula import field_between
+
+    proc, base = start_fake(max(sizes))
+    try:
+        url = f"{base}/{data.BASE_ID}/french_words"
+        headers = {"Authorization": "Bearer bench"}
+        print(f"{'words':>8}{'collected KiB':>16}{'streamed KiB':>16}")
+        for n in sizes:
+            params = {"filterByFormula": field_between("Frequency", 1, n)}
+            scans: Dict[str, Callable[[], int]] = {
+                "collected": lambda: len(data.list_records(url, headers, params)),
+                "streamed": lambda: sum(1 for _ in data.iter_records(url, headers, params)),
+            }
+            peaks = {}
+            for name, scan in scans.items():
+                count, peaks[name] = peak_kib(scan)
+                if count != n:
+                    print(f"{name} scan returned {count} records, expected {n}", file=sys.stderr)
+                    return 1
+            print(f"{n:>8}{peaks['collected']:>16.0f}{peaks['streamed']:>16.0f}")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+"""Time deck selection by the adaptive scheduler for a large collection.
+
+Usage::
+
+    python -m benchmarks.scheduler_speed [--cards 100000] [--repeat 50]
+
+Builds a :class:`scheduler.CardModel` of ``--cards`` cards with random
+stability and review dates and reports the median and worst time of
+choosing a deck's due cards, with NumPy (if installed) and with the pure
+Python fallback. The ladder's :class:`review_state.DueQueue` build for the
+same cards is timed for comparison.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import scheduler
+from airtable_data_access import DECK_SIZE
+from review_state import DueQueue
+
+
+def timings(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Return the median and maximum milliseconds of ``repeat`` calls to ``fn``."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "max_ms": max(samples)}
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the scheduler benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    today = date.today()
+    cards = [
+        (freq, rng.uniform(1, 200), rng.uniform(1.3, 3.0), today.toordinal() - rng.randint(0, 365))
+        for freq in range(1, args.cards + 1)
+    ]
+    rows = {
+        str(freq): (rng.randint(1, 5), date.fromordinal(day).isoformat())
+        for freq, _, _, day in cards
+    }
+
+    results = {}
+    backends = [("numpy", scheduler.numpy)] if scheduler.numpy is not None else []
+    backends.append(("python", None))
+    for name, module in backends:
+        saved, scheduler.numpy = scheduler.numpy, module
+        try:
+            model = scheduler.CardModel(cards)
+            results[f"adaptive select ({name})"] = timings(
+                lambda: model.select(today.toordinal(), DECK_SIZE), args.repeat
+            )
+        finally:
+            scheduler.numpy = saved
+    results["ladder queue build"] = timings(lambda: DueQueue(today, rows), max(args.repeat // 10, 1))
+
+    print(f"Choosing due cards among {args.cards} cards (milliseconds):")
+    for name, stats in results.items():
+        print(f"  {name:<28} median {stats['median_ms']:8.2f}  max {stats['max_ms']:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
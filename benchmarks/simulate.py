@@ -0,0 +1,555 @@
+"""Offline simulation of the spaced repetition schedulers.
+
+Usage::
+
+    python -m benchmarks.simulate [--scheduler both] [--learners 1000]
+        [--days 365] [--vocabulary 3000] [--study-rate 0.8] [--seed 0]
+        [--sample 20] [--json results.json]
+    python -m benchmarks.simulate --replay answers.jsonl [--scheduler both]
+
+The synthetic mode runs simulated learners day by day on a simulated clock.
+Each study day a learner gets a deck: the due cards chosen by the scheduler
+plus new words (in frequency order) up to ``DECK_SIZE``, as in
+:func:`airtable_data_access.fetch_flashcards`. Every answer is drawn from a
+ground-truth memory model that is deliberately different from the adaptive
+scheduler's own (exponential forgetting with a half-life that grows most
+after reviews of nearly forgotten words), and the scheduler state moves as
+:func:`airtable_data_access.next_level` and :func:`scheduler.review` would
+move it. All learners are advanced together as NumPy arrays: the ladder and
+adaptive selection rules of :mod:`review_state` are re-expressed over the
+whole population, and ``tests/test_simulate.py`` runs :func:`study_day`
+alongside the real review state to check that both choose the same cards and
+end up with the same rows. That runs about 50 (ladder) to 150 (adaptive)
+learner-years per second, so the default 1000 learners take 10-20 seconds.
+
+Reported per scheduler: simulation throughput, reviews per study day, the
+share of answers recalled, the learners' true retention of the words they
+have studied (at the end and averaged over monthly checkpoints), and how
+many words they know at 90% or better. Selection cost is measured on the
+real code paths: the final state of ``--sample`` learners is loaded into
+:class:`review_state.UserReviewState` / :class:`review_state.AdaptiveReviewState`
+and a deck is built with :func:`airtable_data_access.fetch_flashcards` over a
+synthetic :class:`word_store.WordStore`.
+
+``--replay`` instead feeds a JSONL log of answers (objects with ``user``,
+``frequency``, ``outcome`` and an ISO ``timestamp``, as posted to
+``/api/answers``) through the real review state, in time order per user. It
+reports the recall rate, recall by level for the ladder, how well the
+adaptive model's predicted recall matches the answers (log loss and Brier
+score), and the cost of choosing due cards at the start of each user's day.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:  # Needed for the synthetic mode only.
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+import scheduler
+from airtable_data_access import DECK_SIZE, LEVEL_MIN_AGE_DAYS, MAX_LEVEL, fetch_flashcards
+from benchmarks.flashcard_memory import synthetic_records
+from review_state import AdaptiveReviewState, UserReviewState
+from word_store import WordStore
+
+SCHEDULERS = scheduler.SCHEDULERS
+# Day 0 of the simulated clock.
+EPOCH = date(2024, 1, 1).toordinal()
+# Due cards per level for the ladder, as in ``UserReviewState.due``.
+LADDER_DUE_PER_LEVEL = 5
+CHECKPOINT_DAYS = 30
+KNOWN_RECALL = 0.9
+
+# Ground-truth learner model. Half-lives are in days; each learner has their
+# own first half-life and growth, drawn log-normally around these.
+FIRST_HALFLIFE = 2.0
+HALFLIFE_SIGMA = 0.5
+# A word the learner already knew when it was introduced starts this many
+# times stronger.
+KNOWN_BONUS = 8.0
+# Half-life growth after recalling a word that was nearly forgotten; recalls
+# of fresh words add proportionally less.
+GROWTH = 5.0
+GROWTH_SIGMA = 0.3
+LAPSE_HALFLIFE = 0.5
+MIN_HALFLIFE = 0.25
+# Chance that a word of frequency rank r is already known: PRIOR_KNOWN at
+# rank 1, decaying with PRIOR_SCALE.
+PRIOR_KNOWN = 0.6
+PRIOR_SCALE = 300.0
+
+
+def next_levels(levels, practiced):
+    """Vectorised :func:`airtable_data_access.next_level` (level 0 is untracked)."""
+    return numpy.where(
+        practiced, numpy.minimum(levels + 1, MAX_LEVEL), numpy.maximum(levels - 1, 1)
+    )
+
+
+def round3(values):
+    """Vectorised ``round(value, 3)``.
+
+    ``numpy.round`` rounds ``value * 1000``, which lands on exactly ``.5``
+    for some values that :func:`round` (correctly rounded) takes down, so
+    those few are rounded one by one.
+    """
+    scaled = values * 1000
+    rounded = numpy.round(scaled) / 1000
+    halves = numpy.flatnonzero(scaled - numpy.floor(scaled) == 0.5)
+    rounded[halves] = [round(float(value), 3) for value in values[halves]]
+    return rounded
+
+
+def review_arrays(stability, ease, elapsed, practiced, new):
+    """Vectorised :func:`scheduler.review`; returns ``(stability, ease)`` arrays."""
+    recall = (1 + scheduler.FACTOR * numpy.maximum(elapsed, 0) / stability) ** scheduler.DECAY
+    spacing = numpy.minimum(
+        (1 - recall) / (1 - scheduler.TARGET_RETENTION), scheduler.MAX_SPACING
+    )
+    grown = stability * (1 + (ease - 1) * spacing)
+    lapsed = numpy.maximum(stability * scheduler.LAPSE_STABILITY, scheduler.MIN_STABILITY)
+    first = numpy.where(
+        practiced, scheduler.FIRST_STABILITY["practice"], scheduler.FIRST_STABILITY["forget"]
+    )
+    stability = numpy.where(new, first, numpy.where(practiced, grown, lapsed))
+    ease = numpy.where(
+        new,
+        scheduler.DEFAULT_EASE,
+        numpy.where(
+            practiced,
+            numpy.minimum(ease + scheduler.EASE_BONUS, scheduler.MAX_EASE),
+            numpy.maximum(ease - scheduler.EASE_PENALTY, scheduler.MIN_EASE),
+        ),
+    )
+    return round3(stability), round3(ease)
+
+
+class Population:
+    """Scheduler state and true memory of ``learners`` learners over ``vocabulary`` words.
+
+    Word ``c`` is frequency ``c + 1``. Words are introduced in frequency
+    order, so each learner tracks exactly the first ``introduced`` words.
+    """
+
+    def __init__(self, learners: int, vocabulary: int, rng) -> None:
+        self.learners = learners
+        self.vocabulary = vocabulary
+        shape = (learners, vocabulary)
+        self.introduced = numpy.zeros(learners, dtype=numpy.int64)
+        self.level = numpy.zeros(shape, dtype=numpy.int8)
+        self.last = numpy.zeros(shape, dtype=numpy.int32)
+        self.stability = numpy.ones(shape)
+        self.ease = numpy.full(shape, scheduler.DEFAULT_EASE)
+        self.halflife = numpy.ones(shape)
+        self.first_halflife = FIRST_HALFLIFE * numpy.exp(rng.normal(0, HALFLIFE_SIGMA, learners))
+        self.growth = GROWTH * numpy.exp(rng.normal(0, GROWTH_SIGMA, learners))
+        self.prior = PRIOR_KNOWN * numpy.exp(-numpy.arange(vocabulary) / PRIOR_SCALE)
+
+    def width(self) -> int:
+        return int(self.introduced.max()) if self.learners else 0
+
+    def true_recall(self, today: int, width: int):
+        """Return true recall probabilities of the first ``width`` words and their mask."""
+        tracked = numpy.arange(width) < self.introduced[:, None]
+        elapsed = today - self.last[:, :width]
+        return numpy.exp2(-elapsed / self.halflife[:, :width]), tracked
+
+
+def _take(key, count: int, empty: float):
+    """Return the column indices of the ``count`` smallest keys per row and their validity.
+
+    Keys tied at the cut-off go to the lowest columns, as in
+    :meth:`scheduler.CardModel.select`.
+    """
+    width = key.shape[1]
+    if width > count:
+        cutoff = numpy.partition(key, count - 1, axis=1)[:, count - 1 : count]
+        below = key < cutoff
+        tied = key == cutoff
+        room = count - below.sum(axis=1, keepdims=True)
+        take = below | (tied & (numpy.cumsum(tied, axis=1) <= room))
+        idx = numpy.argsort(~take, axis=1, kind="stable")[:, :count]
+    else:
+        idx = numpy.broadcast_to(numpy.arange(width), key.shape)
+    return idx, numpy.take_along_axis(key, idx, axis=1) < empty
+
+
+def ladder_due(pop: Population, today: int, width: int):
+    """Due cards per learner under the ladder, as ``(columns, valid)`` arrays.
+
+    Mirrors :class:`review_state.DueQueue`: a card at a level is due once its
+    date is more than the level's minimum age before today, and the oldest
+    cards (then the lowest frequencies) come first, ``LADDER_DUE_PER_LEVEL``
+    per level.
+    """
+    level = pop.level[:, :width]
+    last = pop.last[:, :width]
+    # Sort keys encode (date, column), so partitioning the keys themselves is
+    # enough and the column is recovered from the key.
+    dtype = numpy.int32 if (today + 1) * pop.vocabulary < 2**31 - 1 else numpy.int64
+    order = last.astype(dtype) * pop.vocabulary + numpy.arange(width, dtype=dtype)
+    empty = numpy.iinfo(dtype).max
+    # Latest date at which a card of each level (0 is untracked) is due.
+    cutoffs = numpy.full(MAX_LEVEL + 1, -1, dtype=numpy.int64)
+    for lvl, age in LEVEL_MIN_AGE_DAYS.items():
+        cutoffs[lvl] = today if age is None else today - age - 1
+    order[last > cutoffs[level]] = empty
+    columns, valid = [], []
+    for lvl in LEVEL_MIN_AGE_DAYS:
+        key = numpy.where(level == lvl, order, empty)
+        if width > LADDER_DUE_PER_LEVEL:
+            key = numpy.partition(key, LADDER_DUE_PER_LEVEL - 1, axis=1)[:, :LADDER_DUE_PER_LEVEL]
+        columns.append(key % pop.vocabulary)
+        valid.append(key != empty)
+    return numpy.concatenate(columns, axis=1), numpy.concatenate(valid, axis=1)
+
+
+def adaptive_due(pop: Population, today: int, width: int):
+    """Due cards per learner under the adaptive scheduler, as ``(columns, valid)``.
+
+    Mirrors :meth:`scheduler.CardModel.select` with ``DECK_SIZE`` cards.
+    """
+    elapsed = numpy.maximum(today - pop.last[:, :width], 0)
+    recall = (1 + scheduler.FACTOR * elapsed / pop.stability[:, :width]) ** scheduler.DECAY
+    due = (pop.level[:, :width] > 0) & (recall < scheduler.TARGET_RETENTION)
+    return _take(numpy.where(due, recall, numpy.inf), DECK_SIZE, numpy.inf)
+
+
+SELECT = {"ladder": ladder_due, "adaptive": adaptive_due}
+STATE = {"ladder": UserReviewState, "adaptive": AdaptiveReviewState}
+
+
+def answer(pop: Population, name: str, rows, cols, today: int, rng, new: bool):
+    """Answer the cards at ``(rows, cols)`` on ``today``; return the recalled mask."""
+    if new:
+        practiced = rng.random(len(rows)) < pop.prior[cols]
+        pop.halflife[rows, cols] = pop.first_halflife[rows] * numpy.where(
+            practiced, KNOWN_BONUS, 1.0
+        )
+        elapsed = numpy.zeros(len(rows))
+    else:
+        elapsed = today - pop.last[rows, cols]
+        halflife = pop.halflife[rows, cols]
+        recall = numpy.exp2(-elapsed / halflife)
+        practiced = rng.random(len(rows)) < recall
+        pop.halflife[rows, cols] = numpy.where(
+            practiced,
+            halflife * (1 + (pop.growth[rows] - 1) * (1 - recall)),
+            numpy.maximum(halflife * LAPSE_HALFLIFE, MIN_HALFLIFE),
+        )
+    if name == "adaptive":
+        pop.stability[rows, cols], pop.ease[rows, cols] = review_arrays(
+            pop.stability[rows, cols], pop.ease[rows, cols], elapsed, practiced, new
+        )
+    pop.level[rows, cols] = next_levels(pop.level[rows, cols], practiced)
+    pop.last[rows, cols] = today
+    return practiced
+
+
+def learner_cards(pop: Population, name: str, learner: int) -> Dict[str, Tuple]:
+    """Return one learner's rows as :func:`fetch_review_state` would."""
+    cards = {}
+    for col in range(int(pop.introduced[learner])):
+        row = (
+            int(pop.level[learner, col]),
+            date.fromordinal(EPOCH + int(pop.last[learner, col])).isoformat(),
+        )
+        if name == "adaptive":
+            row += (float(pop.stability[learner, col]), float(pop.ease[learner, col]))
+        cards[str(col + 1)] = row
+    return cards
+
+
+def selection_cost(pop: Population, name: str, today: int, sample: int) -> Dict[str, float]:
+    """Time choosing due cards and building a deck with the real code for ``sample`` learners."""
+    store = WordStore.from_records(synthetic_records(pop.vocabulary))
+    day = date.fromordinal(EPOCH + today)
+    cold, warm, deck = [], [], []
+    for learner in range(min(sample, pop.learners)):
+        state = STATE[name](learner_cards(pop, name, learner), 0)
+        start = time.perf_counter()
+        pairs = state.due(day)
+        cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        pairs = state.due(day)
+        warm.append(time.perf_counter() - start)
+        first_new = int(pop.introduced[learner]) + 1
+        start = time.perf_counter()
+        fetch_flashcards(
+            "sim",
+            spaced_pairs=pairs,
+            filler=list(range(first_new, first_new + DECK_SIZE)),
+            store=store,
+        )
+        deck.append(time.perf_counter() - start)
+    if not cold:
+        return {}
+    return {
+        "due_first_ms": statistics.median(cold) * 1000,
+        "due_first_max_ms": max(cold) * 1000,
+        "due_ms": statistics.median(warm) * 1000,
+        "deck_ms": statistics.median(deck) * 1000,
+    }
+
+
+class Answers(NamedTuple):
+    """Cards answered in one batch: learner rows, word columns and recalled mask."""
+
+    rows: object
+    cols: object
+    practiced: object
+    seconds: float = 0.0
+
+
+def study_day(pop: Population, name: str, today: int, studying, rng) -> Tuple[Answers, Answers]:
+    """Run day ``today`` for the learners in the ``studying`` mask.
+
+    Each learner answers their due cards, then new words up to ``DECK_SIZE``.
+    Returns both batches; ``seconds`` of the first is the time spent choosing
+    the due cards.
+    """
+    width = pop.width()
+    due_count = numpy.zeros(pop.learners, dtype=numpy.int64)
+    empty = numpy.zeros(0, dtype=numpy.int64)
+    due = Answers(empty, empty, numpy.zeros(0, dtype=bool))
+    if width:
+        began = time.perf_counter()
+        cols, valid = SELECT[name](pop, today, width)
+        seconds = time.perf_counter() - began
+        valid &= studying[:, None]
+        rows, slots = numpy.nonzero(valid)
+        cols = cols[rows, slots]
+        due = Answers(rows, cols, answer(pop, name, rows, cols, today, rng, new=False), seconds)
+        due_count = valid.sum(axis=1)
+
+    fresh = numpy.where(studying, DECK_SIZE - due_count, 0)
+    fresh = numpy.minimum(fresh, pop.vocabulary - pop.introduced)
+    rows = numpy.repeat(numpy.arange(pop.learners), fresh)
+    offsets = numpy.cumsum(fresh) - fresh
+    cols = pop.introduced[rows] + numpy.arange(len(rows)) - offsets[rows]
+    practiced = answer(pop, name, rows, cols, today, rng, new=True)
+    pop.introduced += fresh
+    return due, Answers(rows, cols, practiced)
+
+
+def simulate(
+    name: str,
+    learners: int,
+    days: int,
+    vocabulary: int,
+    study_rate: float = 0.8,
+    seed: int = 0,
+    sample: int = 20,
+) -> Dict[str, float]:
+    """Run ``learners`` learners for ``days`` days under scheduler ``name``; return metrics."""
+    if numpy is None:
+        raise RuntimeError("the synthetic simulation needs NumPy")
+    rng = numpy.random.default_rng(seed)
+    pop = Population(learners, vocabulary, rng)
+    reviews = recalled = decks = 0
+    select_seconds = 0.0
+    retention: List[float] = []
+
+    start = time.perf_counter()
+    today = 0
+    for today in range(1, days + 1):
+        studying = rng.random(learners) < study_rate
+        due, fresh = study_day(pop, name, today, studying, rng)
+        select_seconds += due.seconds
+        for batch in (due, fresh):
+            reviews += len(batch.rows)
+            recalled += int(batch.practiced.sum())
+        decks += int(studying.sum())
+
+        if today % CHECKPOINT_DAYS == 0 or today == days:
+            recall, tracked = pop.true_recall(today, pop.width())
+            retention.append(float(recall[tracked].mean()) if tracked.any() else 0.0)
+    elapsed = time.perf_counter() - start
+
+    recall, tracked = pop.true_recall(today, pop.width())
+    results = {
+        "learner_years_per_second": learners * days / 365 / elapsed if elapsed else 0.0,
+        "seconds": elapsed,
+        "reviews_per_study_day": reviews / decks if decks else 0.0,
+        "recalled_pct": 100 * recalled / reviews if reviews else 0.0,
+        "retention_pct": 100 * retention[-1] if retention else 0.0,
+        "mean_retention_pct": 100 * statistics.fmean(retention) if retention else 0.0,
+        "words_studied": float(pop.introduced.mean()),
+        "words_known": float(((recall >= KNOWN_RECALL) & tracked).sum(axis=1).mean()),
+        "select_us_per_deck": select_seconds / decks * 1e6 if decks else 0.0,
+    }
+    results.update(selection_cost(pop, name, today, sample))
+    return results
+
+
+def read_events(path: str) -> List[dict]:
+    """Return the answers in the JSONL file at ``path`` in time order."""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                events.append(json.loads(line))
+    events.sort(key=lambda e: str(e.get("timestamp", "")))
+    return events
+
+
+def replay(events: Iterable[dict], name: str) -> Dict[str, object]:
+    """Feed ``events`` through the real review state of scheduler ``name``; return metrics."""
+    states: Dict[str, UserReviewState] = {}
+    days: Dict[str, str] = {}
+    by_level: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    costs: List[float] = []
+    count = recalled = 0
+    predictions: List[Tuple[float, bool]] = []
+    for event in events:
+        outcome = event.get("outcome")
+        freq = str(event.get("frequency") or "")
+        date_str = str(event.get("timestamp", ""))[:10]
+        if outcome not in ("practice", "forget") or not freq or not scheduler.day_number(date_str):
+            continue
+        user = str(event.get("user", ""))
+        state = states.get(user)
+        if state is None:
+            state = states[user] = STATE[name]({}, 0)
+        if days.get(user) != date_str:
+            # A new study day: the user's first deck chooses its due cards.
+            days[user] = date_str
+            start = time.perf_counter()
+            state.due(date.fromisoformat(date_str))
+            costs.append(time.perf_counter() - start)
+
+        hit = outcome == "practice"
+        row = state.cards.get(freq)
+        if row is not None:
+            level, old_date, stability, ease = (tuple(row) + (None, None))[:4]
+            by_level[level][0] += 1
+            by_level[level][1] += hit
+            if name == "adaptive":
+                memory = scheduler.card_memory(level, stability, ease)
+                elapsed = scheduler.elapsed_days(old_date, date_str)
+                predictions.append((scheduler.recall(memory[0], elapsed), hit))
+        count += 1
+        recalled += hit
+        state.apply(freq, outcome, date_str)
+
+    results: Dict[str, object] = {
+        "events": count,
+        "users": len(states),
+        "recalled_pct": 100 * recalled / count if count else 0.0,
+        "recalled_pct_by_level": {
+            level: 100 * hits / total for level, (total, hits) in sorted(by_level.items())
+        },
+        "select_ms": statistics.median(costs) * 1000 if costs else 0.0,
+        "select_max_ms": max(costs) * 1000 if costs else 0.0,
+    }
+    if predictions:
+        clipped = [(min(max(p, 1e-6), 1 - 1e-6), hit) for p, hit in predictions]
+        results["predicted_recall_pct"] = 100 * statistics.fmean(p for p, _ in clipped)
+        results["log_loss"] = statistics.fmean(
+            -math.log(p if hit else 1 - p) for p, hit in clipped
+        )
+        results["brier"] = statistics.fmean((p - hit) ** 2 for p, hit in clipped)
+    return results
+
+
+LABELS = [
+    ("learner_years_per_second", "learner-years per second", "{:.0f}"),
+    ("reviews_per_study_day", "cards per study day", "{:.1f}"),
+    ("recalled_pct", "answers recalled (%)", "{:.1f}"),
+    ("retention_pct", "retention at end (%)", "{:.1f}"),
+    ("mean_retention_pct", "mean retention (%)", "{:.1f}"),
+    ("words_studied", "words studied", "{:.0f}"),
+    ("words_known", "words known at 90%", "{:.0f}"),
+    ("select_us_per_deck", "simulated selection (us/deck)", "{:.1f}"),
+    ("due_first_ms", "due cards, first deck (ms)", "{:.2f}"),
+    ("due_first_max_ms", "due cards, first deck max (ms)", "{:.2f}"),
+    ("due_ms", "due cards, later decks (ms)", "{:.3f}"),
+    ("deck_ms", "fetch_flashcards from store (ms)", "{:.3f}"),
+    ("events", "answers replayed", "{}"),
+    ("users", "users", "{}"),
+    ("predicted_recall_pct", "predicted recall (%)", "{:.1f}"),
+    ("log_loss", "log loss", "{:.3f}"),
+    ("brier", "Brier score", "{:.3f}"),
+    ("select_ms", "due cards per user-day (ms)", "{:.3f}"),
+    ("select_max_ms", "due cards per user-day max (ms)", "{:.3f}"),
+]
+
+
+def print_table(results: Dict[str, Dict[str, object]]) -> None:
+    names = list(results)
+    print(f"{'':34}" + "".join(f"{name:>12}" for name in names))
+    for key, label, fmt in LABELS:
+        if not any(key in r for r in results.values()):
+            continue
+        cells = [fmt.format(results[n][key]) if key in results[n] else "-" for n in names]
+        print(f"{label:34}" + "".join(f"{cell:>12}" for cell in cells))
+    levels = sorted({lvl for r in results.values() for lvl in r.get("recalled_pct_by_level", {})})
+    for level in levels:
+        cells = [
+            f"{results[n]['recalled_pct_by_level'][level]:.1f}"
+            if level in results[n].get("recalled_pct_by_level", {})
+            else "-"
+            for n in names
+        ]
+        print(f"{f'recalled at level {level} (%)':34}" + "".join(f"{c:>12}" for c in cells))
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for the scheduler simulator."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scheduler", choices=SCHEDULERS + ("both",), default="both")
+    parser.add_argument("--learners", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--vocabulary", type=int, default=3000)
+    parser.add_argument("--study-rate", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample", type=int, default=20, help="learners timed on the real code")
+    parser.add_argument("--replay", help="JSONL answer log to replay instead of simulating")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    names = SCHEDULERS if args.scheduler == "both" else (args.scheduler,)
+    results: Dict[str, Dict[str, object]] = {}
+    if args.replay:
+        events = read_events(args.replay)
+        for name in names:
+            results[name] = replay(events, name)
+        print(f"Replayed {args.replay}")
+    else:
+        if numpy is None:
+            print("The synthetic simulation needs NumPy (pip install numpy).", file=sys.stderr)
+            return 2
+        for name in names:
+            results[name] = simulate(
+                name,
+                args.learners,
+                args.days,
+                args.vocabulary,
+                args.study_rate,
+                args.seed,
+                args.sample,
+            )
+        print(
+            f"Simulated {args.learners} learners x {args.days} days, "
+            f"{args.vocabulary} words (seed {args.seed})"
+        )
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""Cache of rendered flashcard HTML fragments.
+
+A card's markup only depends on its word content and knowledge level, both of
+which change rarely compared to how often decks are served. Fragments are
+rendered once from ``templates/_flashcard.html`` and reused, so assembling a
+deck page is a join of cached strings rather than a full template render.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from jinja2 import Template
+from markupsafe import Markup
+
+from airtable_data_access import Flashcard
+
+FRAGMENT_TEMPLATE = "_flashcard.html"
+
+LEVEL_COLORS = {
+    "1": "#FDEDEC",
+    "2": "#FDEBD0",
+    "3": "#FCF3CF",
+    "4": "#E9F7EF",
+    "5": "#E8F8F5",
+}
+DEFAULT_LEVEL = "1"
+
+logger = logging.getLogger(__name__)
+
+
+def fragment_key(card: Flashcard) -> Tuple[str | None, str, str]:
+    """Return the cache key ``(frequency, level, content hash)`` for ``card``."""
+    return (card.frequency, card.level or DEFAULT_LEVEL, card.content_hash())
+
+
+class FragmentCache:
+    """Thread-safe LRU cache of rendered card fragments."""
+
+    def __init__(self, template: Template, max_size: int = 4096) -> None:
+        self.template = template
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[tuple, Markup]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def render(self, card: Flashcard) -> Markup:
+        """Return the HTML fragment for ``card``, rendering it on a miss."""
+        key = fragment_key(card)
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        lvl = key[1]
+        fragment = Markup(
+            self.template.render(
+                card=card,
+                lvl=lvl,
+                color=LEVEL_COLORS.get(lvl, LEVEL_COLORS[DEFAULT_LEVEL]),
+            )
+        )
+        with self._lock:
+            self._fragments[key] = fragment
+            if len(self._fragments) > self.max_size:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def render_deck(self, cards: List[Flashcard]) -> List[Markup]:
+        """Return fragments for ``cards`` in order."""
+        return [self.render(card) for card in cards]
+
+    def clear(self) -> None:
+        """Drop all cached fragments, e.g. after the word list is re-synced."""
+        with self._lock:
+            self._fragments.clear()
@@ -0,0 +1,222 @@
+"""A compact, memory-mappable columnar file format.
+
+Exports of the Airtable tables are written as one file per table holding a
+fixed number of rows and a handful of named columns. Integer columns are
+stored as little-endian ``int64`` arrays and text columns as a UTF-8 blob plus
+an ``int64`` offsets array and a validity byte per row, so ``None`` survives a
+round trip. Every section is 8-byte aligned.
+
+:class:`ColumnarFile` maps a file read-only and exposes its columns as
+sequences over the mapping: integer columns are ``memoryview`` casts (zero
+copy, binary-searchable with :mod:`bisect`) and text values are decoded only
+when indexed. Pages of the file are loaded by the OS on first access and
+shared between processes mapping the same file.
+
+Layout::
+
+    header    MAGIC, version, column count, row count
+    directory one entry per column: name, kind, and offsets of its sections
+    sections  values (and, for text, offsets and validity) of each column
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"FLCF"
+VERSION = 1
+INT64 = "int64"
+TEXT = "text"
+
+_HEADER = struct.Struct("<4sHHQ")
+# name, kind, values offset/length, text offsets offset, validity offset
+_ENTRY = struct.Struct("<32sB7xQQQQ")
+_KINDS = {INT64: 1, TEXT: 2}
+_KIND_NAMES = {code: name for name, code in _KINDS.items()}
+_ALIGN = 8
+
+
+class ColumnarFormatError(ValueError):
+    """Raised for files that are not columnar files of a supported version."""
+
+
+def _pad(out: bytearray) -> None:
+    out.extend(b"\0" * (-len(out) % _ALIGN))
+
+
+def _int64s(values: Iterable[int]) -> bytes:
+    data = array("q", values)
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts only
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_columns(path: str, columns: Dict[str, Tuple[str, Sequence]]) -> int:
+    """Write ``columns`` (``{name: (kind, values)}``) to ``path``; return the row count.
+
+    All columns must have the same length. The file is written to a temporary
+    name and renamed into place, so readers never see a partial file.
+    """
+    lengths = {len(values) for _, values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("columns have different lengths")
+    rows = lengths.pop() if lengths else 0
+
+    body = bytearray()
+    start = _HEADER.size + _ENTRY.size * len(columns)
+    start += -start % _ALIGN
+    entries = []
+    for name, (kind, values) in columns.items():
+        if kind not in _KINDS or len(name.encode("utf-8")) > 32:
+            raise ValueError(f"cannot store column {name!r} of kind {kind!r}")
+        offsets_at = valid_at = 0
+        if kind == INT64:
+            data = _int64s(values)
+        else:
+            encoded = [b"" if v is None else v.encode("utf-8") for v in values]
+            ends = [0]
+            for item in encoded:
+                ends.append(ends[-1] + len(item))
+            offsets_at = start + len(body)
+            body += _int64s(ends)
+            _pad(body)
+            valid_at = start + len(body)
+            body += bytes(v is not None for v in values)
+            _pad(body)
+            data = b"".join(encoded)
+        values_at = start + len(body)
+        body += data
+        _pad(body)
+        entries.append(
+            _ENTRY.pack(
+                name.encode("utf-8"), _KINDS[kind], values_at, len(data), offsets_at, valid_at
+            )
+        )
+
+    head = bytearray(_HEADER.pack(MAGIC, VERSION, len(columns), rows))
+    for entry in entries:
+        head += entry
+    _pad(head)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(head)
+        f.write(body)
+    os.replace(tmp, path)
+    return rows
+
+
+class TextColumn(Sequence):
+    """Read-only text column backed by the mapped file."""
+
+    def __init__(self, data: memoryview, offsets: memoryview, valid: memoryview) -> None:
+        self._data = data
+        self._offsets = offsets
+        self._valid = valid
+
+    def __len__(self) -> int:
+        return len(self._valid)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if not self._valid[index]:
+            return None
+        if index < 0:
+            index += len(self._valid)
+        return str(self._data[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return (self[i] for i in range(len(self)))
+
+    def release(self) -> None:
+        for view in (self._data, self._offsets, self._valid):
+            view.release()
+
+
+class ColumnarFile:
+    """Read-only, memory-mapped view of a file written by :func:`write_columns`."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._columns: Dict[str, Sequence] = {}
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ColumnarFormatError(f"{path} is too short")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        try:
+            magic, version, count, self.rows = _HEADER.unpack_from(view)
+            if magic != MAGIC:
+                raise ColumnarFormatError(f"{path} is not a columnar file")
+            if version != VERSION:
+                raise ColumnarFormatError(f"{path} has unsupported version {version}")
+            for i in range(count):
+                name, code, values_at, length, offsets_at, valid_at = _ENTRY.unpack_from(
+                    view, _HEADER.size + i * _ENTRY.size
+                )
+                name = name.rstrip(b"\0").decode("utf-8")
+                if values_at + length > size or max(offsets_at, valid_at) > size:
+                    raise ColumnarFormatError(f"{path}: column {name!r} is truncated")
+                values = view[values_at : values_at + length]
+                if _KIND_NAMES.get(code) == INT64:
+                    self._columns[name] = values.cast("q")
+                elif _KIND_NAMES.get(code) == TEXT:
+                    self._columns[name] = TextColumn(
+                        values,
+                        view[offsets_at : offsets_at + 8 * (self.rows + 1)].cast("q"),
+                        view[valid_at : valid_at + self.rows],
+                    )
+                else:
+                    raise ColumnarFormatError(f"{path}: column {name!r} has unknown kind")
+        except (struct.error, TypeError) as exc:
+            view.release()
+            self._discard()
+            raise ColumnarFormatError(f"{path} is corrupt") from exc
+        except ColumnarFormatError:
+            view.release()
+            self._discard()
+            raise
+        view.release()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._columns
+
+    def __getitem__(self, name: str) -> Sequence:
+        return self._columns[name]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._columns)
+
+    def preload(self) -> None:
+        """Read the whole mapping into the page cache so lookups do not fault."""
+        if hasattr(self._mmap, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+            self._mmap.madvise(mmap.MADV_WILLNEED)
+        for pos in range(0, len(self._mmap), mmap.PAGESIZE):
+            self._mmap[pos]
+
+    def close(self) -> None:
+        """Release the columns and unmap the file."""
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._mmap.close()
+
+    def _discard(self) -> None:
+        # Views created before a format error may still be alive; the mapping
+        # is then unmapped when they are garbage collected.
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
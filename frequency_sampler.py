@@ -0,0 +1,164 @@
+"""Weighted sampling of filler words over the whole vocabulary.
+
+Decks are topped up with words the learner is not reviewing yet. Words are
+identified by their frequency rank (1 is the most common word), and common
+words should turn up more often than rare ones, so rank ``r`` is drawn with
+weight proportional to ``1 / r ** exponent``.
+
+:class:`FrequencySampler` keeps the cumulative integer weights of all ranks
+in one array that is never modified after construction. Excluded ranks are
+not removed from it: a draw is taken from the weight that is left and
+shifted past the excluded ranks below it. The table of those shifts is built
+with one ``O(1)`` lookup per excluded rank, so excluding ``k`` tracked words
+costs ``O(k)`` per call (after sorting them), each draw is a few binary
+searches, and no draw is ever rejected and retried. Only the ``n``
+cumulative weights are stored; the population itself is never built.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_right, insort
+from itertools import accumulate
+from typing import Callable, Iterable, List, Optional
+
+# Weight of rank 1; rank r gets round(WEIGHT_SCALE / r ** exponent), at least 1.
+WEIGHT_SCALE = 1 << 32
+DEFAULT_EXPONENT = 1.0
+# How long a vocabulary size is trusted before it is looked up again.
+DEFAULT_TTL_SECONDS = 3600
+
+
+class FrequencySampler:
+    """Sample distinct frequency ranks ``1..size`` favouring low ranks.
+
+    Sampling never mutates the sampler, so one instance can be shared by
+    concurrent requests without a lock.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        exponent: float = DEFAULT_EXPONENT,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.size = size
+        self.exponent = exponent
+        self.rng = rng or random.Random()
+        # _cumulative[r] is the total weight of ranks 1..r.
+        self._cumulative = list(
+            accumulate(
+                (max(1, round(WEIGHT_SCALE / rank**exponent)) for rank in range(1, size + 1)),
+                initial=0,
+            )
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _weight(self, rank: int) -> int:
+        return self._cumulative[rank] - self._cumulative[rank - 1]
+
+    def sample(self, count: int, exclude: Iterable[int] = ()) -> List[int]:
+        """Return up to ``count`` distinct ranks, none of them in ``exclude``.
+
+        Fewer than ``count`` ranks are returned only when the vocabulary has
+        fewer words left after exclusions.
+        """
+        cumulative = self._cumulative
+        excluded = sorted({rank for rank in exclude if 1 <= rank <= self.size})
+        # Gaps left by the excluded ranks in the full weight range, then the
+        # gaps left by ranks already chosen in what remains after those.
+        outer = _Gaps([(cumulative[rank - 1], self._weight(rank)) for rank in excluded])
+        inner = _Gaps([])
+        chosen: List[int] = []
+        while len(chosen) < count:
+            left = cumulative[self.size] - outer.removed - inner.removed
+            if left <= 0:
+                break
+            target = outer.skip(inner.skip(self.rng.randrange(left)))
+            rank = bisect_right(cumulative, target)
+            chosen.append(rank)
+            inner.add(outer.squeeze(cumulative[rank - 1]), self._weight(rank))
+        return chosen
+
+
+class _Gaps:
+    """Sorted ``(start, weight)`` ranges cut out of a weight range.
+
+    Maps a draw from the weight that is left back to the original range.
+    """
+
+    def __init__(self, gaps: List[tuple]) -> None:
+        self._gaps = gaps
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        # _left_below[i] is the weight left below gap i, _through[i] the
+        # weight removed by gaps 0..i.
+        self._left_below: List[int] = []
+        self._through: List[int] = []
+        removed = 0
+        for start, weight in self._gaps:
+            self._left_below.append(start - removed)
+            removed += weight
+            self._through.append(removed)
+        self.removed = removed
+
+    def add(self, start: int, weight: int) -> None:
+        insort(self._gaps, (start, weight))
+        self._rebuild()
+
+    def skip(self, target: int) -> int:
+        """Shift ``target`` past every gap that has less weight left below it."""
+        passed = bisect_right(self._left_below, target)
+        return target + self._through[passed - 1] if passed else target
+
+    def squeeze(self, start: int) -> int:
+        """Return where ``start``, outside every gap, lies once they are cut."""
+        passed = bisect_right(self._gaps, (start,))
+        return start - self._through[passed - 1] if passed else start
+
+
+class VocabularySampler:
+    """A :class:`FrequencySampler` sized to the current vocabulary.
+
+    ``loader`` returns the highest frequency rank in french_words. It is
+    called at most once per ``ttl`` seconds; the sampler is rebuilt only when
+    the size changes. If a refresh fails the previous sampler is kept for
+    another ``ttl``, and the exception propagates only when there is none yet.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        exponent: float = DEFAULT_EXPONENT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.exponent = exponent
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sampler: Optional[FrequencySampler] = None
+        self._loaded_at = 0.0
+
+    def get(self, loader: Callable[[], int]) -> FrequencySampler:
+        """Return the sampler, refreshing the vocabulary size when stale."""
+        now = self.clock()
+        with self._lock:
+            sampler = self._sampler
+            if sampler is not None and now - self._loaded_at < self.ttl:
+                return sampler
+        try:
+            size = loader()
+        except Exception:
+            if sampler is None:
+                raise
+            with self._lock:
+                self._loaded_at = now
+            return sampler
+        with self._lock:
+            if self._sampler is None or self._sampler.size != size:
+                self._sampler = FrequencySampler(size, self.exponent)
+            self._loaded_at = now
+            return self._sampler
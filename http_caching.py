@@ -0,0 +1,107 @@
+"""HTTP caching and compression for the Flask app.
+
+Views mark a response as cacheable with :func:`cacheable` (strong ``ETag`` plus
+``Cache-Control``) or as private with :func:`uncacheable`. The ``after_request``
+hook installed by :func:`init_app` then answers ``If-None-Match``
+revalidations with ``304`` and compresses the body of other responses when
+the client accepts it.
+"""
+
+import gzip
+import logging
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Responses smaller than this are sent as-is; compression would not pay off.
+MIN_COMPRESS_SIZE = 500
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+}
+# Card content changes rarely, but Airtable rotates signed image URLs, so keep
+# shared caches fresh for a few minutes and revalidate after that.
+DEFAULT_MAX_AGE = 300
+
+logger = logging.getLogger(__name__)
+
+
+def cacheable(response: Response, etag: str, max_age: int = DEFAULT_MAX_AGE) -> Response:
+    """Mark ``response`` as publicly cacheable with a strong ``etag``."""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def uncacheable(response: Response) -> Response:
+    """Mark ``response`` as per-user data that must not be stored."""
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+
+def _encoders() -> list:
+    encoders = [("gzip", lambda data: gzip.compress(data, compresslevel=6))]
+    if brotli is not None:
+        encoders.insert(0, ("br", lambda data: brotli.compress(data, quality=5)))
+    return encoders
+
+
+def response_encoding(response: Response) -> str | None:
+    """Return the encoding to compress ``response`` with, or ``None``.
+
+    Adds ``Accept-Encoding`` to ``Vary`` for every compressible response.
+    Range requests are answered uncompressed, so a partial body never
+    carries the validator of an encoded one.
+    """
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or request.range is not None
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return None
+
+    response.vary.add("Accept-Encoding")
+    if len(response.get_data()) < MIN_COMPRESS_SIZE:
+        return None
+    return request.accept_encodings.best_match([name for name, _ in _encoders()])
+
+
+def _tag_encoding(response: Response, encoding: str) -> None:
+    # Compressed and identity representations must never share a strong ETag.
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+
+def _encode(response: Response, encoding: str) -> None:
+    response.set_data(dict(_encoders())[encoding](response.get_data()))
+    response.headers["Content-Encoding"] = encoding
+
+
+def _finalize(response: Response) -> Response:
+    # The ETag is checked before compressing, so a 304 never pays for it.
+    encoding = response_encoding(response)
+    if encoding is not None:
+        _tag_encoding(response, encoding)
+    if request.method in ("GET", "HEAD") and response.get_etag()[0]:
+        response.make_conditional(request)
+    if encoding is not None and response.status_code == 200:
+        _encode(response, encoding)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Install compression and conditional GET handling on ``app``."""
+    app.after_request(_finalize)
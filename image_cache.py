@@ -0,0 +1,152 @@
+"""On-disk cache of resized WebP card images.
+
+Word images live in the french_words ``image`` attachment field, whose URLs
+are signed and expire after a few hours, so pages cannot link to them. The
+app instead links to ``/images/<frequency>/<attachment id>/<variant>.webp``.
+On the first request for an attachment :class:`ImageCache` downloads it once,
+writes every size in :data:`VARIANTS` as WebP under ``IMAGE_CACHE_DIR``, and
+serves later requests from disk.
+
+Airtable gives a replaced image a new attachment id, so the URL of a given
+file never changes content and can be cached by browsers and CDNs as
+``immutable``. Ids that turn out not to exist on the requested word are
+remembered, per word, for :data:`MISSING_TTL_SECONDS` so repeated requests
+for them do not reach Airtable.
+"""
+
+import io
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache"),
+)
+# Longest side in pixels of each variant.
+VARIANTS = {"thumb": 160, "card": 480}
+WEBP_QUALITY = 80
+# Served files never change, so let every cache keep them for a year.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+ATTACHMENT_ID_RE = re.compile(r"^att[A-Za-z0-9]{1,32}$")
+# Downloads of ``(frequency, id)`` pairs that hash to the same stripe are
+# serialised.
+LOCK_STRIPES = 64
+# How long, and for how many pairs, a missing attachment is remembered.
+MISSING_TTL_SECONDS = 600
+MAX_MISSING = 4096
+
+
+def resize_to_webp(data: bytes, size: int) -> bytes:
+    """Return ``data`` (any image format Pillow reads) scaled to fit ``size`` as WebP."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+class ImageCache:
+    """WebP variants of Airtable attachments stored under ``root``."""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        missing_ttl: float = MISSING_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.root = root
+        self.missing_ttl = missing_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # ``(frequency, attachment id)`` -> time it was found missing, oldest first.
+        self._missing: "OrderedDict[Tuple[int, str], float]" = OrderedDict()
+        self._missing_lock = threading.Lock()
+
+    def path(self, attachment_id: str, variant: str) -> str:
+        return os.path.join(self.root, attachment_id[3:5], attachment_id, f"{variant}.webp")
+
+    def _lock(self, key: Tuple[int, str]) -> threading.Lock:
+        digest = zlib.crc32(f"{key[0]}/{key[1]}".encode("ascii"))
+        return self._locks[digest % len(self._locks)]
+
+    def _known_missing(self, key: Tuple[int, str]) -> bool:
+        with self._missing_lock:
+            found_at = self._missing.get(key)
+            if found_at is None:
+                return False
+            if self.clock() - found_at < self.missing_ttl:
+                return True
+            del self._missing[key]
+            return False
+
+    def _remember_missing(self, key: Tuple[int, str]) -> None:
+        with self._missing_lock:
+            self._missing.pop(key, None)
+            self._missing[key] = self.clock()
+            while len(self._missing) > MAX_MISSING:
+                self._missing.popitem(last=False)
+
+    def get(
+        self,
+        frequency: int,
+        attachment_id: str,
+        variant: str,
+        download: Callable[[], Optional[bytes]],
+    ) -> Optional[str]:
+        """Return the file for ``variant`` of ``attachment_id``, creating it on a miss.
+
+        ``download`` returns the source image bytes, or ``None`` if word
+        ``frequency`` has no such attachment, in which case ``None`` is
+        returned and the pair is not downloaded again for ``missing_ttl``
+        seconds. A real attachment requested under the wrong word is thus
+        never marked missing for its own word. Only one thread downloads a
+        given pair; the others wait for it. Download and decoding errors
+        propagate.
+        """
+        if variant not in VARIANTS or not ATTACHMENT_ID_RE.match(attachment_id):
+            return None
+        path = self.path(attachment_id, variant)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        key = (frequency, attachment_id)
+        if self._known_missing(key):
+            return None
+        with self._lock(key):
+            if os.path.exists(path):
+                self.hits += 1
+                return path
+            if self._known_missing(key):
+                return None
+            self.misses += 1
+            data = download()
+            if data is None:
+                self._remember_missing(key)
+                return None
+            self.store(attachment_id, data)
+        return path
+
+    def store(self, attachment_id: str, data: bytes) -> None:
+        """Write every variant of the image ``data`` for ``attachment_id``."""
+        for variant, size in VARIANTS.items():
+            path = self.path(attachment_id, variant)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(resize_to_webp(data, size))
+            os.replace(tmp, path)
+        logger.info("Cached image variants for %s", attachment_id)
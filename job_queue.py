@@ -0,0 +1,171 @@
+"""A small persistent job queue for batch work, stored in SQLite.
+
+Batch jobs (translating a frequency range, generating its images, ...) are
+queued with :meth:`JobQueue.enqueue` and run by a long-lived worker (see
+``python -m scripts.cli worker``), which keeps its HTTP connection pools,
+API clients and compiled templates between jobs.
+
+Jobs move from ``queued`` to ``running`` to ``done``, or back to ``queued``
+after a failure until ``max_attempts`` is reached, when they become
+``failed``. A job whose worker died is handed out again once its lease has
+expired; that counts as an attempt, so a job that keeps crashing its worker
+also ends up ``failed``. As in :mod:`airtable_rate_limit`, ``BEGIN IMMEDIATE`` transactions
+make claiming a job atomic across processes.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3")
+DEFAULT_MAX_ATTEMPTS = 3
+# A running job is handed out again after this many seconds without finishing.
+DEFAULT_LEASE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class Job:
+    """A queued unit of batch work."""
+
+    id: int
+    kind: str
+    args: Dict[str, Any]
+    status: str
+    attempts: int
+    error: Optional[str] = None
+
+
+class JobQueue:
+    """Jobs stored in the SQLite database at ``path``."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        lease: float = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+                "args TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        return Job(row[0], row[1], json.loads(row[2]), row[3], row[4], row[5])
+
+    def enqueue(self, kind: str, args: Optional[Dict[str, Any]] = None) -> int:
+        """Add a job and return its id."""
+        now = self.clock()
+        with self._lock:
+            cur = self._connection().execute(
+                "INSERT INTO jobs (kind, args, status, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(args or {}, sort_keys=True), QUEUED, now, now),
+            )
+            return cur.lastrowid
+
+    def claim(self) -> Optional[Job]:
+        """Mark the oldest runnable job as running and return it, or ``None``."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? "
+                    "WHERE status = ? AND updated < ? AND attempts >= ?",
+                    (FAILED, "lease expired", now, RUNNING, now - self.lease, self.max_attempts),
+                )
+                row = conn.execute(
+                    "SELECT id, kind, args, status, attempts, error FROM jobs "
+                    "WHERE status = ? OR (status = ? AND updated < ?) ORDER BY id LIMIT 1",
+                    (QUEUED, RUNNING, now - self.lease),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ? "
+                        "WHERE id = ?",
+                        (RUNNING, now, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(row[0], row[1], json.loads(row[2]), RUNNING, row[4] + 1, row[5])
+
+    def complete(self, job_id: int) -> None:
+        """Mark ``job_id`` as done."""
+        self._set(job_id, DONE, None)
+
+    def fail(self, job_id: int, error: str) -> str:
+        """Record a failed attempt; return the job's new status.
+
+        The job is queued again unless it has used up ``max_attempts``.
+        """
+        job = self.get(job_id)
+        status = FAILED if job is None or job.attempts >= self.max_attempts else QUEUED
+        self._set(job_id, status, error)
+        return status
+
+    def _set(self, job_id: int, status: str, error: Optional[str]) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                (status, error, self.clock(), job_id),
+            )
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, kind, args, status, attempts, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return None if row is None else self._job(row)
+
+    def jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        """Return the most recent jobs, optionally only those with ``status``."""
+        query = "SELECT id, kind, args, status, attempts, error FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._connection().execute(query, params + (limit,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,216 @@
+"""Opt-in profiling for single requests and whole script runs.
+
+Requests are profiled only when ``PROFILE_TOKEN`` is set on the server and the
+request carries the same token, either in the ``X-Profile`` header or the
+``profile`` query parameter. Only the deck page and the ``/api/`` routes are
+profiled. Two modes are available (``X-Profile-Mode`` header or
+``profile_mode`` query parameter):
+
+``sample`` (default)
+    A background thread samples the request thread's stack every
+    ``SAMPLE_INTERVAL`` seconds and writes the samples in collapsed-stack
+    format (``a;b;c count``), ready for ``flamegraph.pl`` or speedscope.
+    Time spent waiting on Airtable shows up under ``requests``/``socket``.
+
+``cprofile``
+    Runs the request under :mod:`cProfile` and writes a ``.prof`` file for
+    ``pstats`` or snakeviz.
+
+Output goes to ``PROFILE_DIR`` (default ``profiles``); the file name is
+returned in the ``X-Profile-File`` response header.
+
+Scripts wrap their ``main`` in :func:`profile_run`, which profiles the whole
+run when ``PROFILE_RUN`` is set to ``sample`` or ``cprofile``.
+"""
+
+import contextlib
+import cProfile
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+SAMPLE_INTERVAL = 0.001
+MODES = ("sample", "cprofile")
+DEFAULT_PROFILE_DIR = "profiles"
+PROFILE_HEADER = "X-Profile"
+MODE_HEADER = "X-Profile-Mode"
+FILE_HEADER = "X-Profile-File"
+PROFILED_PATHS = re.compile(r"^/(flashcards_airtable$|api/)")
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Sample one thread's stack from a background thread.
+
+    ``stacks`` maps collapsed stacks (outermost frame first, joined by ``;``)
+    to the number of samples in which they were seen.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL) -> None:
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if labels:
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+def profile_path(name: str, suffix: str, directory: Optional[str] = None) -> str:
+    """Return a new file path in the profile directory for ``name``."""
+    directory = directory or os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "root"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{safe}-{stamp}-{time.perf_counter_ns() % 10**6:06d}{suffix}")
+
+
+def write_collapsed(stacks: Counter, path: str) -> str:
+    """Write ``stacks`` to ``path`` in collapsed-stack format."""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class _Session:
+    """One running profile in either mode."""
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        if mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = SamplingProfiler().start()
+
+    def finish(self, name: str, directory: Optional[str] = None) -> str:
+        if self.mode == "cprofile":
+            self.profiler.disable()
+            path = profile_path(name, ".prof", directory)
+            self.profiler.dump_stats(path)
+            return path
+        return write_collapsed(self.profiler.stop(), profile_path(name, ".folded", directory))
+
+
+# Flask is imported inside the request hooks so scripts can use
+# :func:`profile_run` without loading the web stack.
+
+
+def _requested_mode() -> Optional[str]:
+    """Return the profiling mode for the current request, or ``None``."""
+    from flask import request
+
+    expected = os.environ.get("PROFILE_TOKEN")
+    if not expected or not PROFILED_PATHS.match(request.path):
+        return None
+    token = request.headers.get(PROFILE_HEADER) or request.args.get("profile", "")
+    if not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        return None
+    mode = request.headers.get(MODE_HEADER) or request.args.get("profile_mode", "sample")
+    return mode if mode in MODES else "sample"
+
+
+def _start() -> None:
+    from flask import g
+
+    mode = _requested_mode()
+    if mode is not None:
+        g.profile_session = _Session(mode)
+
+
+def _finish_session(session: _Session) -> Optional[str]:
+    from flask import request
+
+    try:
+        path = session.finish(f"{request.method}{request.path}")
+    except OSError:
+        logger.exception("Could not write profile for %s", request.path)
+        return None
+    logger.info("Wrote %s profile for %s to %s", session.mode, request.path, path)
+    return path
+
+
+def _finish(response: "Response") -> "Response":
+    from flask import g
+
+    session = g.pop("profile_session", None)
+    if session is not None:
+        path = _finish_session(session)
+        if path is not None:
+            response.headers[FILE_HEADER] = os.path.basename(path)
+    return response
+
+
+def _teardown(exc: Optional[BaseException]) -> None:
+    # ``after_request`` is skipped when a view raises; stop the profiler here
+    # so its sampling thread does not outlive the request.
+    from flask import g
+
+    session = g.pop("profile_session", None)
+    if session is not None:
+        _finish_session(session)
+
+
+def init_app(app: "Flask") -> None:
+    """Install the per-request profiling hooks on ``app``.
+
+    Call this before other extensions that add ``after_request`` hooks so
+    their work is included in the profile.
+    """
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_teardown)
+
+
+@contextlib.contextmanager
+def profile_run(name: str) -> Iterator[None]:
+    """Profile the enclosed block when ``PROFILE_RUN`` names a mode."""
+    mode = os.environ.get("PROFILE_RUN", "").lower()
+    if mode not in MODES:
+        yield
+        return
+    session = _Session(mode)
+    try:
+        yield
+    finally:
+        path = session.finish(name)
+        logger.info("Wrote %s profile to %s", mode, path)
@@ -0,0 +1,407 @@
+"""Per-user spaced repetition state held in memory.
+
+Each learner's spaced_rep rows are loaded once and kept as a small
+``{frequency: (level, date)}`` map, so building a deck does not need one
+Airtable query per level. Users are spread over independently locked shards,
+and each shard keeps at most a fixed number of users in LRU order. Airtable is
+always written first, so evicting a cold user only drops the in-memory copy;
+it is reloaded from Airtable the next time that user asks for a deck.
+
+Due cards are materialised into a :class:`DueQueue` once per user per day
+(by :class:`DueQueueJob` after midnight, or on the first deck of the day) and
+answers move cards between levels in place, so a deck only reads the head of
+the queue.
+
+With the adaptive scheduler (``SCHEDULER=adaptive``) users are held as
+:class:`AdaptiveReviewState` instead, which keeps each card's stability and
+ease in a :class:`scheduler.CardModel` and picks due cards by recall
+probability.
+"""
+
+import bisect
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import scheduler
+from airtable_data_access import (
+    DECK_SIZE,
+    LEVEL_MIN_AGE_DAYS,
+    MAX_LEVEL,
+    next_level,
+    parse_frequency,
+)
+
+logger = logging.getLogger(__name__)
+
+# Loaded state is refreshed after this long so that answers recorded by other
+# processes are picked up eventually.
+DEFAULT_TTL_SECONDS = 600
+# Loads of a user's state are retried this many times while answers keep
+# arriving during them; the last result is then returned without caching it.
+MAX_LOAD_ATTEMPTS = 3
+
+
+class DueQueue:
+    """One day's due cards for one user, per level, most overdue first.
+
+    The queue is built once per day from the user's cards and then kept up to
+    date by :meth:`move` as answers come in, so building a deck only reads
+    the head of each level.
+    """
+
+    __slots__ = ("day", "levels", "_cutoffs")
+
+    def __init__(self, day: date, cards: Dict[str, Tuple[int, str]]) -> None:
+        self.day = day
+        self._cutoffs = {
+            lvl: None if age is None else (day - timedelta(days=age)).isoformat()
+            for lvl, age in LEVEL_MIN_AGE_DAYS.items()
+        }
+        # Each level holds sorted ``(date, frequency)`` entries, so an older
+        # date (a more overdue card) comes first.
+        self.levels: Dict[int, List[Tuple[str, int]]] = {lvl: [] for lvl in self._cutoffs}
+        for freq, (level, date_str) in cards.items():
+            entry = self._entry(freq, level, date_str)
+            if entry is not None:
+                self.levels[level].append(entry)
+        for entries in self.levels.values():
+            entries.sort()
+
+    def _entry(self, freq: str, level: int, date_str: str) -> Optional[Tuple[str, int]]:
+        """Return the queue entry for a card, or ``None`` if it is not due."""
+        if level not in self.levels:
+            return None
+        cutoff = self._cutoffs[level]
+        if cutoff is not None and not (date_str and date_str < cutoff):
+            return None
+        freq_int = parse_frequency(freq)
+        return None if freq_int is None else (date_str, freq_int)
+
+    def move(
+        self, freq: str, old: Optional[Tuple[int, str]], new: Tuple[int, str]
+    ) -> None:
+        """Move ``freq`` from its ``old`` ``(level, date)`` to ``new``."""
+        if old is not None:
+            entry = self._entry(freq, *old)
+            if entry is not None:
+                entries = self.levels[old[0]]
+                pos = bisect.bisect_left(entries, entry)
+                if pos < len(entries) and entries[pos] == entry:
+                    del entries[pos]
+        entry = self._entry(freq, *new)
+        if entry is not None:
+            bisect.insort(self.levels[new[0]], entry)
+
+    def head(self, count: int) -> List[Tuple[int, int]]:
+        """Return up to ``count`` of the most overdue cards per level."""
+        results = [
+            (freq, lvl) for lvl, entries in self.levels.items() for _, freq in entries[:count]
+        ]
+        return sorted(results)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.levels.values())
+
+
+class UserReviewState:
+    """Review state for one user."""
+
+    __slots__ = ("cards", "loaded_at", "queue", "lock")
+
+    def __init__(self, cards: Dict[str, Tuple[int, str]], loaded_at: float) -> None:
+        self.cards = cards
+        self.loaded_at = loaded_at
+        self.queue: Optional[DueQueue] = None
+        self.lock = threading.Lock()
+
+    def prepare(self, today: date) -> DueQueue:
+        """Return the due queue for ``today``, building it on the first call that day."""
+        with self.lock:
+            if self.queue is None or self.queue.day != today:
+                self.queue = DueQueue(today, self.cards)
+            return self.queue
+
+    def due(self, today: date, count: int = 5) -> List[Tuple[int, int]]:
+        """Return up to ``count`` due ``(frequency, level)`` pairs per level.
+
+        This applies the same rules as
+        :func:`airtable_data_access.fetch_spaced_rep_frequencies`: a card is
+        due once its ``Date`` is more than ``LEVEL_MIN_AGE_DAYS[level]`` days
+        before ``today``. Within a level the oldest cards are chosen.
+        """
+        queue = self.prepare(today)
+        with self.lock:
+            return queue.head(count)
+
+    def tracked(self) -> Set[int]:
+        """Return every frequency the user has a spaced_rep row for."""
+        with self.lock:
+            freqs = {parse_frequency(freq) for freq in self.cards}
+        freqs.discard(None)
+        return freqs
+
+    def apply(self, frequency: str, outcome: str, date_str: str) -> None:
+        """Update the state after ``frequency`` was answered with ``outcome``."""
+        with self.lock:
+            old = self.cards.get(frequency)
+            level = old[0] if old is not None else 0
+            new = (next_level(level, outcome), date_str)
+            self.cards[frequency] = new
+            if self.queue is not None:
+                self.queue.move(frequency, old, new)
+
+
+class AdaptiveReviewState(UserReviewState):
+    """Review state for one user under the adaptive scheduler.
+
+    ``cards`` holds ``(level, date, stability, ease)`` rows as returned by
+    :func:`airtable_data_access.fetch_review_state`; rows without stability
+    or ease are seeded from their level (see :func:`scheduler.card_memory`).
+    """
+
+    __slots__ = ("model", "levels")
+
+    def __init__(self, cards: Dict[str, Tuple], loaded_at: float) -> None:
+        super().__init__(cards, loaded_at)
+        self.model = scheduler.CardModel()
+        self.levels: Dict[int, int] = {}
+        for freq, row in cards.items():
+            level, date_str, stability, ease = (tuple(row) + (None, None))[:4]
+            freq_int = parse_frequency(freq)
+            if freq_int is None:
+                continue
+            self.levels[freq_int] = level
+            self.model.set(
+                freq_int,
+                *scheduler.card_memory(level, stability, ease),
+                scheduler.day_number(date_str),
+            )
+
+    def prepare(self, today: date) -> scheduler.CardModel:
+        """Return the card model; recall is computed when a deck is chosen."""
+        return self.model
+
+    def due(self, today: date, count: int = DECK_SIZE) -> List[Tuple[int, int]]:
+        """Return up to ``count`` due ``(frequency, level)`` pairs in total.
+
+        Cards are due once their recall probability on ``today`` falls below
+        :data:`scheduler.TARGET_RETENTION`; the least likely to be recalled
+        are chosen (see :meth:`scheduler.CardModel.select`).
+        """
+        with self.lock:
+            chosen = self.model.select(today.toordinal(), count)
+            return sorted((freq, self.levels[freq]) for freq in chosen)
+
+    def apply(self, frequency: str, outcome: str, date_str: str) -> None:
+        """Update the state after ``frequency`` was answered with ``outcome``."""
+        freq_int = parse_frequency(frequency)
+        with self.lock:
+            old = self.cards.get(frequency)
+            memory = None
+            level = 0
+            elapsed = 0.0
+            if old is not None:
+                level, old_date, stability, ease = (tuple(old) + (None, None))[:4]
+                memory = scheduler.card_memory(level, stability, ease)
+                elapsed = scheduler.elapsed_days(old_date, date_str)
+            stability, ease = scheduler.review(memory, elapsed, outcome)
+            new_level = next_level(level, outcome)
+            self.cards[frequency] = (new_level, date_str, stability, ease)
+            if freq_int is not None:
+                self.levels[freq_int] = new_level
+                self.model.set(freq_int, stability, ease, scheduler.day_number(date_str))
+
+
+class _Load:
+    """Loads of one user's state in flight and answers applied meanwhile."""
+
+    __slots__ = ("loaders", "generation")
+
+    def __init__(self) -> None:
+        self.loaders = 0
+        self.generation = 0
+
+
+class _Shard:
+    __slots__ = ("lock", "users", "loads")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.users: "OrderedDict[str, UserReviewState]" = OrderedDict()
+        self.loads: Dict[str, _Load] = {}
+
+
+class ReviewStateCache:
+    """Sharded, bounded LRU cache of :class:`UserReviewState` by user.
+
+    ``factory`` builds a user's state from their rows and load time.
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        max_users_per_shard: int = 64,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        factory: Callable[[Dict[str, Tuple], float], UserReviewState] = UserReviewState,
+    ) -> None:
+        self.max_users_per_shard = max_users_per_shard
+        self.ttl = ttl
+        self.clock = clock
+        self.factory = factory
+        self.evictions = 0
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def _shard(self, user: str) -> _Shard:
+        return self._shards[zlib.crc32(user.encode("utf-8")) % len(self._shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard.users) for shard in self._shards)
+
+    def __contains__(self, user: str) -> bool:
+        shard = self._shard(user)
+        with shard.lock:
+            return user in shard.users
+
+    def get(
+        self, user: str, loader: Callable[[], Dict[str, Tuple[int, str]]]
+    ) -> UserReviewState:
+        """Return ``user``'s state, calling ``loader`` if it is missing or stale.
+
+        ``loader`` returns the user's rows as ``{frequency: (level, date)}``;
+        its exceptions propagate to the caller. An answer applied while
+        ``loader`` runs may be missing from its rows, so the rows are then
+        loaded again rather than cached.
+        """
+        shard = self._shard(user)
+        now = self.clock()
+        with shard.lock:
+            state = shard.users.get(user)
+            if state is not None and now - state.loaded_at < self.ttl:
+                shard.users.move_to_end(user)
+                return state
+            load = shard.loads.get(user)
+            if load is None:
+                load = shard.loads[user] = _Load()
+            load.loaders += 1
+
+        try:
+            for _ in range(MAX_LOAD_ATTEMPTS):
+                with shard.lock:
+                    generation = load.generation
+                # Load outside the lock so a slow Airtable call only blocks this user.
+                state = self.factory(loader(), now)
+                with shard.lock:
+                    if load.generation == generation:
+                        self._store(shard, user, state)
+                        return state
+                now = self.clock()
+            logger.warning("Answers for %r kept arriving during loads; not caching", user)
+            return state
+        finally:
+            with shard.lock:
+                load.loaders -= 1
+                if not load.loaders:
+                    del shard.loads[user]
+
+    def _store(self, shard: _Shard, user: str, state: UserReviewState) -> None:
+        shard.users[user] = state
+        shard.users.move_to_end(user)
+        while len(shard.users) > self.max_users_per_shard:
+            cold, _ = shard.users.popitem(last=False)
+            self.evictions += 1
+            logger.debug("Evicted review state for user %r", cold)
+
+    def apply(self, user: str, frequency: str, outcome: str, date_str: str) -> None:
+        """Record an answer in ``user``'s cached state if it is loaded.
+
+        Airtable must already have been updated; users that are not cached are
+        left alone and will load the new state on their next deck. A load of
+        ``user`` in progress is repeated, since it may have read the rows
+        before the answer.
+        """
+        shard = self._shard(user)
+        with shard.lock:
+            load = shard.loads.get(user)
+            if load is not None:
+                load.generation += 1
+            state: Optional[UserReviewState] = shard.users.get(user)
+            if state is not None:
+                state.apply(frequency, outcome, date_str)
+
+    def prepare_due(self, today: date) -> int:
+        """Build ``today``'s due queue for every cached user.
+
+        Returns the number of users whose queue was built. Users loaded later
+        build theirs on their first deck of the day.
+        """
+        prepared = 0
+        for shard in self._shards:
+            with shard.lock:
+                states = list(shard.users.values())
+            for state in states:
+                if isinstance(state, AdaptiveReviewState):
+                    continue
+                if state.queue is None or state.queue.day != today:
+                    state.prepare(today)
+                    prepared += 1
+        return prepared
+
+    def invalidate(self, user: str) -> None:
+        """Drop ``user``'s cached state, and any being loaded."""
+        shard = self._shard(user)
+        with shard.lock:
+            load = shard.loads.get(user)
+            if load is not None:
+                load.generation += 1
+            shard.users.pop(user, None)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class DueQueueJob(threading.Thread):
+    """Build each cached user's due queue just after every UTC midnight.
+
+    Decks are built with UTC dates, so this moves the once-a-day queue
+    rebuild off the first deck request of the day.
+    """
+
+    def __init__(
+        self,
+        cache: ReviewStateCache,
+        clock: Callable[[], datetime] = _utc_now,
+        delay: float = 1.0,
+    ) -> None:
+        super().__init__(name="due-queue-job", daemon=True)
+        self.cache = cache
+        self.clock = clock
+        self.delay = delay
+        self.stopped = threading.Event()
+
+    def seconds_until_next_run(self) -> float:
+        now = self.clock()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+        return (midnight - now).total_seconds() + self.delay
+
+    def run_once(self) -> int:
+        today = self.clock().date()
+        prepared = self.cache.prepare_due(today)
+        logger.info("Prepared %d due queues for %s", prepared, today)
+        return prepared
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.seconds_until_next_run()):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Failed to prepare due queues")
+
+    def stop(self) -> None:
+        self.stopped.set()
@@ -0,0 +1,246 @@
+"""Adaptive spaced repetition with a per-card ease and stability.
+
+The default ``ladder`` scheduler moves each card between five levels with
+fixed waits (``LEVEL_MIN_AGE_DAYS`` in :mod:`airtable_data_access`). Setting
+``SCHEDULER=adaptive`` switches to a model in the style of SM-2 and FSRS that
+keeps two numbers per spaced_rep row, in its ``Stability`` and ``Ease``
+fields:
+
+- *stability* is the number of days after a review until the probability of
+  recalling the card has dropped to :data:`TARGET_RETENTION`;
+- *ease* is the factor by which stability grows after a successful review.
+
+Recall ``t`` days after a review follows the FSRS power forgetting curve
+``(1 + FACTOR * t / stability) ** DECAY``. A successful review multiplies
+stability by up to ``ease`` (more the closer the card was to being
+forgotten) and raises ease slightly; forgetting cuts stability and lowers
+ease. Rows recorded by the ladder get a stability from their level.
+
+:class:`CardModel` holds all of a learner's cards in parallel arrays.
+:meth:`CardModel.select` computes every card's recall probability at once
+and picks the cards that have fallen below the target retention, least
+likely to be recalled first: a review brings a card back to near-certain
+recall, so these reviews add the most to the expected retention of the deck.
+NumPy is listed in requirements.txt; the pure Python fallback only keeps the
+module importable without it and is about 50 times slower.
+"""
+
+import heapq
+import logging
+from array import array
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+try:  # Optional: vectorised recall and selection.
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+LADDER = "ladder"
+ADAPTIVE = "adaptive"
+SCHEDULERS = (LADDER, ADAPTIVE)
+
+# Cards are due once their recall probability drops below this.
+TARGET_RETENTION = 0.9
+# Forgetting curve constants; FACTOR makes recall equal TARGET_RETENTION when
+# the elapsed time equals the stability.
+DECAY = -0.5
+FACTOR = TARGET_RETENTION ** (1 / DECAY) - 1
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_EASE = 3.5
+EASE_BONUS = 0.05
+EASE_PENALTY = 0.2
+MIN_STABILITY = 0.5
+# Stability after the first answer for a card that is not tracked yet.
+FIRST_STABILITY = {"practice": 4.0, "forget": 1.0}
+# Share of its stability a card keeps when it is forgotten.
+LAPSE_STABILITY = 0.3
+# Largest multiple of ``ease - 1`` a late review adds to the growth factor.
+MAX_SPACING = 2.0
+# Starting stability for rows recorded by the ladder, by level.
+LEVEL_STABILITY = {1: 1.0, 2: 7.0, 3: 14.0, 4: 30.0, 5: 60.0}
+
+
+def scheduler_name(value: Optional[str]) -> str:
+    """Return the scheduler configured by ``value``, ``ladder`` if unset or unknown."""
+    if not value:
+        return LADDER
+    if value not in SCHEDULERS:
+        logger.warning("Unknown scheduler %r; using %r", value, LADDER)
+        return LADDER
+    return value
+
+
+def _positive(value: object) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def day_number(date_str: object) -> int:
+    """Return the ordinal of an ISO ``YYYY-MM-DD`` date, or 0 if it is invalid."""
+    try:
+        return date.fromisoformat(str(date_str)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+def elapsed_days(since: object, until: object) -> float:
+    """Return the days from ``since`` to ``until``; 0 if either date is invalid."""
+    start, end = day_number(since), day_number(until)
+    if not start or not end:
+        return 0.0
+    return float(max(end - start, 0))
+
+
+def recall(stability: float, elapsed: float) -> float:
+    """Return the probability of recalling a card ``elapsed`` days after a review."""
+    return (1 + FACTOR * max(elapsed, 0.0) / stability) ** DECAY
+
+
+def card_memory(level: object, stability: object, ease: object) -> Tuple[float, float]:
+    """Return ``(stability, ease)`` for a tracked card from its spaced_rep fields.
+
+    Missing or invalid values, as in rows recorded by the ladder scheduler,
+    are derived from ``level`` and :data:`DEFAULT_EASE`.
+    """
+    ease_value = _positive(ease)
+    stability_value = _positive(stability)
+    if stability_value is None:
+        try:
+            stability_value = LEVEL_STABILITY.get(int(level), LEVEL_STABILITY[1])
+        except (TypeError, ValueError):
+            stability_value = LEVEL_STABILITY[1]
+    return (
+        max(stability_value, MIN_STABILITY),
+        DEFAULT_EASE if ease_value is None else min(max(ease_value, MIN_EASE), MAX_EASE),
+    )
+
+
+def review(
+    memory: Optional[Tuple[float, float]], elapsed: float, outcome: str
+) -> Tuple[float, float]:
+    """Return ``(stability, ease)`` after answering a card with ``outcome``.
+
+    ``memory`` is the card's ``(stability, ease)`` before the answer, or
+    ``None`` for a card that is not tracked yet, and ``elapsed`` the days
+    since its last review. ``outcome`` is ``"practice"`` or ``"forget"``.
+    """
+    if memory is None:
+        stability, ease = FIRST_STABILITY.get(outcome, FIRST_STABILITY["forget"]), DEFAULT_EASE
+    else:
+        stability, ease = memory
+        if outcome == "practice":
+            # Reviewing just as the card reaches the target retention grows
+            # stability by ``ease``; earlier reviews grow it less.
+            spacing = (1 - recall(stability, elapsed)) / (1 - TARGET_RETENTION)
+            stability *= 1 + (ease - 1) * min(spacing, MAX_SPACING)
+            ease = min(ease + EASE_BONUS, MAX_EASE)
+        else:
+            stability = max(stability * LAPSE_STABILITY, MIN_STABILITY)
+            ease = max(ease - EASE_PENALTY, MIN_EASE)
+    return round(stability, 3), round(ease, 3)
+
+
+class CardModel:
+    """Stability, ease and last review day of one learner's cards, as arrays.
+
+    Cards are identified by frequency. Updates are in place, and the arrays
+    grow by doubling as new cards are added.
+    """
+
+    __slots__ = ("frequencies", "stability", "ease", "reviewed", "size", "_index")
+
+    def __init__(self, cards: Sequence[Tuple[int, float, float, int]] = ()) -> None:
+        """``cards`` are ``(frequency, stability, ease, review day)`` tuples."""
+        self.size = 0
+        self._index = {}
+        self._allocate(max(len(cards), 16))
+        for card in cards:
+            self.set(*card)
+
+    def _allocate(self, capacity: int) -> None:
+        old = (
+            (self.frequencies, self.stability, self.ease, self.reviewed) if self.size else None
+        )
+        if numpy is not None:
+            self.frequencies = numpy.zeros(capacity, dtype=numpy.int64)
+            self.stability = numpy.ones(capacity, dtype=numpy.float64)
+            self.ease = numpy.zeros(capacity, dtype=numpy.float64)
+            self.reviewed = numpy.zeros(capacity, dtype=numpy.int64)
+        else:
+            self.frequencies = array("q", bytes(8 * capacity))
+            self.stability = array("d", [1.0]) * capacity
+            self.ease = array("d", bytes(8 * capacity))
+            self.reviewed = array("q", bytes(8 * capacity))
+        if old is not None:
+            for new, values in zip(
+                (self.frequencies, self.stability, self.ease, self.reviewed), old
+            ):
+                new[: self.size] = values[: self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, frequency: int) -> bool:
+        return frequency in self._index
+
+    def set(self, frequency: int, stability: float, ease: float, day: int) -> None:
+        """Store the state of ``frequency`` after a review on ``day`` (an ordinal)."""
+        pos = self._index.get(frequency)
+        if pos is None:
+            if self.size == len(self.frequencies):
+                self._allocate(2 * self.size)
+            pos = self._index[frequency] = self.size
+            self.size += 1
+            self.frequencies[pos] = frequency
+        self.stability[pos] = max(stability, MIN_STABILITY)
+        self.ease[pos] = ease
+        self.reviewed[pos] = day
+
+    def recall(self, day: int):
+        """Return every card's recall probability on ``day``, in insertion order."""
+        n = self.size
+        if numpy is not None:
+            elapsed = numpy.maximum(day - self.reviewed[:n], 0)
+            return (1 + FACTOR * elapsed / self.stability[:n]) ** DECAY
+        return [
+            (1 + FACTOR * max(day - reviewed, 0) / stability) ** DECAY
+            for reviewed, stability in zip(self.reviewed[:n], self.stability[:n])
+        ]
+
+    def select(self, day: int, count: int) -> List[int]:
+        """Return up to ``count`` due frequencies on ``day``, least likely recalled first.
+
+        Cards with the same recall probability come lowest frequency first.
+        """
+        if count <= 0 or not self.size:
+            return []
+        probabilities = self.recall(day)
+        if numpy is not None:
+            due = numpy.flatnonzero(probabilities < TARGET_RETENTION)
+            if len(due) > count:
+                # Keep every card below the count-th probability, then fill
+                # up with the cards tied at it.
+                cutoff = numpy.partition(probabilities[due], count - 1)[count - 1]
+                below = due[probabilities[due] < cutoff]
+                tied = due[probabilities[due] == cutoff]
+                tied = tied[numpy.argsort(self.frequencies[tied], kind="stable")]
+                due = numpy.concatenate((below, tied[: count - len(below)]))
+            due = due[numpy.lexsort((self.frequencies[due], probabilities[due]))]
+            return self.frequencies[due].tolist()
+        due = heapq.nsmallest(
+            count,
+            (
+                (p, self.frequencies[pos])
+                for pos, p in enumerate(probabilities)
+                if p < TARGET_RETENTION
+            ),
+        )
+        return [freq for _, freq in due]
@@ -0,0 +1,312 @@
+"""Command line entry point for the batch tools.
+
+Usage::
+
+    python -m scripts.cli schema [--save|--check]
+    python -m scripts.cli translate 1-20      # print translations
+    python -m scripts.cli upload 1-20         # translate and write to Airtable
+    python -m scripts.cli images 1-20         # generate and attach images
+    python -m scripts.cli sync 1-20           # upload, then images
+
+    python -m scripts.cli export words vocabulary.flcf
+    python -m scripts.cli import reviews spaced_rep.flcf
+
+    python -m scripts.cli enqueue sync 1-200 --chunk 20
+    python -m scripts.cli worker [--once]
+    python -m scripts.cli jobs
+
+    python -m scripts.cli answers status|sync|compact|rebuild
+
+``schema --save`` writes the schema to the cache read by :mod:`airtable_schema`
+(``AIRTABLE_SCHEMA_CACHE``) instead of printing it; ``schema --check`` exits
+with status 1 if that cache no longer matches the schema in Airtable.
+
+``export`` and ``import`` copy the french_words (``words``) or spaced_rep
+(``reviews``) table to or from a columnar file (see :mod:`table_export`).
+
+``enqueue`` adds jobs to the SQLite queue in :mod:`job_queue` (``--queue`` or
+``JOB_QUEUE_DB``). ``worker`` runs them one after another in a single
+long-lived process, so the pooled HTTP session, OpenAI clients and compiled
+prompt templates are reused across jobs. It polls until interrupted, or
+exits once the queue is empty with ``--once``.
+
+``answers`` maintains the local answer log in :mod:`answer_log` (``--log``
+or ``ANSWER_LOG``): ``sync`` writes unsynced answers to Airtable,
+``compact`` snapshots it and drops old synced answers, and ``rebuild``
+recomputes the snapshot, under ``--scheduler`` if given.
+
+Credentials come from the AIRTABLE_API_KEY and OPENAI_KEY environment
+variables. ``PROFILE_RUN`` profiles a whole command as for translate_words.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+if not __package__:
+    # Run directly as ``python scripts/cli.py``: make the root modules importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import DEFAULT_DB_PATH, JobQueue
+from profiling import profile_run
+from scripts import translate_words
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("translate", "upload", "images", "sync")
+TABLES = ("words", "reviews")
+ANSWER_ACTIONS = ("status", "sync", "compact", "rebuild")
+DEFAULT_POLL_SECONDS = 5.0
+
+
+def _keys(need_openai: bool = True) -> Tuple[str, str]:
+    """Return ``(openai_key, airtable_key)`` or raise ``ValueError``."""
+    openai_key = os.getenv("OPENAI_KEY", "")
+    airtable_key = os.getenv("AIRTABLE_API_KEY", "")
+    if need_openai and not openai_key:
+        raise ValueError("OPENAI_KEY environment variable is not set")
+    if not airtable_key:
+        raise ValueError("AIRTABLE_API_KEY environment variable is not set")
+    return openai_key, airtable_key
+
+
+def run_job(kind: str, freq_range: str, image_dir: str = translate_words.IMAGE_DIR) -> object:
+    """Run one batch job of ``kind`` over ``freq_range`` and return its result.
+
+    Raises :class:`scripts.translate_words.BatchError` if any word failed, so
+    the worker retries the job and finally marks it failed.
+    """
+    start, end = translate_words.parse_frequency_range(freq_range)
+    openai_key, airtable_key = _keys()
+    if kind == "translate":
+        return translate_words.translate_range(
+            openai_key, airtable_key, start, end, strict=True
+        )
+    if kind == "upload":
+        return translate_words.translate_range(
+            openai_key, airtable_key, start, end, upload=True, strict=True
+        )
+    if kind == "images":
+        return translate_words.generate_images_for_range(
+            openai_key, airtable_key, start, end, image_dir, strict=True
+        )
+    if kind == "sync":
+        # Only words still missing a translation or image are done, so a
+        # retried job resumes where the failed attempt stopped.
+        translated = translate_words.translate_range(
+            openai_key, airtable_key, start, end, upload=True, missing_only=True, strict=True
+        )
+        images = translate_words.generate_images_for_range(
+            openai_key, airtable_key, start, end, image_dir, missing_only=True, strict=True
+        )
+        return {"translated": len(translated), "images": len(images)}
+    raise ValueError(f"unknown job kind {kind!r}")
+
+
+def split_range(freq_range: str, chunk: Optional[int]) -> List[str]:
+    """Split ``start-end`` into ranges of at most ``chunk`` frequencies."""
+    start, end = translate_words.parse_frequency_range(freq_range)
+    if not chunk:
+        return [f"{start}-{end}"]
+    return [f"{lo}-{min(lo + chunk - 1, end)}" for lo in range(start, end + 1, chunk)]
+
+
+class Worker:
+    """Run queued jobs until stopped."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[..., object] = run_job,
+        poll: float = DEFAULT_POLL_SECONDS,
+    ) -> None:
+        self.queue = queue
+        self.handler = handler
+        self.poll = poll
+        self.stopped = threading.Event()
+        self.processed = 0
+
+    def run_one(self) -> bool:
+        """Run the next job; return ``False`` if the queue was empty."""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        logger.info("Running job %d: %s %s (attempt %d)", job.id, job.kind, job.args, job.attempts)
+        started = time.perf_counter()
+        try:
+            self.handler(job.kind, **job.args)
+        except Exception as exc:
+            status = self.queue.fail(job.id, f"{type(exc).__name__}: {exc}")
+            logger.error("Job %d failed (%s)", job.id, status, exc_info=True)
+        else:
+            self.queue.complete(job.id)
+            logger.info("Job %d done in %.1fs", job.id, time.perf_counter() - started)
+        self.processed += 1
+        return True
+
+    def run(self, once: bool = False) -> int:
+        """Process jobs; with ``once`` return when the queue is empty."""
+        while not self.stopped.is_set():
+            if not self.run_one():
+                if once:
+                    break
+                self.stopped.wait(self.poll)
+        return self.processed
+
+    def stop(self, *_: object) -> None:
+        self.stopped.set()
+
+
+def run_answers(args: argparse.Namespace) -> None:
+    """Run an ``answers`` action on the answer log."""
+    import answer_log
+    import scheduler
+    from airtable_data_access import SCHEDULER, write_review_state
+
+    model = SCHEDULER
+    if args.action == "rebuild" and args.scheduler:
+        if args.scheduler not in scheduler.SCHEDULERS:
+            raise ValueError(f"unknown scheduler {args.scheduler!r}")
+        model = args.scheduler
+    log = answer_log.AnswerLog(args.log or answer_log.DEFAULT_DB_PATH, model=model)
+    if args.retain_days is not None:
+        log.retain_days = args.retain_days
+    if args.action == "sync":
+        _, airtable_key = _keys(need_openai=False)
+        count = log.sync(lambda user, rows: write_review_state(airtable_key, rows, user))
+        print(f"Synced {count} answers")
+    elif args.action == "compact":
+        print(f"Compacted {log.compact()} answers")
+    elif args.action == "rebuild":
+        log.rebuild()
+        print(f"Rebuilt the snapshot for the {log.model} scheduler")
+    print(json.dumps(log.counts(), sort_keys=True))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m scripts.cli")
+    parser.add_argument(
+        "--queue",
+        default=os.environ.get("JOB_QUEUE_DB", DEFAULT_DB_PATH),
+        help="Job queue database",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    schema = sub.add_parser("schema", help="Print the Airtable schema")
+    schema.add_argument("--base-id", default=None)
+    schema_mode = schema.add_mutually_exclusive_group()
+    schema_mode.add_argument("--save", action="store_true", help="Update the local schema cache")
+    schema_mode.add_argument(
+        "--check", action="store_true", help="Fail if the local schema cache is out of date"
+    )
+
+    for kind, help_text in (
+        ("translate", "Translate words and print the results"),
+        ("upload", "Translate words and write them to Airtable"),
+        ("images", "Generate images and attach them to the words"),
+        ("sync", "Upload translations, then images"),
+    ):
+        cmd = sub.add_parser(kind, help=help_text)
+        cmd.add_argument("freq_range", help="Frequency range in the form start-end")
+        cmd.add_argument("--image-dir", default=translate_words.IMAGE_DIR)
+
+    for name, help_text in (
+        ("export", "Write a table to a columnar file"),
+        ("import", "Create records from a columnar file"),
+    ):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("table", choices=TABLES)
+        cmd.add_argument("path")
+
+    enqueue = sub.add_parser("enqueue", help="Queue a job for the worker")
+    enqueue.add_argument("kind", choices=JOB_KINDS)
+    enqueue.add_argument("freq_range")
+    enqueue.add_argument("--chunk", type=int, help="Split into jobs of this many words")
+    enqueue.add_argument("--image-dir")
+
+    worker = sub.add_parser("worker", help="Run queued jobs")
+    worker.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS)
+
+    jobs = sub.add_parser("jobs", help="List queued jobs")
+    jobs.add_argument("--status")
+    jobs.add_argument("--limit", type=int, default=20)
+
+    answers = sub.add_parser("answers", help="Maintain the local answer log")
+    answers.add_argument("action", choices=ANSWER_ACTIONS)
+    answers.add_argument("--log", default=os.environ.get("ANSWER_LOG"), help="Answer log database")
+    answers.add_argument("--scheduler", help="Scheduler to rebuild the snapshot for")
+    answers.add_argument("--retain-days", type=float, help="Keep synced answers this long")
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point for ``python -m scripts.cli``."""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "schema":
+            from scripts.fetch_airtable_schema import BASE_ID, fetch_schema
+
+            _, airtable_key = _keys(need_openai=False)
+            schema = fetch_schema(airtable_key, args.base_id or BASE_ID)
+            if args.save or args.check:
+                import airtable_schema
+
+                path = os.environ.get("AIRTABLE_SCHEMA_CACHE", airtable_schema.DEFAULT_CACHE_PATH)
+            if args.save:
+                changed = airtable_schema.save_schema(schema, path)
+                print(f"{'Updated' if changed else 'Unchanged'} schema cache {path}")
+            elif args.check:
+                if not airtable_schema.cache_is_current(schema, path):
+                    print(f"Schema cache {path} is out of date", file=sys.stderr)
+                    return 1
+                print(f"Schema cache {path} is current")
+            else:
+                print(json.dumps(schema, indent=2, sort_keys=True))
+        elif args.command in ("export", "import"):
+            import table_export
+
+            _, airtable_key = _keys(need_openai=False)
+            transfer = getattr(table_export, f"{args.command}_{args.table}")
+            count = transfer(airtable_key, args.path)
+            print(f"{args.command.capitalize()}ed {count} {args.table} ({args.path})")
+        elif args.command in JOB_KINDS:
+            result = run_job(args.command, args.freq_range, args.image_dir)
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        elif args.command == "enqueue":
+            queue = JobQueue(args.queue)
+            extra: Dict[str, str] = {"image_dir": args.image_dir} if args.image_dir else {}
+            for part in split_range(args.freq_range, args.chunk):
+                job_id = queue.enqueue(args.kind, {"freq_range": part, **extra})
+                print(f"Queued job {job_id}: {args.kind} {part}")
+        elif args.command == "worker":
+            worker = Worker(JobQueue(args.queue), poll=args.poll)
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+            processed = worker.run(once=args.once)
+            print(f"Processed {processed} jobs")
+        elif args.command == "jobs":
+            queue = JobQueue(args.queue)
+            for job in queue.jobs(args.status, args.limit):
+                error = f"  {job.error}" if job.error else ""
+                print(f"{job.id:>5}  {job.status:<8} {job.kind:<10} {json.dumps(job.args)}{error}")
+            print(json.dumps(queue.counts(), sort_keys=True))
+        elif args.command == "answers":
+            run_answers(args)
+    except (ValueError, translate_words.BatchError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with profile_run("cli"):
+        status = main()
+    raise SystemExit(status)
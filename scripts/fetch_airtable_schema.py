@@ -5,13 +5,27 @@ import json
 import logging
 from typing import Any, Dict
 
-import requests
+if not __package__:
+    # Run directly as ``python scripts/fetch_airtable_schema.py``: make the root modules importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import airtable_rate_limit as rate_limit
 
 BASE_ID = "applW7zbiH23gDDCK"
 SCHEMA_URL = f"https://api.airtable.com/v0/meta/bases/{BASE_ID}/tables"
 
 logger = logging.getLogger(__name__)
 
+
+def __getattr__(name: str):
+    # ``requests`` is imported on first use so ``--help`` starts quickly.
+    if name == "requests":
+        import requests
+
+        globals()["requests"] = requests
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def fetch_schema(api_key: str, base_id: str = BASE_ID) -> Dict[str, Any]:
     """Fetch and return the Airtable schema for ``base_id``.
 
@@ -22,9 +36,12 @@ def fetch_schema(api_key: str, base_id: str = BASE_ID) -> Dict[str, Any]:
     base_id:
         ID of the Airtable base to query.
     """
+    import requests
+
     headers = {"Authorization": f"Bearer {api_key}"}
     url = f"https://api.airtable.com/v0/meta/bases/{base_id}/tables"
     logger.info("Fetching schema from %s", url)
+    rate_limit.acquire(url, rate_limit.BATCH)
     resp = requests.get(url, headers=headers)
     resp.raise_for_status()
     return resp.json()
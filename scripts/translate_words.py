@@ -1,40 +1,105 @@
+"""Translate French words from Airtable and generate images for them.
+
+Heavy dependencies (``requests``, ``openai``, ``PIL.Image`` and ``jinja2``)
+are imported on first use and prompt templates are loaded and compiled once,
+when first rendered, so ``--help``, argument errors and importing this module
+stay fast. Module attributes such as ``requests`` and ``openai`` still
+resolve, loading the dependency, so callers and tests can refer to them.
+"""
+
 import argparse
+import importlib
 import sys
 import logging
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import os
 import json
-import requests
-import openai
-from jinja2 import Template
-from PIL import Image
 import io
 import base64
 
-AIRTABLE_URL = "https://api.airtable.com/v0/applW7zbiH23gDDCK/french_words"
+if not __package__:
+    # Run directly as ``python scripts/translate_words.py``: make the root modules importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import airtable_rate_limit as rate_limit
+from airtable_formula import field_between, field_empty
+from airtable_stream import CHUNK_SIZE, RecordStream
+from profiling import profile_run
+
+if TYPE_CHECKING:
+    import openai
+    import requests
+    from jinja2 import Template
+
+AIRTABLE_API_URL = os.environ.get("AIRTABLE_API_URL", "https://api.airtable.com/v0")
+AIRTABLE_URL = f"{AIRTABLE_API_URL}/applW7zbiH23gDDCK/french_words"
 
 IMAGE_DIR = "/Users/michaelbevilacqua-linn/FrenchImages"
 
 # Directory that stores all prompt templates
 PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "prompts")
+BASE_PROMPT = "BASE_PROMPT.txt"
+TRANSLATE_PROMPT = "TRANSLATE_PROMPT.txt"
 
+# Module attributes imported on first access (see ``__getattr__``).
+_LAZY_MODULES = {"requests": "requests", "openai": "openai", "Image": "PIL.Image"}
 
-def _load_prompt_template(filename: str) -> Template:
-    """Return a Jinja2 template loaded from the prompts directory."""
-    path = os.path.join(PROMPTS_DIR, filename)
-    with open(path, "r", encoding="utf-8") as f:
-        return Template(f.read())
+logger = logging.getLogger(__name__)
 
 
-# Templates for the OpenAI prompts
-BASE_PROMPT_TEMPLATE = _load_prompt_template("BASE_PROMPT.txt")
-TRANSLATE_PROMPT_TEMPLATE = _load_prompt_template("TRANSLATE_PROMPT.txt")
+class BatchError(RuntimeError):
+    """Raised by a ``strict`` batch after some of its words failed."""
 
-logger = logging.getLogger(__name__)
+    def __init__(self, failed: int, total: int) -> None:
+        super().__init__(f"{failed} of {total} words failed")
+        self.failed = failed
+        self.total = total
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(module_name)
+    globals()[name] = module
+    return module
+
+
+@lru_cache(maxsize=None)
+def http_session() -> "requests.Session":
+    """Return the HTTP session shared by every request this process makes.
+
+    Reusing it keeps connections to Airtable open across words and, in the
+    batch worker, across jobs.
+    """
+    import requests
+
+    return requests.Session()
+
+
+@lru_cache(maxsize=None)
+def openai_client(api_key: str) -> "openai.OpenAI":
+    """Return a reusable OpenAI client for ``api_key``."""
+    import openai
+
+    return openai.OpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=None)
+def load_prompt_template(filename: str) -> "Template":
+    """Return the compiled Jinja2 template ``filename`` from the prompts directory."""
+    from jinja2 import Template
+
+    path = os.path.join(PROMPTS_DIR, filename)
+    with open(path, "r", encoding="utf-8") as f:
+        return Template(f.read())
 
 
 def build_url(base_url: str, params: Optional[dict] = None) -> str:
     """Return ``base_url`` with ``params`` encoded as query string."""
+    import requests
+
     req = requests.Request("GET", base_url, params=params)
     return req.prepare().url
 
@@ -64,38 +129,57 @@ def fetch_french_words(api_key: str, start: int, end: int) -> List[Tuple[str, st
     records without a ``french_word`` field are ignored. The record ID is
     returned so that callers can update the Airtable row with additional data.
     """
-    if not api_key:
-        raise ValueError("API key is required")
-    """Fetch French words whose frequency is between ``start`` and ``end``.
+    return fetch_word_field(api_key, start, end, "french_word")
+
+
+def fetch_word_field(
+    api_key: str, start: int, end: int, field: str, missing: Optional[str] = None
+) -> List[Tuple[str, str]]:
+    """Return ``(record_id, value)`` of ``field`` for frequencies ``start``-``end``.
 
-    Returns a list of words ordered by frequency. Any records without a
-    ``french_word`` field are ignored.
+    Records are ordered by frequency; records without a value are skipped.
+    With ``missing`` only records whose ``missing`` field is empty are read.
+    Every page of the range is read, and each is parsed as it streams in so
+    only the requested values are kept in memory.
     """
+    if not api_key:
+        raise ValueError("API key is required")
     headers = {"Authorization": f"Bearer {api_key}"}
-    formula = f"AND({{Frequency}} >= {start}, {{Frequency}} <= {end})"
+    formula = field_between("Frequency", start, end)
+    if missing:
+        formula = f"AND({formula}, {field_empty(missing)})"
     params = {
         "filterByFormula": formula,
+        "fields[]": field,
         "sort[0][field]": "Frequency",
         "sort[0][direction]": "asc",
     }
-    url = build_url(AIRTABLE_URL, params)
+    values: List[Tuple[str, str]] = []
     try:
-        resp = requests.get(AIRTABLE_URL, headers=headers, params=params)
-        resp.raise_for_status()
+        while True:
+            rate_limit.acquire(AIRTABLE_URL, rate_limit.BATCH)
+            resp = http_session().get(AIRTABLE_URL, headers=headers, params=params, stream=True)
+            try:
+                resp.raise_for_status()
+                page = RecordStream(resp.iter_content(CHUNK_SIZE))
+                for rec in page:
+                    value = rec.get("fields", {}).get(field)
+                    rec_id = rec.get("id")
+                    if value and rec_id:
+                        values.append((rec_id, value))
+            finally:
+                resp.close()
+            if not page.offset:
+                return values
+            params["offset"] = page.offset
     except Exception:
-        logger.error("Error fetching records. URL: %s", url, exc_info=True)
+        logger.error(
+            "Error fetching records. URL: %s",
+            build_url(AIRTABLE_URL, params),
+            exc_info=True,
+        )
         raise
 
-    data = resp.json()
-    words: List[Tuple[str, str]] = []
-    for rec in data.get("records", []):
-        fields = rec.get("fields", {})
-        word = fields.get("french_word")
-        rec_id = rec.get("id")
-        if word and rec_id:
-            words.append((rec_id, word))
-    return words
-
 
 def _parse_translation_json(content: str) -> dict:
     """Return the translation data parsed from ``content``.
@@ -117,8 +201,8 @@ def translate_word(api_key: str, word: str) -> dict:
         raise ValueError("API key is required")
 
     try:
-        client = openai.OpenAI(api_key=api_key)
-        prompt = TRANSLATE_PROMPT_TEMPLATE.render(word=word)
+        client = openai_client(api_key)
+        prompt = load_prompt_template(TRANSLATE_PROMPT).render(word=word)
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
@@ -137,8 +221,8 @@ def build_image_prompt(api_key: str, word: str) -> str:
         raise ValueError("API key is required")
     """Return a GPT-4 generated image prompt for ``word``."""
     try:
-        client = openai.OpenAI(api_key=api_key)
-        prompt_request = BASE_PROMPT_TEMPLATE.render(word=word)
+        client = openai_client(api_key)
+        prompt_request = load_prompt_template(BASE_PROMPT).render(word=word)
         response = client.chat.completions.create(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt_request}],
@@ -163,7 +247,7 @@ def generate_image(api_key: str, english_word: str, image_dir: str = IMAGE_DIR)
     prompt = build_image_prompt(api_key, english_word)
 
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = openai_client(api_key)
         response = client.images.generate(
             model="dall-e-3",
             prompt=prompt,
@@ -172,7 +256,7 @@ def generate_image(api_key: str, english_word: str, image_dir: str = IMAGE_DIR)
             n=1,
         )
         image_url = response.data[0].url
-        img_resp = requests.get(image_url)
+        img_resp = http_session().get(image_url)
         img_resp.raise_for_status()
 
         file_name = f"{english_word.replace(' ', '_')}.png"
@@ -200,6 +284,8 @@ def upload_image_to_airtable(api_key: str, image_path: str) -> str:
     str
         The attachment ID returned by Airtable.
     """
+    from PIL import Image
+
     # Resize the image to 150x150 before uploading
     with Image.open(image_path) as img:
         resized = img.resize((150, 150))
@@ -226,7 +312,8 @@ def upload_image_to_airtable(api_key: str, image_path: str) -> str:
         }
         
         # Make the request
-        response = requests.post(url, headers=headers, json=payload)
+        rate_limit.acquire(url, rate_limit.BATCH)
+        response = http_session().post(url, headers=headers, json=payload)
         response.raise_for_status()
         
         # Return the attachment ID
@@ -254,13 +341,102 @@ def update_word_record(
     if attachment_id:
         fields["image"] = [{"id": attachment_id}]
 
+    _patch_record(api_key, record_id, fields)
+
+
+def set_record_image(api_key: str, record_id: str, attachment_id: str) -> None:
+    """Point the ``image`` field of ``record_id`` at ``attachment_id``."""
+    _patch_record(api_key, record_id, {"image": [{"id": attachment_id}]})
+
+
+def _patch_record(api_key: str, record_id: str, fields: dict) -> None:
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     url = f"{AIRTABLE_URL}/{record_id}"
     payload = {"fields": fields}
-    resp = requests.patch(url, headers=headers, json=payload)
+    rate_limit.acquire(url, rate_limit.BATCH)
+    resp = http_session().patch(url, headers=headers, json=payload)
     resp.raise_for_status()
 
 
+def translate_range(
+    openai_key: str,
+    airtable_key: str,
+    start: int,
+    end: int,
+    upload: bool = False,
+    missing_only: bool = False,
+    strict: bool = False,
+) -> List[Tuple[str, dict]]:
+    """Translate the words with frequencies ``start``-``end``.
+
+    Returns ``(record_id, translation)`` pairs. Words that fail to translate
+    are logged and skipped. With ``upload`` the translations are written back
+    to Airtable; upload failures are logged and the word is still returned.
+    With ``missing_only`` words that already have an ``english_word`` are
+    skipped. With ``strict`` a :class:`BatchError` is raised once the batch
+    is done if any word failed to translate or upload.
+    """
+    if missing_only:
+        words = fetch_word_field(airtable_key, start, end, "french_word", "english_word")
+    else:
+        words = fetch_french_words(airtable_key, start, end)
+    translations = []
+    failed = 0
+    for rec_id, french_word in words:
+        try:
+            translations.append((rec_id, translate_word(openai_key, french_word)))
+        except Exception as exc:
+            failed += 1
+            print(f"Couldn't translate: {french_word}, skipping... Exception\n{exc}")
+
+    if upload:
+        for rec_id, data in translations:
+            try:
+                update_word_record(airtable_key, rec_id, data)
+            except Exception as exc:
+                failed += 1
+                logger.error(
+                    "Error uploading data for record %s: %s", rec_id, str(exc), exc_info=True
+                )
+    if strict and failed:
+        raise BatchError(failed, len(words))
+    return translations
+
+
+def generate_images_for_range(
+    openai_key: str,
+    airtable_key: str,
+    start: int,
+    end: int,
+    image_dir: str = IMAGE_DIR,
+    upload: bool = True,
+    missing_only: bool = False,
+    strict: bool = False,
+) -> List[Tuple[str, str]]:
+    """Generate an image for each word with frequencies ``start``-``end``.
+
+    Images are drawn from the record's ``english_word`` and, with ``upload``,
+    attached to the record. Returns ``(record_id, image_path)`` pairs; words
+    whose image fails are logged and skipped. With ``missing_only`` words that
+    already have an image are skipped. With ``strict`` a :class:`BatchError`
+    is raised once the batch is done if any image failed.
+    """
+    images = []
+    missing = "image" if missing_only else None
+    words = fetch_word_field(airtable_key, start, end, "english_word", missing)
+    for rec_id, english_word in words:
+        try:
+            path = generate_image(openai_key, english_word, image_dir)
+            if upload:
+                set_record_image(airtable_key, rec_id, upload_image_to_airtable(airtable_key, path))
+            images.append((rec_id, path))
+        except Exception:
+            logger.error("Error creating image for record %s", rec_id, exc_info=True)
+    if strict and len(images) < len(words):
+        raise BatchError(len(words) - len(images), len(words))
+    return images
+
+
 def main(argv: List[str] | None = None) -> int:
     """Entry point for the ``translate_words`` command.
 
@@ -302,33 +478,21 @@ def main(argv: List[str] | None = None) -> int:
 
     # Fetch range of words from Airtable and translate each
     try:
-        french_words = fetch_french_words(airtable_key, start, end)
-        translations = []
-        for rec_id, french_word in french_words:
-            try:
-                translated_data = translate_word(openai_key, french_word)
-                translations.append((rec_id, translated_data))
-            except Exception as exc:
-                print(f"Couldn't translate: {french_word}, skipping... Exception\n{exc}")
+        translations = translate_range(
+            openai_key, airtable_key, start, end, upload=args.upload_data
+        )
     except Exception as exc:
         print(f"Error fetching words: {exc}", file=sys.stderr)
         return 1
 
-    # Print the translation information and then generate images
-    for rec_id, data in translations:
+    for _, data in translations:
         print(json.dumps(data, indent=2, ensure_ascii=False))
-
-        if args.upload_data:
-            try:
-                update_word_record(airtable_key, rec_id, data)
-            except Exception as exc:
-                logger.error(
-                    "Error uploading data for record %s: %s", rec_id, str(exc), exc_info=True
-                )
-
     return 0
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    raise SystemExit(main())
+    # PROFILE_RUN=sample|cprofile profiles the whole run into PROFILE_DIR.
+    with profile_run("translate_words"):
+        status = main()
+    raise SystemExit(status)
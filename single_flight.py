@@ -0,0 +1,74 @@
+"""Coalesce concurrent identical upstream calls.
+
+When a learner double-clicks "Fetch New Set" or has two tabs open, the same
+deck is requested several times at once. :class:`SingleFlight` lets the first
+caller for a key run the upstream call while later callers with the same key
+wait for and share its result (or exception), so Airtable sees one call.
+"""
+
+import threading
+from collections import Counter
+from typing import Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key.
+
+    Keys are tuples whose first item names the kind of call (for example
+    ``("deck", user)``); counters are kept per kind.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.upstream: Counter = Counter()
+        self.saved: Counter = Counter()
+
+    def do(self, key: Tuple[Hashable, ...], fn: Callable[[], T]) -> T:
+        """Return ``fn()``, sharing the result with concurrent calls for ``key``."""
+        kind = key[0]
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream[kind] += 1
+            else:
+                self.saved[kind] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return upstream and saved call counts per kind of call."""
+        with self._lock:
+            kinds = set(self.upstream) | set(self.saved)
+            return {
+                kind: {"upstream": self.upstream[kind], "saved": self.saved[kind]}
+                for kind in sorted(kinds)
+            }
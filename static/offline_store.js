@@ -0,0 +1,198 @@
+// IndexedDB storage shared by the flashcard page and the service worker.
+//
+// Two object stores are kept, both keyed by learner so that switching
+// ``?user=`` never shows or sends one learner's data as another's:
+//   decks   - prefetched decks from /api/flashcards, consumed oldest first and
+//             dropped after DECK_TTL_MS since their due cards go stale
+//   answers - practice/forget events waiting to be sent to /api/answers
+(function (global) {
+    const DB_NAME = 'flashcards';
+    const DB_VERSION = 2;
+    const ANSWERS_URL = '/api/answers';
+    const DECKS_URL = '/api/flashcards';
+    const USER_HEADER = 'X-User-Id';
+    const DECK_TTL_MS = 6 * 3600 * 1000;
+
+    let dbPromise = null;
+
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                const req = indexedDB.open(DB_NAME, DB_VERSION);
+                req.onupgradeneeded = (e) => {
+                    const db = req.result;
+                    if (e.oldVersion < 1) {
+                        db.createObjectStore('answers', { keyPath: 'id', autoIncrement: true });
+                    } else {
+                        // Version 1 decks have no learner; drop them.
+                        db.deleteObjectStore('decks');
+                    }
+                    const decks = db.createObjectStore('decks', { autoIncrement: true });
+                    decks.createIndex('user', 'user');
+                    // Answers queued by version 1 have no learner and are
+                    // still sent with the page's cookie, as before.
+                    req.transaction.objectStore('answers').createIndex('user', 'user');
+                };
+                req.onsuccess = () => resolve(req.result);
+                req.onerror = () => reject(req.error);
+            });
+        }
+        return dbPromise;
+    }
+
+    // Run ``fn`` against ``storeName`` and resolve with its request result once
+    // the transaction commits.
+    function withStore(storeName, mode, fn) {
+        return openDb().then(db => new Promise((resolve, reject) => {
+            const tx = db.transaction(storeName, mode);
+            const req = fn(tx.objectStore(storeName));
+            tx.oncomplete = () => resolve(req ? req.result : undefined);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        }));
+    }
+
+    function userHeaders(user) {
+        return user === undefined ? {} : { [USER_HEADER]: user };
+    }
+
+    // Walk ``user``'s decks oldest first, deleting expired ones. With ``take``
+    // the first fresh deck is removed and resolved; otherwise the cards of
+    // every fresh deck are.
+    function scanDecks(user, take) {
+        return openDb().then(db => new Promise((resolve, reject) => {
+            const tx = db.transaction('decks', 'readwrite');
+            const oldest = Date.now() - DECK_TTL_MS;
+            const fresh = [];
+            let deck = null;
+            const index = tx.objectStore('decks').index('user');
+            index.openCursor(IDBKeyRange.only(user)).onsuccess = (e) => {
+                const cursor = e.target.result;
+                if (!cursor) {
+                    return;
+                }
+                if (cursor.value.stored < oldest) {
+                    cursor.delete();
+                } else if (take) {
+                    deck = cursor.value.cards;
+                    cursor.delete();
+                    return;
+                } else {
+                    fresh.push(cursor.value.cards);
+                }
+                cursor.continue();
+            };
+            tx.oncomplete = () => resolve(take ? deck : fresh);
+            tx.onerror = () => reject(tx.error);
+        }));
+    }
+
+    function countDecks(user) {
+        return scanDecks(user, false).then(decks => decks.length);
+    }
+
+    function putDeck(user, cards) {
+        return withStore('decks', 'readwrite',
+            store => store.add({ user, cards, stored: Date.now() }));
+    }
+
+    // Remove and return ``user``'s oldest fresh deck, or null when none are left.
+    function takeDeck(user) {
+        return scanDecks(user, true);
+    }
+
+    // Fetch decks for ``user`` until ``target`` are stored. No deck repeats a
+    // card from ``exclude`` (the deck on screen) or from another stored deck,
+    // so studying them offline in turn never shows a card twice at a stale
+    // level. Failures are ignored; the next call will try again.
+    async function topUpDecks(user, target, exclude = []) {
+        const decks = await scanDecks(user, false);
+        const skip = new Set(exclude.map(String));
+        decks.forEach(cards => cards.forEach(card => skip.add(String(card.frequency))));
+        let stored = decks.length;
+        while (stored < target) {
+            const query = skip.size ? '?exclude=' + [...skip].join(',') : '';
+            const resp = await fetch(DECKS_URL + query, { headers: userHeaders(user) });
+            if (!resp.ok) {
+                return stored;
+            }
+            const cards = await resp.json();
+            if (!cards.length) {
+                return stored;
+            }
+            await putDeck(user, cards);
+            cards.forEach(card => skip.add(String(card.frequency)));
+            stored += 1;
+        }
+        return stored;
+    }
+
+    function enqueueAnswer(user, frequency, outcome) {
+        const event = { user, frequency, outcome, timestamp: new Date().toISOString() };
+        return withStore('answers', 'readwrite', store => store.add(event));
+    }
+
+    function pendingAnswers() {
+        return withStore('answers', 'readonly', store => store.getAll());
+    }
+
+    function removeAnswers(ids) {
+        return withStore('answers', 'readwrite', store => {
+            ids.forEach(id => store.delete(id));
+            return null;
+        });
+    }
+
+    // Send one learner's queued answers in a single POST. Events the server
+    // applied or rejected as invalid are dropped; events that failed upstream
+    // stay queued.
+    async function flushUser(user, pending) {
+        const resp = await fetch(ANSWERS_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', ...userHeaders(user) },
+            body: JSON.stringify(pending.map(({ frequency, outcome, timestamp }) =>
+                ({ frequency, outcome, timestamp }))),
+        });
+        if (!resp.ok) {
+            throw new Error(`answer sync failed: ${resp.status}`);
+        }
+        const { results } = await resp.json();
+        const done = pending
+            .filter((event, i) => results[i] && results[i].status !== 'error')
+            .map(event => event.id);
+        await removeAnswers(done);
+        return done.length;
+    }
+
+    // Send every queued answer, one POST per learner.
+    let flushing = null;
+    function flushAnswers() {
+        if (flushing) {
+            return flushing;
+        }
+        flushing = (async () => {
+            const byUser = new Map();
+            for (const event of await pendingAnswers()) {
+                if (!byUser.has(event.user)) {
+                    byUser.set(event.user, []);
+                }
+                byUser.get(event.user).push(event);
+            }
+            let sent = 0;
+            for (const [user, pending] of byUser) {
+                sent += await flushUser(user, pending);
+            }
+            return sent;
+        })().finally(() => { flushing = null; });
+        return flushing;
+    }
+
+    global.OfflineStore = {
+        countDecks,
+        enqueueAnswer,
+        flushAnswers,
+        pendingAnswers,
+        takeDeck,
+        topUpDecks,
+    };
+})(self);
@@ -0,0 +1,70 @@
+// Service worker for the flashcard app.
+//
+// The deck page embeds a learner and their deck and is sent with
+// ``Cache-Control: no-store``, so it is never cached. When it cannot be
+// loaded, the user-neutral offline shell is served instead, which shows the
+// learner's next deck from IndexedDB (see offline_store.js). Queued
+// practice/forget answers are flushed with Background Sync when the browser
+// supports it.
+importScripts('/static/offline_store.js');
+
+const SHELL_CACHE = 'flashcards-shell-v3';
+const PAGE_URL = '/flashcards_airtable';
+const OFFLINE_URL = '/flashcards_airtable/offline';
+const SHELL_URLS = [OFFLINE_URL, '/static/offline_store.js'];
+const SYNC_TAG = 'flush-answers';
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(SHELL_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key !== SHELL_CACHE).map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function storable(resp) {
+    return resp.ok && !/no-store/.test(resp.headers.get('Cache-Control') || '');
+}
+
+// Requests are network first so an online learner always gets a fresh deck;
+// cached copies are only used when the network fails.
+self.addEventListener('fetch', (event) => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET') {
+        return;
+    }
+    if (url.pathname === PAGE_URL) {
+        event.respondWith(fetch(event.request).catch(() => caches.match(OFFLINE_URL)));
+        return;
+    }
+    if (!SHELL_URLS.includes(url.pathname)) {
+        return;
+    }
+    event.respondWith(
+        fetch(event.request)
+            .then(resp => {
+                if (storable(resp)) {
+                    const copy = resp.clone();
+                    caches.open(SHELL_CACHE).then(cache => cache.put(url.pathname, copy));
+                }
+                return resp;
+            })
+            .catch(() => caches.match(url.pathname))
+    );
+});
+
+self.addEventListener('sync', (event) => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(OfflineStore.flushAnswers());
+    }
+});
@@ -0,0 +1,157 @@
+"""Bulk export and import of the Airtable tables as columnar files.
+
+``export_words`` streams the french_words table into a
+:class:`word_store.WordStore` and saves it as a :mod:`columnar_file`; the app
+maps that file at startup when ``VOCABULARY_FILE`` points to it, and serves
+card content from it instead of querying Airtable. ``export_reviews`` saves
+the spaced_rep table the same way.
+
+The import functions write a file back to an (empty) base with batched
+creates. Imported words carry their writable fields only: the AI-generated
+``english_translation`` is recomputed by Airtable and images must be
+generated again.
+"""
+
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+import airtable_data_access as data
+import airtable_rate_limit as rate_limit
+from columnar_file import TEXT, ColumnarFile, write_columns
+from word_store import WordStore
+
+logger = logging.getLogger(__name__)
+
+# spaced_rep columns, all stored as text; ``Stability`` and ``Ease`` are only
+# set by the adaptive scheduler.
+REVIEW_COLUMNS = ("Frequency", "Level", "Date", "User") + data.MEMORY_FIELDS
+# french_words fields written by an import, by file column.
+WORD_IMPORT_FIELDS = {
+    "front": "french_word",
+    "english_word": "english_word",
+    "gender": "gender",
+    "part_of_speech": "part_of_speech",
+    "example_1": "example_1",
+    "example_2": "example_2",
+}
+
+
+def _headers(api_key: str) -> dict:
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def export_words(api_key: str, path: str) -> int:
+    """Write every french_words record to ``path``; return the word count."""
+    english: Dict[int, Optional[str]] = {}
+
+    def records() -> Iterator[dict]:
+        params = {"fields[]": list(data.DECK_FIELDS) + ["english_word"]}
+        for rec in data.iter_records(
+            data.AIRTABLE_URL, _headers(api_key), params, rate_limit.BATCH
+        ):
+            fields = rec.get("fields", {})
+            english[data.parse_frequency(fields.get("Frequency"))] = fields.get("english_word")
+            yield rec
+
+    store = WordStore.from_records(records())
+    count = store.save(path, extra={"english_word": [english.get(f) for f in store]})
+    logger.info("Exported %d words to %s", count, path)
+    return count
+
+
+def export_reviews(api_key: str, path: str) -> int:
+    """Write every spaced_rep row (all users) to ``path``; return the row count."""
+    columns: Dict[str, List[Optional[str]]] = {name: [] for name in REVIEW_COLUMNS}
+    params = {"fields[]": list(REVIEW_COLUMNS)}
+    for rec in data.iter_records(
+        data.SPACED_REP_URL, _headers(api_key), params, rate_limit.BATCH
+    ):
+        fields = rec.get("fields", {})
+        for name in REVIEW_COLUMNS:
+            value = fields.get(name)
+            columns[name].append(None if value is None else str(value))
+    count = write_columns(path, {name: (TEXT, values) for name, values in columns.items()})
+    logger.info("Exported %d review rows to %s", count, path)
+    return count
+
+
+def create_records(api_key: str, url: str, rows: Iterator[dict]) -> int:
+    """Create ``rows`` (field dicts) in batches; return the number created.
+
+    Errors are logged and raised; rows in earlier batches stay created.
+    """
+    headers = dict(_headers(api_key), **{"Content-Type": "application/json"})
+    created = 0
+    batch: List[dict] = []
+
+    def flush() -> None:
+        nonlocal created
+        payload = {"records": [{"fields": fields} for fields in batch], "typecast": True}
+        try:
+            rate_limit.acquire(url, rate_limit.BATCH)
+            resp = data.http.post(url, headers=headers, json=payload)
+            resp.raise_for_status()
+        except Exception:
+            data.log_airtable_error("Error importing records", url, payload)
+            raise
+        created += len(batch)
+        batch.clear()
+
+    for fields in rows:
+        batch.append(fields)
+        if len(batch) == data.WRITE_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    return created
+
+
+def import_words(api_key: str, path: str) -> int:
+    """Create a french_words record for every word in ``path``."""
+    with ColumnarFile(path) as table:
+        names = [name for name in WORD_IMPORT_FIELDS if name in table]
+
+        def rows() -> Iterator[dict]:
+            for i, freq in enumerate(table["frequency"]):
+                fields = {"Frequency": freq}
+                for name in names:
+                    value = table[name][i]
+                    if value is not None:
+                        fields[WORD_IMPORT_FIELDS[name]] = value
+                yield fields
+
+        return create_records(api_key, data.AIRTABLE_URL, rows())
+
+
+def import_reviews(api_key: str, path: str) -> int:
+    """Create a spaced_rep row for every row in ``path``."""
+    with ColumnarFile(path) as table:
+
+        def rows() -> Iterator[dict]:
+            for i in range(len(table)):
+                fields = {name: table[name][i] for name in REVIEW_COLUMNS if name in table}
+                for name in data.MEMORY_FIELDS:
+                    if fields.get(name) is not None:
+                        fields[name] = float(fields[name])
+                yield {name: value for name, value in fields.items() if value is not None}
+
+        return create_records(api_key, data.SPACED_REP_URL, rows())
+
+
+def load_word_store(path: Optional[str] = None) -> Optional[WordStore]:
+    """Map the vocabulary file at ``path`` (default ``VOCABULARY_FILE``), if any.
+
+    Returns ``None`` when no file is configured or it cannot be opened, in
+    which case cards are fetched from Airtable as before.
+    """
+    path = path or os.environ.get("VOCABULARY_FILE")
+    if not path:
+        return None
+    try:
+        store = WordStore.open(path)
+    except (OSError, ValueError):
+        logger.warning("Could not open vocabulary file %s", path, exc_info=True)
+        return None
+    logger.info("Mapped %d words from %s", len(store), path)
+    return store
@@ -0,0 +1,5 @@
+import os
+
+# Unit tests mock every HTTP call, so client-side rate limiting would only slow
+# them down. Tests of the limiter itself construct their own RateLimiter.
+os.environ["AIRTABLE_RATE_LIMIT"] = "off"
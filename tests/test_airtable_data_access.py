@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 import unittest
@@ -6,22 +7,36 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from airtable_data_access import (
+    fetch_card_content,
     fetch_flashcards,
+    fetch_image,
+    fetch_review_state,
     fetch_spaced_rep_frequencies,
+    log_answers,
     log_practice,
     log_forget,
     log_airtable_error,
+    next_level,
     build_url,
     AIRTABLE_URL,
+    DECK_FIELDS,
     SPACED_REP_URL,
     Flashcard
 )
 
 
+def list_response(body):
+    """Return a mock list response whose body is streamed in small chunks."""
+    data = json.dumps(body).encode("utf-8")
+    resp = MagicMock()
+    resp.iter_content.return_value = [data[i : i + 16] for i in range(0, len(data), 16)]
+    return resp
+
+
 class FetchFlashcardsTests(unittest.TestCase):
     @patch("airtable_data_access.get_random_frequencies")
     @patch("airtable_data_access.fetch_spaced_rep_frequencies")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_query_parameters(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -43,13 +58,15 @@ class FetchFlashcardsTests(unittest.TestCase):
         args, kwargs = mock_get.call_args
         self.assertEqual(args[0], AIRTABLE_URL)
         self.assertEqual(kwargs["headers"], {"Authorization": "Bearer TOKEN"})
-        spaced_map = dict(mock_spaced.return_value)
-        unique_randoms = [i for i in mock_rand.return_value if i not in spaced_map]
-        selected = list(spaced_map.keys()) + unique_randoms[: 25 - len(spaced_map)]
-        formula = "OR(" + ",".join([f'{{Frequency}} = "{i}"' for i in selected]) + ")"
+        # 101-105 plus the first 20 randoms (10-29) compress into two spans.
+        formula = (
+            "OR(AND({Frequency} >= 10, {Frequency} <= 29),"
+            "AND({Frequency} >= 101, {Frequency} <= 105))"
+        )
         expected_params = {
             "maxRecords": 25,
             "filterByFormula": formula,
+            "fields[]": list(DECK_FIELDS),
             "sort[0][field]": "Frequency",
             "sort[0][direction]": "asc",
         }
@@ -59,7 +76,7 @@ class FetchFlashcardsTests(unittest.TestCase):
         "airtable_data_access.get_random_frequencies", return_value=list(range(1, 26))
     )
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_parses_flashcards(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -113,7 +130,7 @@ class FetchFlashcardsTests(unittest.TestCase):
 
     @patch("airtable_data_access.get_random_frequencies", return_value=list(range(1, 26)))
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_parses_additional_fields(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -156,7 +173,7 @@ class FetchFlashcardsTests(unittest.TestCase):
         "airtable_data_access.get_random_frequencies", return_value=list(range(1, 26))
     )
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_handles_translation_dict(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -199,7 +216,7 @@ class FetchFlashcardsTests(unittest.TestCase):
         "airtable_data_access.get_random_frequencies", return_value=list(range(1, 26))
     )
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[(2, 3)])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_assigns_levels(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -238,7 +255,7 @@ class FetchFlashcardsTests(unittest.TestCase):
         "airtable_data_access.get_random_frequencies", return_value=list(range(1, 26))
     )
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_handles_float_frequency(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -277,7 +294,7 @@ class FetchFlashcardsTests(unittest.TestCase):
         "airtable_data_access.get_random_frequencies", return_value=list(range(1, 26))
     )
     @patch("airtable_data_access.fetch_spaced_rep_frequencies", return_value=[(2, 4)])
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_assigns_levels_with_float_frequency(self, mock_get, mock_spaced, mock_rand):
         mock_resp = MagicMock()
         mock_resp.raise_for_status.return_value = None
@@ -312,8 +329,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             ],
         )
 
-    @patch("airtable_data_access.requests.post")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.get")
     def test_log_practice_creates_row(self, mock_get, mock_post):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -338,8 +355,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             {"fields": {"Date": "2023-01-01", "Frequency": "3", "Level": "1"}},
         )
 
-    @patch("airtable_data_access.requests.patch")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
     def test_log_practice_updates_row(self, mock_get, mock_patch):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -365,8 +382,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             kwargs["json"], {"fields": {"Date": "2023-01-01", "Level": "3"}}
         )
 
-    @patch("airtable_data_access.requests.patch")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
     def test_log_practice_caps_level(self, mock_get, mock_patch):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -389,8 +406,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             kwargs["json"], {"fields": {"Date": "2023-01-01", "Level": "5"}}
         )
 
-    @patch("airtable_data_access.requests.post")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.get")
     def test_log_forget_creates_row(self, mock_get, mock_post):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -415,8 +432,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             {"fields": {"Date": "2023-01-01", "Frequency": "3", "Level": "1"}},
         )
 
-    @patch("airtable_data_access.requests.patch")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
     def test_log_forget_updates_row(self, mock_get, mock_patch):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -442,8 +459,8 @@ class FetchFlashcardsTests(unittest.TestCase):
             kwargs["json"], {"fields": {"Date": "2023-01-01", "Level": "2"}}
         )
 
-    @patch("airtable_data_access.requests.patch")
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
     def test_log_forget_mins_level(self, mock_get, mock_patch):
         get_resp = MagicMock()
         get_resp.raise_for_status.return_value = None
@@ -468,7 +485,7 @@ class FetchFlashcardsTests(unittest.TestCase):
 
 
 class SpacedRepFrequencyTests(unittest.TestCase):
-    @patch("airtable_data_access.requests.get")
+    @patch("airtable_data_access.http.get")
     def test_fetch_spaced_rep_frequencies(self, mock_get):
         responses = []
         for lvl in range(1, 6):
@@ -488,6 +505,7 @@ class SpacedRepFrequencyTests(unittest.TestCase):
             self.assertEqual(kwargs["headers"], headers)
             params = kwargs["params"]
             self.assertEqual(params["maxRecords"], 5)
+            self.assertEqual(params["fields[]"], "Frequency")
             self.assertEqual(params["sort[0][field]"], "Date")
             self.assertEqual(params["sort[0][direction]"], "asc")
             self.assertIn(f"{{Level}} = '{i}'", params["filterByFormula"])
@@ -496,6 +514,339 @@ class SpacedRepFrequencyTests(unittest.TestCase):
         self.assertEqual(freqs, expected)
 
 
+class MultiUserTests(unittest.TestCase):
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.get")
+    def test_log_practice_scopes_to_user(self, mock_get, mock_post):
+        get_resp = MagicMock()
+        get_resp.json.return_value = {"records": []}
+        mock_get.return_value = get_resp
+        mock_post.return_value = MagicMock()
+
+        self.assertTrue(log_practice("TOKEN", "3", "2023-01-01", user="alice"))
+
+        self.assertEqual(
+            mock_get.call_args.kwargs["params"]["filterByFormula"],
+            "AND({User} = 'alice', {Frequency} = '3')",
+        )
+        self.assertEqual(
+            mock_post.call_args.kwargs["json"],
+            {
+                "fields": {
+                    "Date": "2023-01-01",
+                    "Frequency": "3",
+                    "Level": "1",
+                    "User": "alice",
+                }
+            },
+        )
+
+    @patch("airtable_data_access.http.get")
+    def test_spaced_rep_queries_scope_to_user(self, mock_get):
+        resp = MagicMock()
+        resp.json.return_value = {"records": []}
+        mock_get.return_value = resp
+
+        fetch_spaced_rep_frequencies("TOKEN", user="bob")
+
+        for call in mock_get.call_args_list:
+            self.assertTrue(
+                call.kwargs["params"]["filterByFormula"].startswith("AND({User} = 'bob', ")
+            )
+
+    @patch("airtable_data_access.http.get")
+    def test_fetch_review_state(self, mock_get):
+        mock_get.return_value = list_response(
+            {
+                "records": [
+                    {"fields": {"Frequency": "3", "Level": "2", "Date": "2024-01-01"}},
+                    {"fields": {"Frequency": "4", "Level": "bad", "Date": "2024-01-02"}},
+                    {"fields": {"Level": "2"}},
+                ]
+            }
+        )
+
+        state = fetch_review_state("TOKEN", "alice")
+
+        self.assertEqual(
+            mock_get.call_args.kwargs["params"]["filterByFormula"], "{User} = 'alice'"
+        )
+        self.assertEqual(state, {"3": (2, "2024-01-01"), "4": (1, "2024-01-02")})
+
+
+class FetchCardContentTests(unittest.TestCase):
+    @patch("airtable_data_access.http.get")
+    def test_returns_content_with_hash(self, mock_get):
+        resp = MagicMock()
+        resp.raise_for_status.return_value = None
+        resp.json.return_value = {
+            "records": [
+                {
+                    "id": "rec1",
+                    "fields": {
+                        "french_word": "chat",
+                        "english_translation": {"value": "cat"},
+                        "Frequency": 3,
+                        "image": [{"id": "att1", "url": "https://img/1.png"}],
+                    },
+                }
+            ]
+        }
+        mock_get.return_value = resp
+
+        content = fetch_card_content("TOKEN", 3)
+
+        args, kwargs = mock_get.call_args
+        self.assertEqual(args[0], AIRTABLE_URL)
+        self.assertEqual(kwargs["params"]["filterByFormula"], "{Frequency} = '3'")
+        self.assertNotIn("Frequency", kwargs["params"]["fields[]"])
+        self.assertEqual(content["word"], "chat")
+        self.assertEqual(content["translation"], "cat")
+        self.assertEqual(content["image_url"], "https://img/1.png")
+        self.assertEqual(content["record_id"], "rec1")
+
+        resp.json.return_value["records"][0]["fields"]["french_word"] = "chien"
+        self.assertNotEqual(
+            fetch_card_content("TOKEN", 3)["content_hash"], content["content_hash"]
+        )
+
+    @patch("airtable_data_access.http.get")
+    def test_fields_decoded_by_type(self, mock_get):
+        resp = MagicMock()
+        resp.raise_for_status.return_value = None
+        resp.json.return_value = {
+            "records": [{"id": "rec1", "fields": {"english_translation": "cat", "image": None}}]
+        }
+        mock_get.return_value = resp
+
+        content = fetch_card_content("TOKEN", 3)
+
+        self.assertEqual(content["word"], "")
+        self.assertEqual(content["translation"], "cat")
+        self.assertIsNone(content["image_url"])
+
+    @patch("airtable_data_access.http.get")
+    def test_missing_record(self, mock_get):
+        resp = MagicMock()
+        resp.raise_for_status.return_value = None
+        resp.json.return_value = {"records": []}
+        mock_get.return_value = resp
+
+        self.assertIsNone(fetch_card_content("TOKEN", 3))
+
+    @patch("airtable_data_access.http.get", side_effect=RuntimeError("down"))
+    def test_errors_are_raised(self, mock_get):
+        with self.assertLogs("airtable_data_access", level="ERROR"):
+            with self.assertRaises(RuntimeError):
+                fetch_card_content("TOKEN", 3)
+
+
+class FetchImageTests(unittest.TestCase):
+    @patch("airtable_data_access.http.get")
+    def test_downloads_largest_thumbnail_of_matching_attachment(self, mock_get):
+        lookup = MagicMock()
+        lookup.json.return_value = {
+            "records": [
+                {
+                    "fields": {
+                        "image": [
+                            {"id": "attOld", "url": "https://img/old.png"},
+                            {
+                                "id": "attNew",
+                                "url": "https://img/new.png",
+                                "thumbnails": {"large": {"url": "https://img/new-l.png"}},
+                            },
+                        ]
+                    }
+                }
+            ]
+        }
+        download = MagicMock(content=b"PNG")
+        mock_get.side_effect = [lookup, download]
+
+        self.assertEqual(fetch_image("TOKEN", 3, "attNew"), b"PNG")
+        self.assertEqual(mock_get.call_args_list[0].kwargs["params"]["fields[]"], "image")
+        self.assertEqual(mock_get.call_args_list[1].args[0], "https://img/new-l.png")
+
+    @patch("airtable_data_access.http.get")
+    def test_unknown_attachment(self, mock_get):
+        mock_get.return_value.json.return_value = {"records": [{"fields": {}}]}
+        self.assertIsNone(fetch_image("TOKEN", 3, "attNew"))
+        mock_get.assert_called_once()
+
+
+class LogAnswersTests(unittest.TestCase):
+    def test_next_level(self):
+        self.assertEqual(next_level(2, "practice"), 3)
+        self.assertEqual(next_level("5", "practice"), 5)
+        self.assertEqual(next_level(3, "forget"), 2)
+        self.assertEqual(next_level(1, "forget"), 1)
+        self.assertEqual(next_level(None, "practice"), 1)
+        self.assertEqual(next_level(None, "forget"), 1)
+
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
+    def test_batches_lookup_and_writes(self, mock_get, mock_patch, mock_post):
+        mock_get.return_value = list_response(
+            {
+                "records": [
+                    {"id": "rec3", "fields": {"Frequency": "3", "Level": "2"}},
+                    {"id": "rec4", "fields": {"Frequency": "4", "Level": "1"}},
+                ]
+            }
+        )
+        mock_patch.return_value = MagicMock()
+        mock_post.return_value = MagicMock()
+
+        results = log_answers(
+            "TOKEN",
+            [
+                ("3", "practice", "2024-01-01"),
+                ("4", "forget", "2024-01-01"),
+                ("9", "practice", "2024-01-01"),
+                ("3", "practice", "2024-01-02"),
+                ("9", "practice", "2024-01-02"),
+            ],
+        )
+
+        self.assertEqual(results, [True] * 5)
+        mock_get.assert_called_once()
+        params = mock_get.call_args.kwargs["params"]
+        self.assertEqual(
+            params["filterByFormula"],
+            "AND({User} = '', "
+            "OR({Frequency} = '3',{Frequency} = '4',{Frequency} = '9'))",
+        )
+        mock_patch.assert_called_once()
+        args, kwargs = mock_patch.call_args
+        self.assertEqual(args[0], SPACED_REP_URL)
+        self.assertEqual(
+            kwargs["json"],
+            {
+                "records": [
+                    {"id": "rec3", "fields": {"Date": "2024-01-02", "Level": "4"}},
+                    {"id": "rec4", "fields": {"Date": "2024-01-01", "Level": "1"}},
+                ]
+            },
+        )
+        mock_post.assert_called_once()
+        self.assertEqual(
+            mock_post.call_args.kwargs["json"],
+            {
+                "records": [
+                    {"fields": {"Date": "2024-01-02", "Level": "2", "Frequency": "9"}}
+                ]
+            },
+        )
+
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.get")
+    def test_writes_in_chunks_of_ten(self, mock_get, mock_post):
+        mock_get.return_value = list_response({"records": []})
+        ok = MagicMock()
+        failed = MagicMock()
+        failed.raise_for_status.side_effect = RuntimeError("429")
+        mock_post.side_effect = [ok, failed]
+
+        answers = [(str(i), "practice", "2024-01-01") for i in range(1, 13)]
+        with self.assertLogs("airtable_data_access", level="ERROR"):
+            results = log_answers("TOKEN", answers)
+
+        self.assertEqual(mock_post.call_count, 2)
+        sizes = [len(c.kwargs["json"]["records"]) for c in mock_post.call_args_list]
+        self.assertEqual(sizes, [10, 2])
+        self.assertEqual(results, [True] * 10 + [False] * 2)
+
+    @patch("airtable_data_access.http.get")
+    def test_follows_offset(self, mock_get):
+        first = list_response({"records": [], "offset": "itr1"})
+        second = list_response({"records": []})
+        mock_get.side_effect = [first, second, RuntimeError("unexpected")]
+
+        with patch("airtable_data_access.http.post") as mock_post:
+            log_answers("TOKEN", [("3", "forget", "2024-01-01")])
+            mock_post.assert_called_once()
+
+        self.assertEqual(mock_get.call_args_list[1].kwargs["params"]["offset"], "itr1")
+        first.close.assert_called_once()
+        second.close.assert_called_once()
+
+    @patch("airtable_data_access.http.get", side_effect=RuntimeError("down"))
+    def test_lookup_failure_fails_every_answer(self, mock_get):
+        with self.assertLogs("airtable_data_access", level="ERROR"):
+            results = log_answers("TOKEN", [("3", "practice", "2024-01-01")] * 2)
+        self.assertEqual(results, [False, False])
+
+
+@patch("airtable_data_access.SCHEDULER", "adaptive")
+class AdaptiveSchedulerTests(unittest.TestCase):
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
+    def test_log_practice_updates_stability_and_ease(self, mock_get, mock_patch):
+        get_resp = MagicMock()
+        get_resp.json.return_value = {
+            "records": [
+                {
+                    "id": "rec123",
+                    "fields": {"Level": "2", "Date": "2024-01-01", "Stability": 10, "Ease": 2.5},
+                }
+            ]
+        }
+        mock_get.return_value = get_resp
+        mock_patch.return_value = MagicMock()
+
+        self.assertTrue(log_practice("TOKEN", "3", "2024-01-11"))
+
+        self.assertEqual(
+            mock_get.call_args.kwargs["params"]["fields[]"],
+            ["Level", "Date", "Stability", "Ease"],
+        )
+        self.assertEqual(
+            mock_patch.call_args.kwargs["json"],
+            {"fields": {"Date": "2024-01-11", "Level": "3", "Stability": 25.0, "Ease": 2.55}},
+        )
+
+    @patch("airtable_data_access.http.post")
+    @patch("airtable_data_access.http.patch")
+    @patch("airtable_data_access.http.get")
+    def test_log_answers_seeds_ladder_rows(self, mock_get, mock_patch, mock_post):
+        mock_get.return_value = list_response(
+            {"records": [{"id": "rec3", "fields": {"Frequency": "3", "Level": "3"}}]}
+        )
+        mock_patch.return_value = MagicMock()
+        mock_post.return_value = MagicMock()
+
+        results = log_answers(
+            "TOKEN", [("3", "forget", "2024-01-01"), ("9", "practice", "2024-01-01")]
+        )
+
+        self.assertEqual(results, [True, True])
+        self.assertEqual(
+            mock_patch.call_args.kwargs["json"]["records"][0]["fields"],
+            {"Date": "2024-01-01", "Level": "2", "Stability": 4.2, "Ease": 2.3},
+        )
+        self.assertEqual(
+            mock_post.call_args.kwargs["json"]["records"][0]["fields"],
+            {"Date": "2024-01-01", "Level": "1", "Stability": 4.0, "Ease": 2.5, "Frequency": "9"},
+        )
+
+    @patch("airtable_data_access.http.get")
+    def test_fetch_review_state_includes_memory(self, mock_get):
+        mock_get.return_value = list_response(
+            {
+                "records": [
+                    {"fields": {"Frequency": "3", "Level": "2", "Date": "2024-01-01", "Stability": 8}},
+                ]
+            }
+        )
+
+        state = fetch_review_state("TOKEN", "alice")
+
+        self.assertIn("Stability", mock_get.call_args.kwargs["params"]["fields[]"])
+        self.assertEqual(state, {"3": (2, "2024-01-01", 8, None)})
+
+
 class BuildUrlTests(unittest.TestCase):
     def test_build_url_encodes_params(self):
         url = build_url("https://example.com/api", {"a": "1", "b": "x y"})
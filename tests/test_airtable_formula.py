@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from airtable_formula import (
+    compress_ranges,
+    field_between,
+    field_equals,
+    field_in,
+    level_due,
+    quote,
+)
+
+
+class QuoteTests(unittest.TestCase):
+    def test_escapes_quotes_and_backslashes(self):
+        self.assertEqual(quote("l'ami"), "'l\\'ami'")
+        self.assertEqual(quote("a\\b"), "'a\\\\b'")
+
+    def test_field_equals_escapes_value(self):
+        self.assertEqual(
+            field_equals("Frequency", "3') OR (1"), "{Frequency} = '3\\') OR (1'"
+        )
+
+
+class LevelDueTests(unittest.TestCase):
+    def test_with_age(self):
+        self.assertEqual(
+            level_due(2, 7),
+            "AND({Level} = '2', IS_BEFORE({Date}, DATEADD(TODAY(), -7, 'day')))",
+        )
+
+    def test_without_age(self):
+        self.assertEqual(level_due(5, None), "{Level} = '5'")
+
+
+class FieldInTests(unittest.TestCase):
+    def test_compress_ranges(self):
+        self.assertEqual(
+            compress_ranges([5, 1, 2, 3, 9, 2, 6]), [(1, 3), (5, 6), (9, 9)]
+        )
+
+    def test_short_runs_use_equality(self):
+        self.assertEqual(
+            field_in("Frequency", [8, 4, 5]),
+            "OR({Frequency} = '4',{Frequency} = '5',{Frequency} = '8')",
+        )
+
+    def test_long_runs_use_ranges(self):
+        self.assertEqual(
+            field_in("Frequency", ["12", 10, 11, 40]),
+            "OR(AND({Frequency} >= 10, {Frequency} <= 12),{Frequency} = '40')",
+        )
+
+    def test_order_independent(self):
+        self.assertIs(field_in("Frequency", [3, 1, 2]), field_in("Frequency", [1, 2, 3]))
+
+    def test_text_values_without_ranges(self):
+        self.assertEqual(
+            field_in("Frequency", ["3", 1, "2", "3"], ranges=False),
+            "OR({Frequency} = '1',{Frequency} = '2',{Frequency} = '3')",
+        )
+
+    def test_empty(self):
+        self.assertEqual(field_in("Frequency", []), "FALSE()")
+
+    def test_field_between(self):
+        self.assertEqual(
+            field_between("Frequency", 1, 20),
+            "AND({Frequency} >= 1, {Frequency} <= 20)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
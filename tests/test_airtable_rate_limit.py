@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_rate_limit
+from airtable_rate_limit import BATCH, INTERACTIVE, RateLimiter, bucket_for
+
+URL = "https://api.airtable.com/v0/applW7zbiH23gDDCK/french_words"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "limit.sqlite3")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def limiter(self):
+        return RateLimiter(self.path, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_bucket_for(self):
+        self.assertEqual(bucket_for(URL), "applW7zbiH23gDDCK")
+        self.assertEqual(
+            bucket_for("https://api.airtable.com/v0/meta/bases/appABC/tables"), "appABC"
+        )
+        self.assertEqual(bucket_for("https://example.com/x"), "default")
+
+    def test_burst_then_refill(self):
+        limiter = self.limiter()
+        for _ in range(5):
+            self.assertEqual(limiter.acquire(URL), 0.0)
+        self.assertAlmostEqual(limiter.try_acquire("applW7zbiH23gDDCK"), 0.2)
+        self.assertAlmostEqual(limiter.acquire(URL), 0.2)
+
+    def test_state_is_shared_between_limiters(self):
+        first, second = self.limiter(), self.limiter()
+        for _ in range(5):
+            first.acquire(URL)
+        self.assertGreater(second.try_acquire("applW7zbiH23gDDCK"), 0)
+
+    def test_batch_leaves_reserve_for_interactive(self):
+        limiter = self.limiter()
+        bucket = "applW7zbiH23gDDCK"
+        for _ in range(3):
+            self.assertEqual(limiter.try_acquire(bucket, BATCH), 0.0)
+        self.assertGreater(limiter.try_acquire(bucket, BATCH), 0.0)
+        self.assertEqual(limiter.try_acquire(bucket, INTERACTIVE), 0.0)
+        self.assertEqual(limiter.try_acquire(bucket, INTERACTIVE), 0.0)
+
+    def test_batch_yields_after_interactive_wait(self):
+        limiter = self.limiter()
+        bucket = "applW7zbiH23gDDCK"
+        for _ in range(5):
+            limiter.try_acquire(bucket, INTERACTIVE)
+        self.assertGreater(limiter.try_acquire(bucket, INTERACTIVE), 0.0)
+        # Enough time for the bucket to refill, but within the grace period.
+        self.clock.now += 0.9
+        self.assertAlmostEqual(limiter.try_acquire(bucket, BATCH), 0.1)
+        self.clock.now += 0.1
+        self.assertEqual(limiter.try_acquire(bucket, BATCH), 0.0)
+
+    def test_can_be_disabled(self):
+        with patch.dict(os.environ, {"AIRTABLE_RATE_LIMIT": "off"}):
+            self.assertIsNone(airtable_rate_limit.get_limiter())
+            self.assertEqual(airtable_rate_limit.acquire(URL), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
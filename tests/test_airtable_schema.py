@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_schema
+from airtable_schema import (
+    BUNDLED_SCHEMA,
+    CACHE_VERSION,
+    cache_is_current,
+    compile_decoder,
+    load_schema,
+    normalize,
+    read_cache,
+    save_schema,
+    to_int,
+)
+
+META_RESPONSE = {
+    "tables": [
+        {
+            "name": "french_words",
+            "fields": [
+                {"name": "Frequency", "type": "number"},
+                {"name": "french_word", "type": "singleLineText"},
+                {"name": "english_translation", "type": "aiText"},
+            ],
+        }
+    ]
+}
+
+
+class ToIntTests(unittest.TestCase):
+    def test_accepts_numbers_and_numeric_strings(self):
+        self.assertEqual(to_int(12), 12)
+        self.assertEqual(to_int(12.7), 12)
+        self.assertEqual(to_int("12"), 12)
+        self.assertEqual(to_int(" 12.0 "), 12)
+
+    def test_rejects_everything_else(self):
+        for value in (None, "", "abc", "1e", float("nan"), float("inf"), {}, []):
+            self.assertIsNone(to_int(value), value)
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "schema.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_change_detection(self):
+        self.assertTrue(save_schema(META_RESPONSE, self.path))
+        self.assertEqual(read_cache(self.path), normalize(META_RESPONSE))
+        self.assertFalse(save_schema(META_RESPONSE, self.path))
+
+    def test_cache_is_compared_with_the_remote_schema(self):
+        self.assertFalse(cache_is_current(META_RESPONSE, self.path))
+        save_schema(META_RESPONSE, self.path)
+        self.assertTrue(cache_is_current(META_RESPONSE, self.path))
+        remote = normalize(META_RESPONSE)
+        remote["french_words"]["Frequency"] = "singleLineText"
+        self.assertFalse(cache_is_current(remote, self.path))
+
+    def test_cached_tables_override_bundled_ones(self):
+        save_schema(META_RESPONSE, self.path)
+        schema = load_schema(self.path)
+        self.assertNotIn("gender", schema["french_words"])
+        self.assertEqual(schema["spaced_rep"], BUNDLED_SCHEMA["spaced_rep"])
+
+    def test_rejects_other_version_or_tampered_cache(self):
+        save_schema(META_RESPONSE, self.path)
+        with open(self.path, encoding="utf-8") as f:
+            payload = json.load(f)
+        for change in ({"version": CACHE_VERSION + 1}, {"tables": {"x": {}}}):
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({**payload, **change}, f)
+            with self.assertLogs(airtable_schema.logger, "WARNING"):
+                self.assertIsNone(read_cache(self.path))
+            self.assertEqual(load_schema(self.path), BUNDLED_SCHEMA)
+
+    def test_missing_cache_uses_bundled_schema(self):
+        self.assertIsNone(read_cache(self.path))
+        self.assertEqual(load_schema(self.path), BUNDLED_SCHEMA)
+
+
+class DecoderTests(unittest.TestCase):
+    def test_converts_fields_by_type(self):
+        decode = compile_decoder(
+            BUNDLED_SCHEMA,
+            "french_words",
+            ["french_word", "english_translation", "Frequency", "image", "extra"],
+        )
+        record = {
+            "fields": {
+                "french_word": "chat",
+                "english_translation": {"state": "generated", "value": "cat"},
+                "Frequency": 42.0,
+                "extra": 1,
+            }
+        }
+        self.assertEqual(decode(record), ("chat", "cat", 42, [], 1))
+        self.assertEqual(decode({}), (None, None, None, [], None))
+        self.assertEqual(decode.fields[2], "Frequency")
+
+    def test_raw_fields_are_not_converted(self):
+        decode = compile_decoder(BUNDLED_SCHEMA, "french_words", ["Frequency"], raw=["Frequency"])
+        self.assertEqual(decode({"fields": {"Frequency": 2.0}}), (2.0,))
+
+    def test_convert_overrides_the_field_type(self):
+        decode = compile_decoder(
+            BUNDLED_SCHEMA, "spaced_rep", ["Frequency", "Level"], convert={"Level": to_int}
+        )
+        self.assertEqual(decode({"fields": {"Frequency": "7", "Level": "2"}}), ("7", 2))
+        self.assertEqual(decode({"fields": {"Level": "bad"}}), (None, None))
+
+    def test_single_field_decodes_to_tuple(self):
+        decode = compile_decoder(BUNDLED_SCHEMA, "spaced_rep", ["Frequency"])
+        self.assertEqual(decode({"fields": {"Frequency": "7"}}), ("7",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_stream
+from airtable_stream import RecordStream, StreamError
+
+BODY = {
+    "records": [
+        {
+            "id": f"rec{i}",
+            "createdTime": "2024-01-01T00:00:00.000Z",
+            "fields": {"Frequency": i, "french_word": "été" * i, "image": [{"w": 1.5}]},
+        }
+        for i in range(1, 40)
+    ],
+    "offset": "itr1/rec39",
+}
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class RecordStreamTests(unittest.TestCase):
+    def parse(self, chunks, **kwargs):
+        stream = RecordStream(chunks, use_ijson=False, **kwargs)
+        return list(stream), stream
+
+    def test_any_chunking_gives_the_same_records(self):
+        data = json.dumps(BODY, ensure_ascii=False, indent=2).encode("utf-8")
+        for size in (1, 2, 5, 64, len(data)):
+            records, stream = self.parse(chunked(data, size))
+            self.assertEqual(records, BODY["records"], size)
+            self.assertEqual(stream.offset, "itr1/rec39")
+
+    def test_members_before_records_and_numbers_split_across_chunks(self):
+        records, stream = self.parse([b'{"offset": 12', b'3, "records": [{"a": 1', b"0}]}"])
+        self.assertEqual(records, [{"a": 10}])
+        self.assertEqual(stream.fields, {"offset": 123})
+
+    def test_empty_page_has_no_offset(self):
+        records, stream = self.parse([b'{"records": []}'])
+        self.assertEqual(records, [])
+        self.assertIsNone(stream.offset)
+
+    def test_records_are_yielded_before_the_body_ends(self):
+        def chunks():
+            yield b'{"records": [{"id": "rec1"}, '
+            raise AssertionError("read past the first record")
+
+        self.assertEqual(next(iter(RecordStream(chunks(), use_ijson=False))), {"id": "rec1"})
+
+    def test_truncated_or_malformed_body(self):
+        for body in (b'{"records": [{"id": 1}', b'{"records": [{"id": 1},', b"[]"):
+            with self.assertRaises(StreamError, msg=body):
+                self.parse([body])
+
+    @unittest.skipIf(airtable_stream.ijson is None, "ijson is not installed")
+    def test_ijson_matches_the_fallback(self):
+        data = json.dumps(BODY).encode("utf-8")
+        stream = RecordStream(chunked(data, 100), use_ijson=True)
+        self.assertEqual(list(stream), BODY["records"])
+        self.assertEqual(stream.offset, "itr1/rec39")
+
+
+if __name__ == "__main__":
+    unittest.main()
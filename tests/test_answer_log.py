@@ -0,0 +1,182 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_data_access as data
+import app as app_module
+import scheduler
+from answer_log import AnswerLog, AnswerLogJob, fold
+from benchmarks.fake_airtable import FakeAirtable
+from review_state import ReviewStateCache
+
+DAY = 86400
+
+
+class AnswerLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "answers.sqlite3")
+        self.now = [1000.0 * DAY]
+        self.log = self.open()
+        self.log.seed("ann", {"3": (2, "2024-01-01"), "9": (5, "2023-06-01")})
+
+    def open(self, model="ladder"):
+        return AnswerLog(self.path, model=model, retain_days=30, clock=lambda: self.now[0])
+
+    def test_concurrent_answers_are_all_applied(self):
+        # Two tabs answering the same card both count, in arrival order.
+        other_tab = self.open()
+        self.log.append("ann", "3", "practice", "2024-02-01")
+        other_tab.append("ann", "3", "practice", "2024-02-01")
+        self.log.append_many("ann", [("4", "forget", "2024-02-02"), ("3", "forget", "2024-02-02")])
+
+        self.assertEqual(
+            self.log.state("ann"),
+            {"3": (3, "2024-02-02"), "4": (1, "2024-02-02"), "9": (5, "2023-06-01")},
+        )
+        self.assertEqual(self.log.state("bob"), {})
+
+    def test_seed_only_once(self):
+        self.assertTrue(self.log.seeded("ann"))
+        self.assertFalse(self.log.seeded("bob"))
+        self.assertFalse(self.open().seed("ann", {}))
+        self.assertEqual(len(self.log.state("ann")), 2)
+
+    def test_snapshot_and_compaction_keep_state(self):
+        self.log.append("ann", "3", "practice", "2024-02-01")
+        self.log.append("ann", "9", "forget", "2024-02-01")
+        before = self.log.state("ann")
+        self.assertEqual(self.log.snapshot(), 2)
+        self.assertEqual(self.log.snapshot(), 0)
+        self.assertEqual(self.log.state("ann"), before)
+
+        # Unsynced answers are never dropped, however old.
+        self.now[0] += 60 * DAY
+        self.assertEqual(self.log.compact(), 0)
+        self.assertEqual(self.log.sync(lambda user, rows: set()), 2)
+        self.log.append("ann", "3", "practice", "2024-02-03")
+        self.assertEqual(self.log.compact(), 2)
+        self.assertEqual(self.log.counts(), {"events": 1, "unsynced": 1, "users": 1})
+        self.assertEqual(
+            self.log.state("ann"), fold("ladder", before, [("3", "practice", "2024-02-03")])
+        )
+
+    def test_rebuild_for_another_scheduler(self):
+        self.log.append("ann", "3", "practice", "2024-02-01")
+        self.log.append("ann", "3", "practice", "2024-03-01")
+        self.log.snapshot()
+
+        adaptive = self.open("adaptive").state("ann")
+        self.assertEqual(len(adaptive["3"]), 4)
+        self.assertEqual(adaptive["3"][:2], (4, "2024-03-01"))
+        # The history is replayed rather than the stability guessed from the level.
+        self.assertNotEqual(adaptive["3"][2], scheduler.card_memory(4, None, None)[0])
+
+        self.log.rebuild("ladder")
+        self.assertEqual(self.log.state("ann")["3"], (4, "2024-03-01"))
+
+    def test_sync_retries_failed_cards(self):
+        self.log.append("ann", "3", "practice", "2024-02-01")
+        self.log.append("ann", "9", "practice", "2024-02-01")
+        pushed = []
+
+        def push(user, rows):
+            pushed.append((user, rows))
+            return {"9"} if len(pushed) == 1 else set()
+
+        self.assertEqual(self.log.sync(push), 1)
+        self.assertEqual(pushed[0], ("ann", {"3": (3, "2024-02-01"), "9": (5, "2024-02-01")}))
+        self.assertEqual(self.log.sync(push), 1)
+        self.assertEqual(pushed[1], ("ann", {"9": (5, "2024-02-01")}))
+        self.assertEqual(self.log.sync(push), 0)
+
+    def test_job_compacts_hourly(self):
+        clock = [0.0]
+        job = AnswerLogJob(self.log, lambda user, rows: set(), clock=lambda: clock[0])
+        with patch.object(self.log, "compact") as mock_compact:
+            job.run_once()
+            clock[0] += 60
+            job.run_once()
+            clock[0] += 3600
+            job.run_once()
+        self.assertEqual(mock_compact.call_count, 2)
+
+
+class AppAnswerLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.fake = FakeAirtable()
+        self.fake.start()
+        self.addCleanup(self.fake.stop)
+        self.fake.insert(
+            "spaced_rep", {"Frequency": "3", "Level": "2", "Date": "2024-01-01", "User": "ann"}
+        )
+        self.log = AnswerLog(os.path.join(self.tmp.name, "answers.sqlite3"))
+        for p in (
+            patch.object(data, "SPACED_REP_URL", f"{self.fake.url}/{data.BASE_ID}/spaced_rep"),
+            patch.object(app_module, "answer_log", self.log),
+            patch.object(app_module, "answer_log_job", None),
+            patch.object(app_module, "review_cache", ReviewStateCache()),
+            patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"}),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.stop_job)
+        self.client = app_module.app.test_client()
+
+    def stop_job(self):
+        if app_module.answer_log_job is not None:
+            app_module.answer_log_job.stop()
+            app_module.answer_log_job.join(1)
+
+    def test_answers_are_logged_then_synced(self):
+        with patch("app.log_answers") as mock_log:
+            resp = self.client.post(
+                "/api/answers",
+                json=[
+                    {"frequency": "3", "outcome": "practice", "timestamp": "2024-02-01"},
+                    {"frequency": "3", "outcome": "practice", "timestamp": "2024-02-02"},
+                    {"frequency": "8", "outcome": "forget", "timestamp": "2024-02-02"},
+                ],
+                headers={"X-User-Id": "ann"},
+            )
+        self.assertEqual([r["status"] for r in resp.get_json()["results"]], ["ok"] * 3)
+        mock_log.assert_not_called()
+        self.assertEqual(self.log.state("ann")["3"], (4, "2024-02-02"))
+
+        self.log.sync(lambda user, rows: data.write_review_state("TOKEN", rows, user))
+        rows = {
+            f["Frequency"]: (f["Level"], f["Date"], f.get("User"))
+            for f in (r["fields"] for r in self.fake.records("spaced_rep"))
+        }
+        self.assertEqual(rows, {"3": ("4", "2024-02-02", "ann"), "8": ("1", "2024-02-02", "ann")})
+
+    def test_sync_job_starts_on_first_answer(self):
+        # As under a WSGI server: nothing runs the app's ``__main__`` block.
+        self.assertIsNone(app_module.answer_log_job)
+        with patch("app.write_review_state", wraps=data.write_review_state) as mock_write:
+            self.client.post(
+                "/api/answers",
+                json=[{"frequency": "3", "outcome": "forget", "timestamp": "2024-02-01"}],
+                headers={"X-User-Id": "ann"},
+            )
+            job = app_module.answer_log_job
+            self.assertTrue(job.is_alive())
+            self.assertIs(job.log, self.log)
+            self.assertEqual(job.run_once(), 1)
+        mock_write.assert_called_once_with("TOKEN", {"3": (1, "2024-02-01")}, "ann")
+        [row] = self.fake.records("spaced_rep")
+        self.assertEqual((row["fields"]["Level"], row["fields"]["Date"]), ("1", "2024-02-01"))
+
+        app_module.start_answer_log_job()
+        self.assertIs(app_module.answer_log_job, job)
+
+
+if __name__ == "__main__":
+    unittest.main()
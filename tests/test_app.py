@@ -0,0 +1,222 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app as app_module
+from app import answer_date, app
+from frequency_sampler import VocabularySampler
+from review_state import ReviewStateCache
+
+
+class AnswerDateTests(unittest.TestCase):
+    def test_converts_to_utc_date(self):
+        self.assertEqual(answer_date("2024-03-01T23:30:00-02:00"), "2024-03-02")
+        self.assertEqual(answer_date("2024-03-01T10:00:00.000Z"), "2024-03-01")
+
+    def test_invalid_timestamp(self):
+        self.assertIsNone(answer_date("yesterday"))
+
+
+@patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"})
+class RecordAnswersTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch("app.log_answers", return_value=[True, False])
+    def test_applies_valid_events_in_one_batch(self, mock_log):
+        resp = self.client.post(
+            "/api/answers",
+            json=[
+                {"frequency": "3", "outcome": "practice", "timestamp": "2024-01-02T08:00:00Z"},
+                {"frequency": "5", "outcome": "skip"},
+                {"frequency": 4, "outcome": "forget", "timestamp": "2024-01-03T08:00:00Z"},
+                {"outcome": "practice"},
+            ],
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.get_json()["results"],
+            [
+                {"frequency": "3", "status": "ok"},
+                {"frequency": "5", "status": "invalid"},
+                {"frequency": 4, "status": "error"},
+                {"frequency": None, "status": "invalid"},
+            ],
+        )
+        mock_log.assert_called_once_with(
+            "TOKEN",
+            [("3", "practice", "2024-01-02"), ("4", "forget", "2024-01-03")],
+            user="",
+        )
+
+    @patch("app.log_answers", return_value=[True])
+    def test_updates_cached_state_for_user(self, mock_log):
+        with patch("app.review_cache") as mock_cache:
+            self.client.post(
+                "/api/answers",
+                json=[{"frequency": "3", "outcome": "practice", "timestamp": "2024-01-02"}],
+                headers={"X-User-Id": "alice"},
+            )
+
+        self.assertEqual(mock_log.call_args.kwargs["user"], "alice")
+        mock_cache.apply.assert_called_once_with("alice", "3", "practice", "2024-01-02")
+
+    @patch("app.log_practice", return_value=True)
+    def test_practice_uses_cookie_user(self, mock_practice):
+        self.client.set_cookie("user_id", "bob")
+        resp = self.client.post("/api/practice", json={"frequency": "3"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(mock_practice.call_args.kwargs["user"], "bob")
+
+    @patch("app.log_answers", return_value=[True])
+    def test_empty_header_selects_default_user(self, mock_log):
+        # Answers queued offline carry their learner, even after the cookie changed.
+        self.client.set_cookie("user_id", "bob")
+        self.client.post(
+            "/api/answers",
+            json=[{"frequency": "3", "outcome": "forget"}],
+            headers={"X-User-Id": ""},
+        )
+
+        self.assertEqual(mock_log.call_args.kwargs["user"], "")
+
+    def test_requires_array(self):
+        resp = self.client.post("/api/answers", json={"frequency": "3"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_service_worker_served_from_root(self):
+        resp = self.client.get("/sw.js")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.cache_control.no_cache)
+        self.assertIn(b"importScripts", resp.get_data())
+        resp.close()
+
+
+@patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"})
+class DeckTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch("app.fetch_max_frequency", return_value=30)
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", return_value={"7": (1, "2000-01-01"), "8": (2, "2099-01-01")})
+    def test_deck_uses_cached_due_cards(self, mock_state, mock_fetch, mock_size):
+        with patch("app.review_cache", ReviewStateCache()), patch(
+            "app.vocabulary", VocabularySampler()
+        ):
+            resp = self.client.get("/flashcards_airtable?user=carol")
+            self.client.get("/flashcards_airtable")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("user_id=carol", resp.headers["Set-Cookie"])
+        mock_state.assert_called_once_with("TOKEN", "carol")
+        mock_size.assert_called_once_with("TOKEN")
+        kwargs = mock_fetch.call_args.kwargs
+        self.assertEqual(kwargs["user"], "carol")
+        self.assertEqual(kwargs["spaced_pairs"], [(7, 1)])
+        # Filler words are distinct and skip every tracked word.
+        self.assertEqual(len(set(kwargs["filler"])), 25)
+        self.assertFalse({7, 8} & set(kwargs["filler"]))
+        self.assertTrue(all(1 <= f <= 30 for f in kwargs["filler"]))
+
+    @patch("app.fetch_max_frequency", return_value=30)
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", return_value={"7": (1, "2000-01-01")})
+    def test_due_queue_job_starts_with_first_deck(self, mock_state, mock_fetch, mock_size):
+        # As under a WSGI server: nothing runs the app's ``__main__`` block.
+        cache = ReviewStateCache()
+        with patch("app.review_cache", cache), patch(
+            "app.vocabulary", VocabularySampler()
+        ), patch("app.due_queue_job", None):
+            self.client.get("/api/flashcards", headers={"X-User-Id": "carol"})
+            job = app_module.due_queue_job
+            self.addCleanup(job.stop)
+            app_module.start_due_queue_job()
+            self.assertIs(app_module.due_queue_job, job)
+
+        self.assertTrue(job.is_alive())
+        self.assertIs(job.cache, cache)
+        cache.invalidate("carol")
+        cache.get("carol", lambda: {"7": (1, "2000-01-01")})
+        self.assertEqual(job.run_once(), 1)
+
+    @patch("app.fetch_max_frequency", side_effect=RuntimeError("down"))
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", side_effect=RuntimeError("down"))
+    def test_falls_back_to_airtable_queries(self, mock_state, mock_fetch, mock_size):
+        with patch("app.review_cache", ReviewStateCache()), patch(
+            "app.vocabulary", VocabularySampler()
+        ):
+            with self.assertLogs("app", level="WARNING"):
+                self.client.get("/flashcards_airtable")
+
+        self.assertEqual(
+            mock_fetch.call_args.kwargs,
+            {"user": "", "spaced_pairs": None, "filler": None, "store": None},
+        )
+
+    @patch("app.fetch_max_frequency")
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", return_value={})
+    def test_mapped_vocabulary_replaces_word_queries(self, mock_state, mock_fetch, mock_size):
+        store = MagicMock(max_frequency=40)
+        with patch("app.review_cache", ReviewStateCache()), patch(
+            "app.vocabulary", VocabularySampler()
+        ), patch("app.word_store", store):
+            self.client.get("/flashcards_airtable")
+
+        mock_size.assert_not_called()
+        kwargs = mock_fetch.call_args.kwargs
+        self.assertIs(kwargs["store"], store)
+        self.assertTrue(all(1 <= f <= 40 for f in kwargs["filler"]))
+
+    @patch("app.build_deck", return_value=[])
+    def test_stats_reports_coalescing(self, mock_build):
+        with patch("app.upstream_flight") as mock_flight:
+            mock_flight.stats.return_value = {"deck": {"upstream": 2, "saved": 1}}
+            resp = self.client.get("/api/stats")
+
+        self.assertEqual(
+            resp.get_json()["coalescing"], {"deck": {"upstream": 2, "saved": 1}}
+        )
+
+    @patch("app.build_deck", return_value=[])
+    def test_page_names_user_for_offline_store(self, mock_build):
+        resp = self.client.get("/flashcards_airtable?user=carol")
+        self.assertIn(b'const USER = OFFLINE_SHELL ? shellUser() : "carol";', resp.data)
+        self.assertIn(b"const OFFLINE_SHELL = false;", resp.data)
+
+    @patch("app.build_deck")
+    def test_offline_shell_has_no_learner_or_deck(self, mock_build):
+        resp = self.client.get("/flashcards_airtable/offline")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"const OFFLINE_SHELL = true;", resp.data)
+        self.assertNotIn(b"data-frequency=", resp.data)
+        mock_build.assert_not_called()
+
+    @patch("app.fetch_max_frequency", return_value=30)
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", return_value={"7": (1, "2000-01-01"), "9": (1, "2000-01-01")})
+    def test_prefetched_decks_exclude_held_cards(self, mock_state, mock_fetch, mock_size):
+        with patch("app.review_cache", ReviewStateCache()), patch(
+            "app.vocabulary", VocabularySampler()
+        ):
+            resp = self.client.get("/api/flashcards?exclude=7,3,x,4", headers={"X-User-Id": "carol"})
+
+        self.assertEqual(resp.status_code, 200)
+        kwargs = mock_fetch.call_args.kwargs
+        self.assertEqual(kwargs["spaced_pairs"], [(9, 1)])
+        self.assertFalse({3, 4, 7, 9} & set(kwargs["filler"]))
+
+    def test_rejects_invalid_user(self):
+        resp = self.client.get("/flashcards_airtable?user=a%20b")
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+from jinja2 import Environment, FileSystemLoader
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from airtable_data_access import Flashcard
+from card_fragments import FRAGMENT_TEMPLATE, LEVEL_COLORS, FragmentCache, fragment_key
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+
+
+def make_cache(max_size=4096):
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=True)
+    return FragmentCache(env.get_template(FRAGMENT_TEMPLATE), max_size=max_size)
+
+
+class FragmentCacheTests(unittest.TestCase):
+    def test_renders_card_content(self):
+        cache = make_cache()
+        card = Flashcard(
+            front="chat",
+            back="cat",
+            frequency="3",
+            level="2",
+            gender="masculine",
+            part_of_speech="noun",
+            example_1="<b>le chat</b>",
+        )
+        html = cache.render(card)
+        self.assertIn('data-frequency="3"', html)
+        self.assertIn("masculine noun", html)
+        self.assertIn(LEVEL_COLORS["2"], html)
+        self.assertIn("&lt;b&gt;le chat&lt;/b&gt;", html)
+
+    def test_missing_level_defaults_to_one(self):
+        html = make_cache().render(Flashcard(front="a", back="b", frequency="1"))
+        self.assertIn(LEVEL_COLORS["1"], html)
+
+    def test_reuses_fragments(self):
+        cache = make_cache()
+        card = Flashcard(front="chat", back="cat", frequency="3", level="1")
+        first = cache.render(card)
+        second = cache.render(Flashcard(front="chat", back="cat", frequency="3", level="1"))
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_changes_with_level_and_content(self):
+        card = Flashcard(front="chat", back="cat", frequency="3", level="1")
+        keys = {
+            fragment_key(card),
+            fragment_key(Flashcard(front="chat", back="cat", frequency="3", level="2")),
+            fragment_key(Flashcard(front="chat", back="kitty", frequency="3", level="1")),
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = make_cache(max_size=2)
+        cards = [Flashcard(front=str(i), back="x", frequency=str(i)) for i in range(3)]
+        cache.render_deck(cards)
+        self.assertEqual(len(cache), 2)
+        cache.render(cards[0])
+        self.assertEqual(cache.misses, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_data_access as data
+from airtable_formula import field_in, for_user, level_due
+from benchmarks.fake_airtable import FakeAirtable, Formula, FormulaError
+
+TODAY = date(2024, 5, 20)
+
+
+class FormulaTests(unittest.TestCase):
+    def test_field_in_with_ranges(self):
+        formula = Formula(field_in("Frequency", [1, 2, 3, 4, 9]))
+        matched = [n for n in range(1, 11) if formula.matches({"Frequency": n}, TODAY)]
+        self.assertEqual(matched, [1, 2, 3, 4, 9])
+
+    def test_text_frequency_matches_numeric_literal(self):
+        formula = Formula(field_in("Frequency", [7, 8], ranges=False))
+        self.assertTrue(formula.matches({"Frequency": "7"}, TODAY))
+        self.assertFalse(formula.matches({"Frequency": "70"}, TODAY))
+
+    def test_level_due_and_user(self):
+        formula = Formula(for_user("", level_due(2, 7)))
+        self.assertTrue(formula.matches({"Level": "2", "Date": "2024-05-01"}, TODAY))
+        self.assertFalse(formula.matches({"Level": "2", "Date": "2024-05-19"}, TODAY))
+        self.assertFalse(
+            formula.matches({"Level": "2", "Date": "2024-05-01", "User": "bob"}, TODAY)
+        )
+
+    def test_invalid_formula(self):
+        with self.assertRaises(FormulaError):
+            Formula("AND({Level} = ")
+
+
+class DataAccessAgainstFakeTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeAirtable(today=lambda: TODAY)
+        cls.fake.start()
+        cls.fake.seed_vocabulary(250)
+        cls.patches = [
+            patch.object(data, "AIRTABLE_URL", f"{cls.fake.url}/{data.BASE_ID}/french_words"),
+            patch.object(data, "SPACED_REP_URL", f"{cls.fake.url}/{data.BASE_ID}/spaced_rep"),
+        ]
+        for p in cls.patches:
+            p.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for p in cls.patches:
+            p.stop()
+        cls.fake.stop()
+
+    def test_list_records_follows_offset(self):
+        records = data.list_records(data.AIRTABLE_URL, {"Authorization": "Bearer k"})
+        self.assertEqual(len(records), 250)
+
+    def test_vocabulary_size_and_filler(self):
+        self.assertEqual(data.fetch_max_frequency("k"), 250)
+        cards = data.fetch_flashcards("k", user="nobody", filler=[240, 3, 3000, 17])
+        self.assertEqual([c.frequency for c in cards], ["3", "17", "240"])
+
+    def test_answers_then_fetch(self):
+        results = data.log_answers(
+            "k", [("11", "practice", "2024-05-01"), ("12", "forget", "2024-05-01")], user="ann"
+        )
+        self.assertEqual(results, [True, True])
+        state = data.fetch_review_state("k", "ann")
+        self.assertEqual(state["11"][0], 1)
+        self.assertEqual(state["12"][0], 1)
+
+        cards = data.fetch_flashcards("k", user="ann")
+        self.assertEqual(len(cards), 25)
+        by_freq = {c.frequency: c for c in cards}
+        self.assertEqual(by_freq["11"].level, "1")
+        self.assertEqual(by_freq["11"].front, "mot11")
+
+    def test_reads_are_projected_and_gzipped(self):
+        sent, json_bytes = self.fake.bytes_sent, self.fake.json_bytes
+        content = data.fetch_card_content("k", 7)
+        self.assertEqual(content["word"], "mot7")
+        self.assertEqual(content["image_url"], "https://example.invalid/7.png")
+        self.assertLess(self.fake.bytes_sent - sent, self.fake.json_bytes - json_bytes)
+        self.assertIn("gzip", data.http.headers["Accept-Encoding"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import unittest
 from unittest.mock import patch, MagicMock
 
@@ -21,6 +24,17 @@ class FetchSchemaTests(unittest.TestCase):
         self.assertEqual(kwargs["headers"], {"Authorization": "Bearer TOKEN"})
         self.assertEqual(result, {"tables": []})
 
+    def test_runs_as_a_script(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        out = subprocess.run(
+            [sys.executable, os.path.join(root, "scripts", "fetch_airtable_schema.py"), "--help"],
+            cwd=os.path.dirname(root),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertIn("--base-id", out)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import unittest
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from frequency_sampler import FrequencySampler, VocabularySampler
+
+
+class FrequencySamplerTests(unittest.TestCase):
+    def test_samples_are_distinct_and_skip_excluded(self):
+        sampler = FrequencySampler(50, rng=random.Random(3))
+        exclude = set(range(1, 41, 2))
+        for _ in range(50):
+            picked = sampler.sample(25, exclude)
+            self.assertEqual(len(set(picked)), 25)
+            self.assertFalse(exclude & set(picked))
+
+    def test_sampling_leaves_weights_untouched(self):
+        sampler = FrequencySampler(100, rng=random.Random(4))
+        cumulative = list(sampler._cumulative)
+        sampler.sample(10, [1, 1, 2, 0, 500])
+        self.assertEqual(sampler._cumulative, cumulative)
+
+    def test_exclusion_keeps_relative_weights(self):
+        sampler = FrequencySampler(6, rng=random.Random(6))
+        counts = Counter(sampler.sample(1, [1, 3, 5])[0] for _ in range(12000))
+        # Weights 1/2 : 1/4 : 1/6, i.e. 54.5% : 27.3% : 18.2%.
+        self.assertEqual(set(counts), {2, 4, 6})
+        self.assertAlmostEqual(counts[2] / 12000, 0.545, delta=0.02)
+        self.assertAlmostEqual(counts[6] / 12000, 0.182, delta=0.02)
+
+    def test_returns_what_is_left(self):
+        sampler = FrequencySampler(5)
+        self.assertEqual(sorted(sampler.sample(10, [2, 4])), [1, 3, 5])
+        self.assertEqual(FrequencySampler(0).sample(3), [])
+
+    def test_favours_common_words(self):
+        sampler = FrequencySampler(4, rng=random.Random(5))
+        counts = Counter(sampler.sample(1)[0] for _ in range(12000))
+        # Weights 1 : 1/2 : 1/3 : 1/4, i.e. 48% : 24% : 16% : 12%.
+        self.assertAlmostEqual(counts[1] / 12000, 0.48, delta=0.02)
+        self.assertAlmostEqual(counts[4] / 12000, 0.12, delta=0.02)
+
+
+class VocabularySamplerTests(unittest.TestCase):
+    def test_refreshes_size_after_ttl_and_keeps_last_on_failure(self):
+        now = [0.0]
+        vocab = VocabularySampler(ttl=10, clock=lambda: now[0])
+        first = vocab.get(lambda: 100)
+        self.assertEqual(len(first), 100)
+        self.assertIs(vocab.get(lambda: 200), first)
+
+        now[0] = 11
+        second = vocab.get(lambda: 200)
+        self.assertEqual(len(second), 200)
+
+        now[0] = 22
+        self.assertIs(vocab.get(lambda: 1 / 0), second)
+
+    def test_raises_without_sampler(self):
+        with self.assertRaises(ZeroDivisionError):
+            VocabularySampler().get(lambda: 1 / 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import gzip
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+
+CONTENT = {
+    "frequency": 3,
+    "word": "chat",
+    "translation": "cat",
+    "gender": "masculine",
+    "part_of_speech": "noun",
+    "example_1": "le chat dort " * 40,
+    "example_2": None,
+    "image_url": None,
+}
+
+
+def content_result():
+    return dict(CONTENT, record_id="rec1", content_hash="abc")
+
+
+@patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"})
+class CardContentTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch("app.fetch_card_content", side_effect=lambda *a: content_result())
+    def test_sets_strong_etag_and_cache_control(self, mock_fetch):
+        resp = self.client.get("/api/cards/3")
+
+        mock_fetch.assert_called_once_with("TOKEN", 3)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_etag(), ("rec1-abc", False))
+        self.assertTrue(resp.cache_control.public)
+        self.assertEqual(resp.cache_control.max_age, 300)
+        self.assertEqual(resp.get_json(), CONTENT)
+
+    @patch("app.fetch_card_content", side_effect=lambda *a: content_result())
+    def test_if_none_match_returns_304(self, mock_fetch):
+        resp = self.client.get("/api/cards/3", headers={"If-None-Match": '"rec1-abc"'})
+
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.get_data(), b"")
+
+    @patch("app.fetch_card_content", side_effect=lambda *a: content_result())
+    def test_gzip_encoding_and_etag(self, mock_fetch):
+        resp = self.client.get("/api/cards/3", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp.headers["Vary"])
+        self.assertEqual(resp.get_etag(), ("rec1-abc-gzip", False))
+        self.assertIn(b"le chat dort", gzip.decompress(resp.get_data()))
+
+        again = self.client.get(
+            "/api/cards/3",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": '"rec1-abc-gzip"'},
+        )
+        self.assertEqual(again.status_code, 304)
+
+    @patch("app.fetch_card_content", side_effect=lambda *a: content_result())
+    def test_range_requests_are_not_compressed(self, mock_fetch):
+        resp = self.client.get(
+            "/api/cards/3", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-10"}
+        )
+
+        self.assertNotIn("Content-Encoding", resp.headers)
+        self.assertEqual(resp.get_etag(), ("rec1-abc", False))
+
+    @patch("app.fetch_card_content", side_effect=lambda *a: content_result())
+    def test_revalidation_skips_compression(self, mock_fetch):
+        with patch("http_caching.gzip.compress") as mock_compress:
+            resp = self.client.get(
+                "/api/cards/3",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": '"rec1-abc-gzip"'},
+            )
+
+        self.assertEqual(resp.status_code, 304)
+        mock_compress.assert_not_called()
+
+    @patch("app.fetch_card_content", return_value=None)
+    def test_missing_card(self, mock_fetch):
+        resp = self.client.get("/api/cards/99")
+
+        self.assertEqual(resp.status_code, 404)
+        self.assertTrue(resp.cache_control.no_store)
+
+    @patch("app.fetch_card_content", side_effect=RuntimeError("boom"))
+    def test_upstream_failure(self, mock_fetch):
+        resp = self.client.get("/api/cards/3")
+
+        self.assertEqual(resp.status_code, 502)
+        self.assertIsNone(resp.get_etag()[0])
+
+    @patch("app.build_deck", return_value=[])
+    def test_deck_page_is_not_stored(self, mock_fetch):
+        resp = self.client.get("/flashcards_airtable")
+
+        self.assertTrue(resp.cache_control.private)
+        self.assertTrue(resp.cache_control.no_store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PIL import Image
+
+from airtable_rate_limit import RateLimiter
+from app import app
+from image_cache import IMMUTABLE_MAX_AGE, VARIANTS, ImageCache
+
+
+def png_bytes(width=1024, height=768):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+class ImageCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ImageCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_every_variant_once(self):
+        calls = []
+
+        def download():
+            calls.append(1)
+            return png_bytes()
+
+        path = self.cache.get(12, "attABC123", "card", download)
+        thumb = self.cache.get(12, "attABC123", "thumb", download)
+        self.assertEqual(thumb, self.cache.path("attABC123", "thumb"))
+        self.assertEqual(len(calls), 1)
+        for variant, size in VARIANTS.items():
+            with Image.open(self.cache.path("attABC123", variant)) as image:
+                self.assertEqual(image.format, "WEBP")
+                self.assertEqual(max(image.size), size)
+        self.assertTrue(path.endswith("card.webp"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_concurrent_misses_download_once(self):
+        calls = []
+        started = threading.Event()
+
+        def download():
+            calls.append(1)
+            started.wait(1)
+            return png_bytes(64, 64)
+
+        threads = [
+            threading.Thread(target=self.cache.get, args=(12, "attXYZ", "thumb", download))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        started.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_rejects_unknown_variants_and_ids(self):
+        self.assertIsNone(self.cache.get(12, "attABC", "huge", png_bytes))
+        self.assertIsNone(self.cache.get(12, "../etc", "card", png_bytes))
+        self.assertIsNone(self.cache.get(12, "attGONE", "card", lambda: None))
+
+    def test_missing_ids_are_remembered(self):
+        now = [0.0]
+        cache = ImageCache(self.tmp.name, missing_ttl=60, clock=lambda: now[0])
+        calls = []
+
+        def download():
+            calls.append(1)
+            return None
+
+        for _ in range(3):
+            self.assertIsNone(cache.get(12, "attGONE", "card", download))
+        self.assertEqual(len(calls), 1)
+        now[0] = 61
+        cache.get(12, "attGONE", "thumb", download)
+        self.assertEqual(len(calls), 2)
+
+    def test_missing_under_another_word_does_not_hide_the_image(self):
+        self.assertIsNone(self.cache.get(5, "attABC", "card", lambda: None))
+        self.assertIsNotNone(self.cache.get(7, "attABC", "card", lambda: png_bytes(64, 64)))
+
+    def test_lock_table_does_not_grow(self):
+        for n in range(200):
+            self.cache.get(n, f"att{n}", "card", lambda: None)
+        self.assertEqual(len(self.cache._locks), 64)
+
+
+@patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"})
+class ImageRouteTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = app.test_client()
+        patcher = patch("app.image_cache", ImageCache(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    @patch("app.fetch_image", return_value=png_bytes())
+    def test_serves_immutable_webp(self, mock_fetch):
+        resp = self.client.get("/images/12/attABC/card.webp")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, "image/webp")
+        self.assertTrue(resp.cache_control.immutable)
+        self.assertEqual(resp.cache_control.max_age, IMMUTABLE_MAX_AGE)
+        mock_fetch.assert_called_once_with("TOKEN", 12, "attABC")
+
+        again = self.client.get(
+            "/images/12/attABC/card.webp", headers={"If-None-Match": resp.headers["ETag"]}
+        )
+        self.assertEqual(again.status_code, 304)
+        mock_fetch.assert_called_once()
+
+    @patch("app.fetch_image", return_value=None)
+    def test_missing_attachment(self, mock_fetch):
+        self.assertEqual(self.client.get("/images/12/attOLD/card.webp").status_code, 404)
+
+    @patch("app.fetch_image", return_value=png_bytes())
+    def test_ids_checked_against_word_store(self, mock_fetch):
+        store = MagicMock()
+        store.image_id.side_effect = lambda freq: "attABC" if freq == 12 else None
+        with patch("app.word_store", store):
+            self.assertEqual(self.client.get("/images/12/attEVIL/card.webp").status_code, 404)
+            self.assertEqual(self.client.get("/images/13/attABC/card.webp").status_code, 404)
+            mock_fetch.assert_not_called()
+            self.assertEqual(self.client.get("/images/12/attABC/card.webp").status_code, 200)
+
+    @patch("app.fetch_image", return_value=png_bytes(64, 64))
+    def test_unverified_lookups_are_limited(self, mock_fetch):
+        limiter = RateLimiter(":memory:", rate=0.5, burst=1.0)
+        with patch("app.image_lookups", limiter):
+            self.assertEqual(self.client.get("/images/12/attABC/card.webp").status_code, 200)
+            resp = self.client.get("/images/13/attRANDOM/card.webp")
+            # Cached images need no lookup.
+            self.assertEqual(self.client.get("/images/12/attABC/thumb.webp").status_code, 200)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers["Retry-After"], "2")
+        self.assertTrue(resp.cache_control.no_store)
+        mock_fetch.assert_called_once()
+
+    @patch("app.fetch_image", side_effect=RuntimeError("down"))
+    def test_download_failure(self, mock_fetch):
+        with self.assertLogs("app", level="ERROR"):
+            resp = self.client.get("/images/12/attABC/card.webp")
+        self.assertEqual(resp.status_code, 502)
+        self.assertTrue(resp.cache_control.no_store)
+
+
+if __name__ == "__main__":
+    unittest.main()
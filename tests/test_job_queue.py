@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+from scripts.cli import Worker, main, split_range
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.now = [1000.0]
+        self.queue = JobQueue(
+            os.path.join(self.tmp.name, "jobs.sqlite3"),
+            max_attempts=2,
+            lease=60,
+            clock=lambda: self.now[0],
+        )
+
+    def test_claims_oldest_first(self):
+        first = self.queue.enqueue("translate", {"freq_range": "1-10"})
+        self.queue.enqueue("images", {"freq_range": "1-10"})
+
+        job = self.queue.claim()
+        self.assertEqual((job.id, job.kind, job.status, job.attempts), (first, "translate", RUNNING, 1))
+        self.assertEqual(job.args, {"freq_range": "1-10"})
+        self.assertEqual(self.queue.claim().kind, "images")
+        self.assertIsNone(self.queue.claim())
+
+    def test_failures_retry_then_fail(self):
+        job_id = self.queue.enqueue("upload")
+        self.queue.claim()
+        self.assertEqual(self.queue.fail(job_id, "boom"), QUEUED)
+        self.queue.claim()
+        self.assertEqual(self.queue.fail(job_id, "boom"), FAILED)
+        self.assertIsNone(self.queue.claim())
+        self.assertEqual(self.queue.get(job_id).error, "boom")
+
+    def test_expired_lease_is_claimed_again(self):
+        job_id = self.queue.enqueue("sync")
+        self.queue.claim()
+        self.assertIsNone(self.queue.claim())
+        self.now[0] += 61
+        self.assertEqual(self.queue.claim().id, job_id)
+
+    def test_expired_leases_count_as_attempts(self):
+        # A job that keeps killing its worker stops being handed out.
+        job_id = self.queue.enqueue("sync")
+        for _ in range(2):
+            self.assertEqual(self.queue.claim().id, job_id)
+            self.now[0] += 61
+        self.assertIsNone(self.queue.claim())
+        job = self.queue.get(job_id)
+        self.assertEqual((job.status, job.attempts, job.error), (FAILED, 2, "lease expired"))
+
+    def test_worker_runs_jobs_with_one_handler(self):
+        calls = []
+        self.queue.enqueue("translate", {"freq_range": "1-5"})
+        bad = self.queue.enqueue("images", {"freq_range": "x"})
+
+        def handler(kind, freq_range):
+            if freq_range == "x":
+                raise ValueError("bad range")
+            calls.append((kind, freq_range))
+
+        with self.assertLogs("scripts.cli", level="ERROR"):
+            processed = Worker(self.queue, handler).run(once=True)
+
+        self.assertEqual(processed, 3)  # the bad job is retried once
+        self.assertEqual(calls, [("translate", "1-5")])
+        self.assertEqual(self.queue.counts(), {DONE: 1, FAILED: 1})
+        self.assertEqual(self.queue.get(bad).error, "ValueError: bad range")
+
+    @patch.dict(os.environ, {"OPENAI_KEY": "o", "AIRTABLE_API_KEY": "k"})
+    @patch("scripts.translate_words.translate_word", side_effect=RuntimeError("quota"))
+    @patch("scripts.translate_words.fetch_french_words", return_value=[("rec1", "un")])
+    def test_job_with_failed_words_is_retried_then_failed(self, mock_fetch, mock_translate):
+        job_id = self.queue.enqueue("translate", {"freq_range": "1-1"})
+
+        with patch("sys.stdout"), self.assertLogs("scripts.cli", level="ERROR"):
+            Worker(self.queue).run(once=True)
+
+        job = self.queue.get(job_id)
+        self.assertEqual((job.status, job.attempts), (FAILED, 2))
+        self.assertEqual(job.error, "BatchError: 1 of 1 words failed")
+
+
+class CliTests(unittest.TestCase):
+    def test_split_range(self):
+        self.assertEqual(split_range("1-45", 20), ["1-20", "21-40", "41-45"])
+        self.assertEqual(split_range("3-7", None), ["3-7"])
+
+    def test_enqueue_and_list(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "q.sqlite3")
+            with patch("sys.stdout"):
+                self.assertEqual(main(["--queue", path, "enqueue", "sync", "1-30", "--chunk", "10"]), 0)
+                self.assertEqual(main(["--queue", path, "jobs"]), 0)
+            jobs = JobQueue(path).jobs()
+        self.assertEqual([j.args["freq_range"] for j in jobs], ["21-30", "11-20", "1-10"])
+
+    @patch.dict(os.environ, {"OPENAI_KEY": "", "AIRTABLE_API_KEY": "k"})
+    def test_missing_key(self):
+        with patch("sys.stderr"):
+            self.assertEqual(main(["translate", "1-2"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
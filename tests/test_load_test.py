@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.load_test import StepResult, find_saturation, think_time
+
+
+def step(learners, requests, p95_s=0.1):
+    result = StepResult(learners=learners, duration=1.0)
+    result.latencies["GET /"] = [p95_s] * requests
+    return result
+
+
+class FindSaturationTests(unittest.TestCase):
+    def test_stops_when_throughput_flattens(self):
+        steps = [step(1, 10), step(2, 20), step(4, 38), step(8, 40)]
+        self.assertEqual(find_saturation(steps).learners, 4)
+
+    def test_still_scaling(self):
+        self.assertIsNone(find_saturation([step(1, 10), step(2, 20)]))
+
+    def test_latency_limit(self):
+        steps = [step(1, 10), step(2, 20, p95_s=0.5)]
+        self.assertEqual(find_saturation(steps, slo_ms=200).learners, 1)
+
+
+class ThinkTimeTests(unittest.TestCase):
+    def test_median(self):
+        rng = random.Random(1)
+        samples = sorted(think_time(rng, 2.0) for _ in range(2001))
+        self.assertAlmostEqual(samples[1000], 2.0, delta=0.2)
+        self.assertEqual(think_time(rng, 0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
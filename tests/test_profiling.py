@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+
+from app import app
+from profiling import SamplingProfiler, init_app, profile_run
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def test_collects_stacks_of_target_thread(self):
+        profiler = SamplingProfiler(threading.get_ident(), interval=0.001).start()
+        busy(0.05)
+        stacks = profiler.stop()
+        self.assertTrue(stacks)
+        self.assertTrue(any(s.endswith("test_profiling:busy") for s in stacks))
+
+
+class RequestProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        env = patch.dict(os.environ, {"PROFILE_TOKEN": "secret", "PROFILE_DIR": self.dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.dir.cleanup)
+        self.client = app.test_client()
+
+    def test_header_token_writes_collapsed_stacks(self):
+        resp = self.client.get("/api/stats", headers={"X-Profile": "secret"})
+
+        name = resp.headers["X-Profile-File"]
+        self.assertTrue(name.endswith(".folded"))
+        self.assertIn(name, os.listdir(self.dir.name))
+
+    def test_query_flag_with_cprofile(self):
+        resp = self.client.get("/api/stats?profile=secret&profile_mode=cprofile")
+
+        self.assertTrue(resp.headers["X-Profile-File"].endswith(".prof"))
+
+    def test_wrong_token_or_other_path_is_not_profiled(self):
+        resp = self.client.get("/api/stats", headers={"X-Profile": "nope"})
+        self.assertNotIn("X-Profile-File", resp.headers)
+        resp = self.client.get("/sw.js", headers={"X-Profile": "secret"})
+        self.assertNotIn("X-Profile-File", resp.headers)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_disabled_without_server_token(self):
+        with patch.dict(os.environ, {"PROFILE_TOKEN": ""}):
+            resp = self.client.get("/api/stats", headers={"X-Profile": ""})
+        self.assertNotIn("X-Profile-File", resp.headers)
+
+    def test_failing_view_stops_profiler(self):
+        # With propagated exceptions (debug or testing) after_request is skipped.
+        failing = Flask(__name__)
+        failing.config["PROPAGATE_EXCEPTIONS"] = True
+        init_app(failing)
+
+        @failing.route("/api/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            failing.test_client().get("/api/boom", headers={"X-Profile": "secret"})
+
+        self.assertEqual(len(os.listdir(self.dir.name)), 1)
+        self.assertFalse(
+            [t for t in threading.enumerate() if t.name == "sampling-profiler" and t.is_alive()]
+        )
+
+
+class ProfileRunTests(unittest.TestCase):
+    def test_env_switch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch.dict(os.environ, {"PROFILE_RUN": "cprofile", "PROFILE_DIR": tmp}):
+                with profile_run("translate_words"):
+                    busy(0.01)
+            files = os.listdir(tmp)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith("translate_words-"))
+
+            with patch.dict(os.environ, {"PROFILE_RUN": "", "PROFILE_DIR": tmp}):
+                with profile_run("translate_words"):
+                    pass
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
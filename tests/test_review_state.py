@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from review_state import AdaptiveReviewState, DueQueueJob, ReviewStateCache, UserReviewState
+
+
+class UserReviewStateTests(unittest.TestCase):
+    def test_due_applies_level_ages(self):
+        state = UserReviewState(
+            {
+                "1": (1, "2024-03-09"),  # 1 day old: not strictly before cutoff
+                "2": (1, "2024-03-08"),
+                "3": (2, "2024-03-01"),  # 9 days old, needs 7
+                "4": (3, "2024-03-01"),  # 9 days old, needs 14
+                "5": (5, "2024-03-10"),
+                "x": (1, "2000-01-01"),
+            },
+            loaded_at=0,
+        )
+        self.assertEqual(state.due(date(2024, 3, 10)), [(2, 1), (3, 2), (5, 5)])
+
+    def test_due_prefers_oldest(self):
+        cards = {str(i): (4, f"2024-01-{i:02d}") for i in range(1, 10)}
+        state = UserReviewState(cards, loaded_at=0)
+        self.assertEqual(
+            state.due(date(2024, 6, 1), count=3), [(1, 4), (2, 4), (3, 4)]
+        )
+
+    def test_apply(self):
+        state = UserReviewState({"3": (2, "2024-01-01")}, loaded_at=0)
+        state.apply("3", "practice", "2024-02-01")
+        state.apply("9", "forget", "2024-02-01")
+        self.assertEqual(state.cards, {"3": (3, "2024-02-01"), "9": (1, "2024-02-01")})
+
+    def test_due_queue_built_once_per_day_and_updated_by_answers(self):
+        cards = {str(i): (2, f"2024-01-{i:02d}") for i in range(1, 8)}
+        state = UserReviewState(cards, loaded_at=0)
+        today = date(2024, 3, 1)
+
+        self.assertEqual(state.due(today, count=2), [(1, 2), (2, 2)])
+        queue = state.queue
+        state.apply("1", "practice", "2024-03-01")  # level 3, answered today
+        state.apply("2", "forget", "2024-01-02")  # level 1, still overdue
+        state.apply("40", "forget", "2023-12-01")
+
+        self.assertIs(state.prepare(today), queue)
+        self.assertEqual(state.due(today, count=2), [(2, 1), (3, 2), (4, 2), (40, 1)])
+        self.assertEqual(len(queue), 7)
+        self.assertIsNot(state.prepare(date(2024, 3, 2)), queue)
+
+
+class AdaptiveReviewStateTests(unittest.TestCase):
+    def test_due_by_recall_probability(self):
+        state = AdaptiveReviewState(
+            {
+                "1": (2, "2024-03-08", 10.0, 2.5),  # reviewed 2 days ago
+                "2": (2, "2024-02-10", 10.0, 2.5),
+                "3": (4, "2024-02-10", None, None),  # ladder row, level 4: 30 days
+                "4": (1, "2024-01-01", 2.0, 1.3),
+                "x": (1, "2000-01-01", 1.0, 2.5),
+            },
+            loaded_at=0,
+        )
+        today = date(2024, 3, 10)
+        self.assertEqual(state.due(today), [(2, 2), (4, 1)])
+        self.assertEqual(state.due(today, count=1), [(4, 1)])
+        self.assertEqual(state.tracked(), {1, 2, 3, 4})
+
+    def test_apply_updates_model(self):
+        state = AdaptiveReviewState({"4": (1, "2024-01-01", 2.0, 1.3)}, loaded_at=0)
+        state.apply("4", "practice", "2024-03-10")
+        state.apply("9", "forget", "2024-01-01")
+
+        self.assertEqual(state.cards["4"][:2], (2, "2024-03-10"))
+        self.assertEqual(state.cards["9"], (1, "2024-01-01", 1.0, 2.5))
+        self.assertEqual(state.due(date(2024, 3, 10)), [(9, 1)])
+
+    def test_cache_factory(self):
+        cache = ReviewStateCache(factory=AdaptiveReviewState)
+        state = cache.get("alice", lambda: {"3": (1, "2024-01-01", None, None)})
+        self.assertIsInstance(state, AdaptiveReviewState)
+        self.assertEqual(cache.prepare_due(date(2024, 3, 1)), 0)
+
+
+class ReviewStateCacheTests(unittest.TestCase):
+    def test_loads_once_per_user(self):
+        cache = ReviewStateCache()
+        calls = []
+        loader = lambda: calls.append(1) or {"3": (1, "2024-01-01")}
+
+        first = cache.get("alice", loader)
+        second = cache.get("alice", loader)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+
+    def test_reloads_after_ttl(self):
+        now = [0.0]
+        cache = ReviewStateCache(ttl=10, clock=lambda: now[0])
+        cache.get("alice", lambda: {})
+        now[0] = 11
+        state = cache.get("alice", lambda: {"3": (2, "2024-01-01")})
+        self.assertEqual(state.cards, {"3": (2, "2024-01-01")})
+
+    def test_evicts_least_recently_used_users(self):
+        cache = ReviewStateCache(shards=1, max_users_per_shard=2)
+        for user in ("a", "b", "a", "c"):
+            cache.get(user, dict)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_apply_only_updates_loaded_users(self):
+        cache = ReviewStateCache()
+        state = cache.get("alice", dict)
+        cache.apply("alice", "3", "practice", "2024-01-01")
+        cache.apply("bob", "3", "practice", "2024-01-01")
+
+        self.assertEqual(state.cards, {"3": (1, "2024-01-01")})
+        self.assertNotIn("bob", cache)
+
+    def test_answer_during_load_is_not_lost(self):
+        cache = ReviewStateCache()
+        started = threading.Event()
+        release = threading.Event()
+        # Airtable before and after the answer below is written.
+        rows = [{"3": (1, "2024-01-01")}]
+        calls = []
+
+        def loader():
+            calls.append(1)
+            snapshot = rows[-1]
+            started.set()
+            release.wait(5)
+            return snapshot
+
+        results = []
+        reader = threading.Thread(target=lambda: results.append(cache.get("alice", loader)))
+        reader.start()
+        self.assertTrue(started.wait(5))
+        rows.append({"3": (2, "2024-01-02")})
+        cache.apply("alice", "3", "practice", "2024-01-02")
+        release.set()
+        reader.join(5)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results[0].cards, {"3": (2, "2024-01-02")})
+        self.assertIs(cache.get("alice", loader), results[0])
+
+    def test_answers_during_every_load_skip_the_cache(self):
+        cache = ReviewStateCache()
+
+        def loader():
+            cache.apply("alice", "3", "practice", "2024-01-02")
+            return {}
+
+        with self.assertLogs("review_state", level="WARNING"):
+            cache.get("alice", loader)
+        self.assertNotIn("alice", cache)
+
+    def test_prepare_due(self):
+        cache = ReviewStateCache()
+        state = cache.get("alice", lambda: {"3": (1, "2024-01-01")})
+        job = DueQueueJob(cache, clock=lambda: datetime(2024, 3, 1, 23, 59, 0, tzinfo=timezone.utc))
+
+        self.assertEqual(job.seconds_until_next_run(), 61.0)
+        self.assertEqual(job.run_once(), 1)
+        self.assertEqual(state.queue.head(5), [(3, 1)])
+        self.assertEqual(cache.prepare_due(date(2024, 3, 1)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import scheduler
+from scheduler import (
+    DEFAULT_EASE,
+    FIRST_STABILITY,
+    MIN_EASE,
+    TARGET_RETENTION,
+    CardModel,
+    card_memory,
+    elapsed_days,
+    recall,
+    review,
+    scheduler_name,
+)
+
+
+class ModelTests(unittest.TestCase):
+    def test_recall_reaches_target_at_stability(self):
+        self.assertAlmostEqual(recall(12.0, 12.0), TARGET_RETENTION)
+        self.assertEqual(recall(12.0, 0), 1.0)
+        self.assertLess(recall(12.0, 30), recall(30.0, 30))
+
+    def test_review_grows_and_cuts_stability(self):
+        first = review(None, 0, "practice")
+        self.assertEqual(first, (FIRST_STABILITY["practice"], DEFAULT_EASE))
+        on_time = review(first, first[0], "practice")
+        self.assertAlmostEqual(on_time[0], first[0] * DEFAULT_EASE, places=2)
+        self.assertLess(review(first, 1, "practice")[0], on_time[0])
+        self.assertGreater(on_time[1], DEFAULT_EASE)
+
+        lapsed = review(on_time, 30, "forget")
+        self.assertLess(lapsed[0], on_time[0])
+        self.assertLess(lapsed[1], on_time[1])
+        self.assertGreaterEqual(review((1.0, MIN_EASE), 1, "forget")[1], MIN_EASE)
+
+    def test_card_memory_seeds_ladder_rows(self):
+        self.assertEqual(card_memory(3, None, None), (14.0, DEFAULT_EASE))
+        self.assertEqual(card_memory("x", "", "bad"), (1.0, DEFAULT_EASE))
+        self.assertEqual(card_memory(1, 42.5, 2.1), (42.5, 2.1))
+
+    def test_elapsed_days(self):
+        self.assertEqual(elapsed_days("2024-03-01", "2024-03-11"), 10.0)
+        self.assertEqual(elapsed_days("", "2024-03-11"), 0.0)
+        self.assertEqual(elapsed_days("2024-03-11", "2024-03-01"), 0.0)
+
+    def test_scheduler_name(self):
+        self.assertEqual(scheduler_name(None), "ladder")
+        self.assertEqual(scheduler_name("adaptive"), "adaptive")
+        with self.assertLogs("scheduler", level="WARNING"):
+            self.assertEqual(scheduler_name("sm2"), "ladder")
+
+
+class CardModelTests(unittest.TestCase):
+    DAY = 738000
+
+    def cards(self):
+        # (frequency, stability, ease, days since review)
+        return [
+            (1, 10.0, 2.5, 5),  # not due yet
+            (2, 10.0, 2.5, 20),
+            (3, 2.0, 2.5, 20),  # least likely recalled
+            (4, 50.0, 2.5, 60),
+        ]
+
+    def model(self):
+        return CardModel([(f, s, e, self.DAY - age) for f, s, e, age in self.cards()])
+
+    def check_select(self):
+        model = self.model()
+        self.assertEqual(model.select(self.DAY, 10), [3, 2, 4])
+        self.assertEqual(model.select(self.DAY, 2), [3, 2])
+        self.assertEqual(model.select(self.DAY, 0), [])
+
+        model.set(3, 40.0, 2.6, self.DAY)
+        for freq in range(100, 140):
+            model.set(freq, 1.0, 2.5, self.DAY - 30)
+        self.assertEqual(len(model), 44)
+        self.assertIn(139, model)
+        self.assertNotIn(3, model.select(self.DAY, 50))
+        self.assertEqual(len(model.select(self.DAY, 50)), 42)
+        # Equally overdue cards come lowest frequency first.
+        model.set(90, 1.0, 2.5, self.DAY - 30)
+        self.assertEqual(model.select(self.DAY, 3), [90, 100, 101])
+
+    def test_select(self):
+        self.check_select()
+
+    def test_select_without_numpy(self):
+        with patch.object(scheduler, "numpy", None):
+            self.check_select()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import scheduler
+from airtable_data_access import next_level
+from benchmarks import simulate
+from review_state import AdaptiveReviewState, UserReviewState
+
+
+def random_population(rng, learners=6, vocabulary=80, today=120):
+    pop = simulate.Population(learners, vocabulary, rng)
+    pop.introduced[:] = rng.integers(0, vocabulary + 1, learners)
+    pop.level[:] = rng.integers(1, 6, (learners, vocabulary))
+    pop.last[:] = rng.integers(0, today, (learners, vocabulary))
+    pop.stability[:] = rng.uniform(0.5, 60, (learners, vocabulary))
+    pop.ease[:] = rng.uniform(1.3, 3.0, (learners, vocabulary))
+    for i, count in enumerate(pop.introduced):
+        pop.level[i, count:] = 0
+    return pop
+
+
+def chosen(pop, columns, valid, learner):
+    return sorted(
+        (int(col) + 1, int(pop.level[learner, col]))
+        for col, ok in zip(columns[learner], valid[learner])
+        if ok
+    )
+
+
+@unittest.skipIf(simulate.numpy is None, "numpy not installed")
+class VectorisedRulesTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = simulate.numpy.random.default_rng(7)
+        self.today = 120
+        self.day = date.fromordinal(simulate.EPOCH + self.today)
+
+    def test_ladder_selection_matches_review_state(self):
+        pop = random_population(self.rng, today=self.today)
+        columns, valid = simulate.ladder_due(pop, self.today, pop.width())
+        for learner in range(pop.learners):
+            state = UserReviewState(simulate.learner_cards(pop, "ladder", learner), 0)
+            self.assertEqual(chosen(pop, columns, valid, learner), state.due(self.day))
+
+    def test_adaptive_selection_matches_card_model(self):
+        pop = random_population(self.rng, today=self.today)
+        columns, valid = simulate.adaptive_due(pop, self.today, pop.width())
+        for learner in range(pop.learners):
+            state = AdaptiveReviewState(simulate.learner_cards(pop, "adaptive", learner), 0)
+            self.assertEqual(chosen(pop, columns, valid, learner), state.due(self.day))
+
+    def test_transitions_match_scalar_rules(self):
+        numpy = simulate.numpy
+        levels = numpy.array([0, 0, 1, 3, 5, 5])
+        practiced = numpy.array([True, False, False, True, True, False])
+        self.assertEqual(
+            simulate.next_levels(levels, practiced).tolist(),
+            [next_level(l, "practice" if p else "forget") for l, p in zip(levels, practiced)],
+        )
+
+        stability = self.rng.uniform(0.5, 60, 50)
+        ease = self.rng.uniform(1.3, 3.5, 50)
+        elapsed = self.rng.integers(0, 90, 50).astype(float)
+        practiced = self.rng.random(50) < 0.5
+        new = self.rng.random(50) < 0.2
+        got = simulate.review_arrays(stability, ease, elapsed, practiced, new)
+        for i in range(50):
+            memory = None if new[i] else (stability[i], ease[i])
+            outcome = "practice" if practiced[i] else "forget"
+            expected = scheduler.review(memory, elapsed[i], outcome)
+            self.assertAlmostEqual(got[0][i], expected[0], places=6)
+            self.assertAlmostEqual(got[1][i], expected[1], places=6)
+
+    def test_study_days_match_review_state(self):
+        # Every simulated answer goes through the real review state too, and
+        # both must agree on the due cards and on every row afterwards.
+        for name in simulate.SCHEDULERS:
+            pop = simulate.Population(4, 60, self.rng)
+            states = [simulate.STATE[name]({}, 0) for _ in range(pop.learners)]
+            for today in range(1, 30):
+                day = date.fromordinal(simulate.EPOCH + today)
+                studying = self.rng.random(pop.learners) < 0.8
+                expected_due = [state.due(day) if on else [] for state, on in zip(states, studying)]
+                due, fresh = simulate.study_day(pop, name, today, studying, self.rng)
+                for learner, state in enumerate(states):
+                    picked = due.rows == learner
+                    self.assertEqual(
+                        sorted(int(col) + 1 for col in due.cols[picked]),
+                        sorted(freq for freq, _ in expected_due[learner]),
+                    )
+                    for batch in (due, fresh):
+                        mine = batch.rows == learner
+                        for col, hit in zip(batch.cols[mine], batch.practiced[mine]):
+                            outcome = "practice" if hit else "forget"
+                            state.apply(str(int(col) + 1), outcome, day.isoformat())
+                    self.assertEqual(simulate.learner_cards(pop, name, learner), state.cards)
+
+    def test_simulate(self):
+        results = simulate.simulate("adaptive", learners=20, days=40, vocabulary=200, sample=2)
+        self.assertGreater(results["words_studied"], 25)
+        self.assertGreater(results["reviews_per_study_day"], 0)
+        self.assertLessEqual(results["reviews_per_study_day"], 25)
+        self.assertTrue(0 < results["retention_pct"] <= 100)
+        self.assertIn("due_first_ms", results)
+
+
+class ReplayTests(unittest.TestCase):
+    EVENTS = [
+        {"user": "ann", "frequency": 3, "outcome": "practice", "timestamp": "2024-01-01T09:00:00Z"},
+        {"user": "ann", "frequency": 3, "outcome": "practice", "timestamp": "2024-01-09T09:00:00Z"},
+        {"user": "ann", "frequency": 3, "outcome": "forget", "timestamp": "2024-02-20T09:00:00Z"},
+        {"user": "bob", "frequency": 3, "outcome": "forget", "timestamp": "2024-01-02T09:00:00Z"},
+        {"user": "bob", "frequency": 3, "outcome": "maybe", "timestamp": "2024-01-03T09:00:00Z"},
+    ]
+
+    def test_replay_through_review_state(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                for event in reversed(self.EVENTS):
+                    f.write(json.dumps(event) + "\n")
+            events = simulate.read_events(path)
+
+        ladder = simulate.replay(events, "ladder")
+        self.assertEqual((ladder["events"], ladder["users"]), (4, 2))
+        self.assertEqual(ladder["recalled_pct"], 50.0)
+        self.assertEqual(ladder["recalled_pct_by_level"], {1: 100.0, 2: 0.0})
+        self.assertNotIn("log_loss", ladder)
+
+        adaptive = simulate.replay(events, "adaptive")
+        self.assertEqual(adaptive["events"], 4)
+        self.assertIn("log_loss", adaptive)
+        self.assertTrue(0 < adaptive["predicted_recall_pct"] < 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from single_flight import SingleFlight
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+class SingleFlightTests(unittest.TestCase):
+    def run_concurrently(self, flight, key, fn, callers=5):
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                results.append(flight.do(key, fn))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(callers)]
+        for t in threads:
+            t.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_share_one_upstream_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def upstream():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ["deck"]
+
+        leader = threading.Thread(target=lambda: flight.do(("deck", "alice"), upstream))
+        leader.start()
+        started.wait(5)
+        threads, results, errors = self.run_concurrently(
+            flight, ("deck", "alice"), upstream, callers=3
+        )
+        # Wait until every follower is registered before releasing the leader.
+        wait_until(lambda: flight.stats()["deck"]["saved"] == 3)
+        release.set()
+        for t in threads + [leader]:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [["deck"]] * 3)
+        self.assertEqual(errors, [])
+        self.assertEqual(flight.stats(), {"deck": {"upstream": 1, "saved": 3}})
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def upstream():
+            release.wait(5)
+            raise RuntimeError("airtable down")
+
+        leader_errors = []
+
+        def lead():
+            try:
+                flight.do(("deck", "bob"), upstream)
+            except RuntimeError as exc:
+                leader_errors.append(exc)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        wait_until(flight.stats)
+        threads, results, errors = self.run_concurrently(
+            flight, ("deck", "bob"), upstream, callers=2
+        )
+        wait_until(lambda: flight.stats()["deck"]["saved"] == 2)
+        release.set()
+        for t in threads + [leader]:
+            t.join(5)
+
+        self.assertEqual(len(leader_errors), 1)
+        self.assertEqual([str(e) for e in errors], ["airtable down"] * 2)
+
+    def test_sequential_calls_are_not_shared(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do(("deck", "a"), lambda: 1), 1)
+        self.assertEqual(flight.do(("deck", "a"), lambda: 2), 2)
+        self.assertEqual(flight.do(("deck", "b"), lambda: 3), 3)
+        self.assertEqual(flight.stats(), {"deck": {"upstream": 3, "saved": 0}})
+
+
+if __name__ == "__main__":
+    unittest.main()
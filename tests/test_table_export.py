@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import airtable_data_access as data
+from benchmarks.fake_airtable import FakeAirtable
+from columnar_file import INT64, TEXT, ColumnarFile, ColumnarFormatError, write_columns
+from table_export import (
+    export_reviews,
+    export_words,
+    import_reviews,
+    import_words,
+    load_word_store,
+)
+from word_store import WordStore
+
+
+class ColumnarFileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "table.flcf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        rows = write_columns(
+            self.path, {"n": (INT64, [3, -1, 2**40]), "s": (TEXT, ["été", None, ""])}
+        )
+        self.assertEqual(rows, 3)
+        with ColumnarFile(self.path) as table:
+            self.assertEqual(table.names, ["n", "s"])
+            self.assertEqual(list(table["n"]), [3, -1, 2**40])
+            self.assertEqual(list(table["s"]), ["été", None, ""])
+            self.assertEqual(table["s"][-3], "été")
+            table.preload()
+            self.assertEqual(list(table["n"]), [3, -1, 2**40])
+
+    def test_rejects_other_files(self):
+        write_columns(self.path, {"n": (INT64, [1, 2, 3])})
+        with open(self.path, "rb") as f:
+            good = f.read()
+        for bad in (b"nope", b"XXXX" + good[4:], good[:-8]):
+            with open(self.path, "wb") as f:
+                f.write(bad)
+            with self.assertRaises(ColumnarFormatError):
+                ColumnarFile(self.path)
+
+
+class TableExportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = FakeAirtable()
+        self.source.start()
+        self.addCleanup(self.source.stop)
+        self.source.seed_vocabulary(150)
+        self.source.seed_reviews(30, user="ann")
+
+    def point_at(self, fake):
+        for name, table in (("AIRTABLE_URL", "french_words"), ("SPACED_REP_URL", "spaced_rep")):
+            p = patch.object(data, name, f"{fake.url}/{data.BASE_ID}/{table}")
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_words_export_maps_to_the_same_cards(self):
+        self.point_at(self.source)
+        path = os.path.join(self.tmp.name, "words.flcf")
+        self.assertEqual(export_words("k", path), 150)
+
+        mapped = WordStore.open(path)
+        deck = {"spaced_pairs": [(7, 3)], "filler": [1, 150, 999]}
+        fetched = data.fetch_flashcards("k", **deck)
+        self.assertEqual(len(fetched), 3)
+        self.assertEqual(data.fetch_flashcards("k", store=mapped, **deck), fetched)
+        self.assertEqual(mapped.to_json([1, 7, 150], {7: 3}), data.flashcards_to_json(fetched))
+        self.assertEqual(mapped.max_frequency, 150)
+
+    def test_import_restores_exported_tables(self):
+        self.point_at(self.source)
+        words = os.path.join(self.tmp.name, "words.flcf")
+        reviews = os.path.join(self.tmp.name, "reviews.flcf")
+        export_words("k", words)
+        self.assertEqual(export_reviews("k", reviews), 30)
+
+        with FakeAirtable() as target:
+            self.point_at(target)
+            self.assertEqual(import_words("k", words), 150)
+            self.assertEqual(import_reviews("k", reviews), 30)
+            restored = {
+                r["fields"]["Frequency"]: r["fields"] for r in target.records("french_words")
+            }
+            self.assertEqual(restored[12]["french_word"], "mot12")
+            self.assertEqual(restored[12]["english_word"], "word 12")
+            self.assertEqual(
+                sorted(r["fields"]["Frequency"] for r in target.records("spaced_rep")),
+                sorted(r["fields"]["Frequency"] for r in self.source.records("spaced_rep")),
+            )
+            self.assertEqual({r["fields"]["User"] for r in target.records("spaced_rep")}, {"ann"})
+
+    def test_review_round_trip_keeps_adaptive_memory(self):
+        self.point_at(self.source)
+        reviews = os.path.join(self.tmp.name, "reviews.flcf")
+        with patch.object(data, "SCHEDULER", "adaptive"):
+            today = self.source.today().isoformat()
+            self.assertTrue(data.log_practice("k", "7", today, "ann"))
+            self.assertTrue(data.log_forget("k", "900", today, "ann"))
+            before = data.fetch_review_state("k", "ann")
+            self.assertIsNotNone(before["7"][2])
+            export_reviews("k", reviews)
+
+            with FakeAirtable() as target:
+                self.point_at(target)
+                import_reviews("k", reviews)
+                self.assertEqual(data.fetch_review_state("k", "ann"), before)
+
+    def test_load_word_store(self):
+        self.assertIsNone(load_word_store(""))
+        missing = os.path.join(self.tmp.name, "missing.flcf")
+        with self.assertLogs("table_export", level="WARNING"):
+            self.assertIsNone(load_word_store(missing))
+
+
+if __name__ == "__main__":
+    unittest.main()
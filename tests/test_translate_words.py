@@ -1,5 +1,8 @@
 import unittest
 import json
+import os
+import subprocess
+import sys
 from unittest.mock import patch, MagicMock
 
 from scripts.translate_words import (
@@ -10,8 +13,14 @@ from scripts.translate_words import (
     upload_image_to_airtable,
     update_word_record,
     AIRTABLE_URL,
+    BASE_PROMPT,
+    BatchError,
+    load_prompt_template,
+    translate_range,
 )
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
 
 class ParseFrequencyRangeTests(unittest.TestCase):
     def test_valid_range(self):
@@ -27,16 +36,18 @@ class ParseFrequencyRangeTests(unittest.TestCase):
 
 
 class FetchWordsTests(unittest.TestCase):
-    @patch("scripts.translate_words.requests.get")
-    def test_fetch_words(self, mock_get):
+    @patch("scripts.translate_words.http_session")
+    def test_fetch_words(self, mock_session):
+        mock_get = mock_session.return_value.get
         resp = MagicMock()
         resp.raise_for_status.return_value = None
-        resp.json.return_value = {
+        body = {
             "records": [
                 {"id": "rec1", "fields": {"french_word": "bonjour"}},
                 {"id": "rec2", "fields": {"french_word": "chat"}},
             ]
         }
+        resp.iter_content.return_value = [json.dumps(body).encode("utf-8")]
         mock_get.return_value = resp
 
         result = fetch_french_words("TOKEN", 1, 2)
@@ -48,11 +59,66 @@ class FetchWordsTests(unittest.TestCase):
         self.assertEqual(kwargs["headers"], headers)
         params = kwargs["params"]
         self.assertIn("filterByFormula", params)
+        self.assertEqual(params["fields[]"], "french_word")
         self.assertEqual(result, [("rec1", "bonjour"), ("rec2", "chat")])
 
+    @patch("scripts.translate_words.http_session")
+    def test_fetch_words_follows_offset(self, mock_session):
+        mock_get = mock_session.return_value.get
+        pages = [
+            {"records": [{"id": "rec1", "fields": {"french_word": "un"}}], "offset": "itr1"},
+            {"records": [{"id": "rec2", "fields": {"french_word": "deux"}}]},
+        ]
+        responses = []
+        for body in pages:
+            resp = MagicMock()
+            resp.iter_content.return_value = [json.dumps(body).encode("utf-8")]
+            responses.append(resp)
+        mock_get.side_effect = responses
+
+        result = fetch_french_words("TOKEN", 1, 200)
+
+        self.assertEqual(result, [("rec1", "un"), ("rec2", "deux")])
+        self.assertEqual(mock_get.call_args_list[1].kwargs["params"]["offset"], "itr1")
+
+    @patch("scripts.translate_words.translate_word")
+    @patch("scripts.translate_words.http_session")
+    def test_missing_only_skips_translated_words(self, mock_session, mock_translate):
+        resp = MagicMock()
+        resp.iter_content.return_value = [b'{"records": []}']
+        mock_session.return_value.get.return_value = resp
+
+        self.assertEqual(translate_range("OPENAI", "TOKEN", 1, 5, missing_only=True), [])
+        params = mock_session.return_value.get.call_args.kwargs["params"]
+        self.assertEqual(
+            params["filterByFormula"],
+            "AND(AND({Frequency} >= 1, {Frequency} <= 5), NOT({english_word}))",
+        )
+        mock_translate.assert_not_called()
+
+    @patch("scripts.translate_words.update_word_record")
+    @patch("scripts.translate_words.translate_word")
+    @patch(
+        "scripts.translate_words.fetch_french_words",
+        return_value=[("rec1", "un"), ("rec2", "deux"), ("rec3", "trois")],
+    )
+    def test_strict_batch_raises_after_failed_words(self, mock_fetch, mock_translate, mock_update):
+        mock_translate.side_effect = lambda key, word: (
+            {"french_word": word} if word != "deux" else 1 / 0
+        )
+        mock_update.side_effect = [None, RuntimeError("down")]
+
+        with patch("sys.stdout"), self.assertLogs("scripts.translate_words", level="ERROR"):
+            with self.assertRaises(BatchError) as ctx:
+                translate_range("OPENAI", "TOKEN", 1, 3, upload=True, strict=True)
+
+        self.assertEqual((ctx.exception.failed, ctx.exception.total), (2, 3))
+        # Every word is still tried before the batch fails.
+        self.assertEqual(mock_update.call_count, 2)
+
 
 class TranslateWordTests(unittest.TestCase):
-    @patch("scripts.translate_words.openai.OpenAI")
+    @patch("scripts.translate_words.openai_client")
     def test_translate_word(self, mock_openai):
         # Mock the client and its chat.completions.create method
         mock_client = MagicMock()
@@ -73,15 +139,16 @@ class TranslateWordTests(unittest.TestCase):
 
         result = translate_word("OPENAI", "hello")
 
-        mock_openai.assert_called_once_with(api_key="OPENAI")
+        mock_openai.assert_called_once_with("OPENAI")
         mock_client.chat.completions.create.assert_called_once()
         self.assertEqual(result, response_json)
 
 
 class GenerateImageTests(unittest.TestCase):
-    @patch("scripts.translate_words.openai.OpenAI")
-    @patch("scripts.translate_words.requests.get")
-    def test_generate_image(self, mock_get, mock_openai):
+    @patch("scripts.translate_words.openai_client")
+    @patch("scripts.translate_words.http_session")
+    def test_generate_image(self, mock_session, mock_openai):
+        mock_get = mock_session.return_value.get
         mock_client = MagicMock()
         mock_openai.return_value = mock_client
 
@@ -98,11 +165,13 @@ class GenerateImageTests(unittest.TestCase):
         img_resp.content = b"imagebytes"
         mock_get.return_value = img_resp
 
+        # Templates load on first use; do that before ``open`` is mocked.
+        load_prompt_template(BASE_PROMPT)
         with patch("builtins.open", new_callable=unittest.mock.mock_open()) as m_open:
             path = generate_image("OPENAI", "cat")
 
         mock_get.assert_called_once_with("http://example.com/img.png")
-        mock_openai.assert_any_call(api_key="OPENAI")
+        mock_openai.assert_any_call("OPENAI")
         mock_client.chat.completions.create.assert_called_once()
         mock_client.images.generate.assert_called_once()
         m_open.assert_called_once()
@@ -110,10 +179,11 @@ class GenerateImageTests(unittest.TestCase):
 
 
 class UploadFunctionsTests(unittest.TestCase):
-    @patch("scripts.translate_words.requests.post")
+    @patch("scripts.translate_words.http_session")
     @patch("scripts.translate_words.Image.open")
     @patch("builtins.open", new_callable=unittest.mock.mock_open)
-    def test_upload_image_to_airtable(self, mock_file, mock_open_image, mock_post):
+    def test_upload_image_to_airtable(self, mock_file, mock_open_image, mock_session):
+        mock_post = mock_session.return_value.post
         resp = MagicMock()
         resp.raise_for_status.return_value = None
         resp.json.return_value = {"id": "att123"}
@@ -129,8 +199,9 @@ class UploadFunctionsTests(unittest.TestCase):
         mock_img.resize.assert_called_once_with((150, 150))
         self.assertEqual(att_id, "att123")
 
-    @patch("scripts.translate_words.requests.patch")
-    def test_update_word_record(self, mock_patch):
+    @patch("scripts.translate_words.http_session")
+    def test_update_word_record(self, mock_session):
+        mock_patch = mock_session.return_value.patch
         resp = MagicMock()
         resp.raise_for_status.return_value = None
         mock_patch.return_value = resp
@@ -164,5 +235,43 @@ class UploadFunctionsTests(unittest.TestCase):
         )
 
 
+class LazyImportTests(unittest.TestCase):
+    def test_import_does_not_load_heavy_dependencies(self):
+        code = (
+            "import sys, scripts.translate_words; "
+            "print(sorted(m for m in ('openai', 'PIL.Image', 'jinja2', 'requests') "
+            "if m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(out.strip(), "[]")
+
+    def test_runs_as_a_script(self):
+        script = os.path.join(ROOT, "scripts", "translate_words.py")
+        out = subprocess.run(
+            [sys.executable, script, "--help"],
+            cwd=os.path.dirname(ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertIn("--freq-range", out)
+
+    def test_cli_runs_as_a_script(self):
+        script = os.path.join(ROOT, "scripts", "cli.py")
+        out = subprocess.run(
+            [sys.executable, script, "--help"],
+            cwd=os.path.dirname(ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertIn("enqueue", out)
+
+    def test_templates_are_memoized(self):
+        self.assertIs(load_prompt_template(BASE_PROMPT), load_prompt_template(BASE_PROMPT))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from frequency_sampler import VocabularySampler
+from review_state import ReviewStateCache
+from warmup import WarmUp
+
+
+class WarmUpTests(unittest.TestCase):
+    def test_runs_steps_once_and_reports_failures(self):
+        calls = []
+        ticks = iter(range(100))
+        warm = WarmUp(
+            [("a", lambda: calls.append("a")), ("b", lambda: 1 / 0)],
+            clock=lambda: float(next(ticks)),
+        )
+        self.assertFalse(warm.ready)
+
+        with self.assertLogs("warmup", level="WARNING"):
+            warm.run()
+        warm.run()
+
+        self.assertEqual(calls, ["a"])
+        status = warm.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["steps"], {"a": 1.0, "b": 1.0})
+        self.assertEqual(status["warmup_seconds"], 5.0)
+        self.assertIn("ZeroDivisionError", status["errors"]["b"])
+
+
+class ProbeTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_healthz(self):
+        resp = self.client.get("/healthz")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), {"status": "ok"})
+
+    def test_readyz_starts_warm_up_and_reports_ready(self):
+        warm = WarmUp([("step", lambda: None)])
+        with patch("app.warm_up", warm), patch.object(warm, "start") as mock_start:
+            resp = self.client.get("/readyz")
+            mock_start.assert_called_once()
+            self.assertEqual(resp.status_code, 503)
+
+            warm.run()
+            resp = self.client.get("/readyz")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.get_json()["ready"])
+
+    @patch.dict(os.environ, {"AIRTABLE_API_KEY": "TOKEN"})
+    @patch("app.fetch_flashcards", return_value=[])
+    @patch("app.fetch_review_state", return_value={"7": (1, "2000-01-01")})
+    @patch("app.fetch_max_frequency", return_value=50)
+    def test_app_warm_up_preloads_state(self, mock_size, mock_state, mock_fetch):
+        import app as app_module
+
+        cache = ReviewStateCache()
+        with patch("app.review_cache", cache), patch("app.vocabulary", VocabularySampler()):
+            warm = WarmUp(app_module.warm_up.steps)
+            warm.run()
+
+        self.assertEqual(warm.errors, {})
+        self.assertIn("", cache)
+        mock_state.assert_called_once_with("TOKEN", "")
+        self.assertEqual(mock_fetch.call_args.kwargs["spaced_pairs"], [(7, 1)])
+
+    @patch("app.fetch_max_frequency")
+    def test_app_warm_up_preloads_word_store(self, mock_size):
+        import app as app_module
+
+        store = MagicMock(max_frequency=40)
+        sampler = VocabularySampler()
+        with patch("app.word_store", store), patch("app.vocabulary", sampler):
+            app_module._warm_vocabulary()
+
+        store.preload.assert_called_once_with()
+        mock_size.assert_not_called()
+        self.assertEqual(sampler.get(lambda: 0).size, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import unittest
+from dataclasses import FrozenInstanceError, asdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from airtable_data_access import Flashcard, flashcards_to_json
+from word_store import WordStore
+
+
+RECORDS = [
+    {
+        "fields": {
+            "french_word": "chat",
+            "english_translation": {"value": "cat"},
+            "Frequency": 3.0,
+            "gender": "masculine",
+            "part_of_speech": "noun",
+            "example_1": "le chat dort",
+        }
+    },
+    {
+        "fields": {
+            "french_word": "Bonjour",
+            "english_translation": {"value": "Hello"},
+            "Frequency": "1",
+        }
+    },
+    {"fields": {"french_word": "", "Frequency": "2"}},
+    {"fields": {"french_word": "sans", "english_translation": {"value": "x"}}},
+]
+
+
+class FlashcardTests(unittest.TestCase):
+    def test_frozen_and_slotted(self):
+        card = Flashcard(front="a", back="b")
+        with self.assertRaises(FrozenInstanceError):
+            card.front = "c"
+        self.assertFalse(hasattr(card, "__dict__"))
+
+    def test_to_dict_matches_asdict(self):
+        card = Flashcard(front="a", back="b", frequency="1", level="2", gender="f")
+        self.assertEqual(card.to_dict(), asdict(card))
+
+    def test_flashcards_to_json(self):
+        cards = [Flashcard(front="été", back="summer", frequency="4")]
+        self.assertEqual(json.loads(flashcards_to_json(cards)), [asdict(cards[0])])
+        self.assertIn("été", flashcards_to_json(cards))
+
+
+class WordStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.store = WordStore.from_records(RECORDS)
+
+    def test_skips_invalid_records_and_sorts(self):
+        self.assertEqual(list(self.store), [1, 3])
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.max_frequency, 3)
+        self.assertIn("3", self.store)
+        self.assertNotIn(2, self.store)
+
+    def test_card_lookup(self):
+        self.assertEqual(
+            self.store.card(3, level="2"),
+            Flashcard(
+                front="chat",
+                back="cat",
+                frequency="3",
+                level="2",
+                gender="masculine",
+                part_of_speech="noun",
+                example_1="le chat dort",
+                example_2=None,
+            ),
+        )
+        self.assertIsNone(self.store.card(99))
+
+    def test_image_id(self):
+        store = WordStore.from_records(
+            [{"fields": {"french_word": "chien", "Frequency": 5, "image": [{"id": "attDOG"}]}}]
+        )
+        self.assertEqual(store.image_id(5), "attDOG")
+        self.assertIsNone(store.image_id(6))
+        self.assertIsNone(self.store.image_id(3))
+
+    def test_cards_applies_levels(self):
+        cards = self.store.cards([3, 1, 99], {3: 4})
+        self.assertEqual([(c.frequency, c.level) for c in cards], [("1", "1"), ("3", "4")])
+
+    def test_to_json_matches_cards(self):
+        levels = {1: 5}
+        self.assertEqual(
+            self.store.to_json([1, 3], levels),
+            flashcards_to_json(self.store.cards([1, 3], levels)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Startup warm-up and readiness reporting.
+
+A fresh instance pays for cold caches and cold Airtable connections on its
+first requests. :class:`WarmUp` runs a list of named steps once, normally in a
+background thread at startup, and records how long each took. The app reports
+liveness as soon as it serves requests and readiness only once warm-up has
+finished, so the platform can hold traffic back until then.
+
+A failing step is logged and reported but does not keep the instance out of
+rotation: it can still serve requests, just more slowly.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Run warm-up steps once and report their progress."""
+
+    def __init__(
+        self,
+        steps: List[Tuple[str, Callable[[], object]]],
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.steps = steps
+        self.clock = clock
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.seconds: Optional[float] = None
+        self._started = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def run(self) -> None:
+        """Run every step in order; later calls do nothing."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        start = self.clock()
+        for name, step in self.steps:
+            step_start = self.clock()
+            try:
+                step()
+            except Exception as exc:
+                logger.warning("Warm-up step %s failed", name, exc_info=True)
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+            self.durations[name] = self.clock() - step_start
+        self.seconds = self.clock() - start
+        self._done.set()
+        logger.info(
+            "Warm-up finished in %.3fs (%s)",
+            self.seconds,
+            ", ".join(f"{name} {secs:.3f}s" for name, secs in self.durations.items()),
+        )
+
+    def start(self) -> None:
+        """Run the warm-up in a daemon thread unless it already started."""
+        if not self._started:
+            threading.Thread(target=self.run, name="warm-up", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict[str, object]:
+        """Return a JSON-serialisable summary for the readiness probe."""
+        return {
+            "ready": self.ready,
+            "warmup_seconds": None if self.seconds is None else round(self.seconds, 3),
+            "steps": {name: round(secs, 3) for name, secs in self.durations.items()},
+            "errors": dict(self.errors),
+        }
@@ -0,0 +1,203 @@
+"""Columnar in-memory copy of the french_words table.
+
+Holding the whole vocabulary as a list of :class:`Flashcard` objects costs an
+object header and a pointer per field for every word. :class:`WordStore` keeps
+one column per field instead, with frequencies in a sorted ``array`` so that a
+lookup is a binary search and the per-word overhead is a few pointers.
+
+A store can be saved to a :mod:`columnar_file` and opened again as a memory
+map, whose columns stand in for the lists (see :mod:`table_export`).
+"""
+
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from airtable_data_access import Flashcard, attachment_id, decode_deck_record, parse_frequency
+from columnar_file import INT64, TEXT, ColumnarFile, ColumnarFormatError, write_columns
+
+# Columns stored for each word, in the order of the ``Flashcard`` fields.
+COLUMNS = ("front", "back", "gender", "part_of_speech", "example_1", "example_2", "image")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # gender and part_of_speech only take a handful of distinct values.
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class WordStore:
+    """Struct-of-arrays word list keyed by frequency."""
+
+    __slots__ = ("frequencies", "_file") + COLUMNS
+
+    def __init__(self) -> None:
+        self.frequencies = array("l")
+        self.front: List[str] = []
+        self.back: List[str] = []
+        self.gender: List[Optional[str]] = []
+        self.part_of_speech: List[Optional[str]] = []
+        self.example_1: List[Optional[str]] = []
+        self.example_2: List[Optional[str]] = []
+        self.image: List[Optional[str]] = []
+        self._file: Optional[ColumnarFile] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "WordStore":
+        """Build a store from raw Airtable french_words records.
+
+        Records without a numeric ``Frequency`` or without either side of the
+        card are skipped, mirroring :func:`fetch_flashcards`. If a frequency
+        appears more than once the last record wins.
+        """
+        rows: Dict[int, tuple] = {}
+        for rec in records:
+            front, back, freq_raw, gender, part_of_speech, example_1, example_2, images = (
+                decode_deck_record(rec)
+            )
+            freq = parse_frequency(freq_raw)
+            if freq is None or not (front or back):
+                continue
+            rows[freq] = (
+                front or "",
+                back or "",
+                _intern(gender),
+                _intern(part_of_speech),
+                example_1,
+                example_2,
+                attachment_id(images),
+            )
+
+        store = cls()
+        for freq in sorted(rows):
+            store.frequencies.append(freq)
+            for name, value in zip(COLUMNS, rows[freq]):
+                getattr(store, name).append(value)
+        return store
+
+    def save(self, path: str, extra: Optional[Dict[str, Sequence[Optional[str]]]] = None) -> int:
+        """Write the store to ``path`` as a :mod:`columnar_file`; return the word count.
+
+        ``extra`` adds text columns, one value per word in frequency order,
+        that :meth:`open` ignores.
+        """
+        columns = {"frequency": (INT64, self.frequencies)}
+        for name in COLUMNS:
+            columns[name] = (TEXT, getattr(self, name))
+        for name, values in (extra or {}).items():
+            columns[name] = (TEXT, values)
+        return write_columns(path, columns)
+
+    @classmethod
+    def open(cls, path: str) -> "WordStore":
+        """Return a store backed by a memory map of a file written by :meth:`save`.
+
+        Frequencies are binary-searched in place in the mapping and text is
+        decoded only for the cards that are requested, so opening is
+        constant-time whatever the vocabulary size.
+        """
+        data = ColumnarFile(path)
+        missing = [name for name in ("frequency",) + COLUMNS if name not in data]
+        if missing:
+            data.close()
+            raise ColumnarFormatError(f"{path} is missing columns {missing}")
+        store = cls()
+        store._file = data
+        store.frequencies = data["frequency"]
+        for name in COLUMNS:
+            setattr(store, name, data[name])
+        return store
+
+    def preload(self) -> None:
+        """Fault in every page of a mapped store; in-memory stores are already loaded."""
+        if self._file is not None:
+            self._file.preload()
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    def __contains__(self, frequency: object) -> bool:
+        return self._row(frequency) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.frequencies)
+
+    @property
+    def max_frequency(self) -> int:
+        """Return the highest frequency in the store, or 0 when empty."""
+        return self.frequencies[-1] if self.frequencies else 0
+
+    def _row(self, frequency: object) -> Optional[int]:
+        freq = parse_frequency(frequency)
+        if freq is None:
+            return None
+        idx = bisect_left(self.frequencies, freq)
+        if idx < len(self.frequencies) and self.frequencies[idx] == freq:
+            return idx
+        return None
+
+    def image_id(self, frequency: object) -> Optional[str]:
+        """Return the image attachment id of ``frequency``, or ``None``."""
+        idx = self._row(frequency)
+        return None if idx is None else self.image[idx]
+
+    def card(self, frequency: object, level: str = "1") -> Optional[Flashcard]:
+        """Return the :class:`Flashcard` for ``frequency`` or ``None``."""
+        idx = self._row(frequency)
+        if idx is None:
+            return None
+        return Flashcard(
+            front=self.front[idx],
+            back=self.back[idx],
+            frequency=str(self.frequencies[idx]),
+            level=level,
+            gender=self.gender[idx],
+            part_of_speech=self.part_of_speech[idx],
+            example_1=self.example_1[idx],
+            example_2=self.example_2[idx],
+            image=self.image[idx],
+        )
+
+    def cards(
+        self, frequencies: Iterable[object], levels: Optional[Dict[int, int]] = None
+    ) -> List[Flashcard]:
+        """Return cards for ``frequencies`` in frequency order.
+
+        ``levels`` maps frequency to knowledge level; missing entries default to
+        level 1. Unknown frequencies are ignored.
+        """
+        levels = levels or {}
+        rows = sorted({i for i in map(self._row, frequencies) if i is not None})
+        return [
+            self.card(self.frequencies[i], str(levels.get(self.frequencies[i], 1)))
+            for i in rows
+        ]
+
+    def to_json(
+        self, frequencies: Iterable[object], levels: Optional[Dict[int, int]] = None
+    ) -> str:
+        """Serialize cards for ``frequencies`` straight from the columns.
+
+        The output matches :func:`flashcards_to_json` for the same cards without
+        building intermediate :class:`Flashcard` objects.
+        """
+        levels = levels or {}
+        rows = sorted({i for i in map(self._row, frequencies) if i is not None})
+        out = []
+        for i in rows:
+            freq = self.frequencies[i]
+            out.append(
+                {
+                    "front": self.front[i],
+                    "back": self.back[i],
+                    "frequency": str(freq),
+                    "level": str(levels.get(freq, 1)),
+                    "gender": self.gender[i],
+                    "part_of_speech": self.part_of_speech[i],
+                    "example_1": self.example_1[i],
+                    "example_2": self.example_2[i],
+                    "image": self.image[i],
+                }
+            )
+        return json.dumps(out, ensure_ascii=False, separators=(",", ":"))